@@ -0,0 +1,27 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Tuple, TypeVar
+
+# benchmarks are run from a checkout of the repository and take Java files of its tests as inputs
+TEST_DIRECTORY = Path(__file__).absolute().parents[1] / "test"
+
+_Result = TypeVar("_Result")
+
+
+def measure_time(function: Callable[[], _Result], repeats: int) -> Tuple[_Result, float]:
+    """
+    Returns result of the function and its best time in seconds among several repeats.
+    """
+    best_time = float("inf")
+    for _ in range(repeats):
+        start_time = perf_counter()
+        result = function()
+        best_time = min(best_time, perf_counter() - start_time)
+    return result, best_time
+
+
+def create_scaled_source(source: str, body_start: int, body_end: int, scale: int) -> str:
+    """
+    Repeats the body of a class or of a method between given positions to get a larger input.
+    """
+    return source[:body_start] + source[body_start:body_end] * scale + source[body_end:]
@@ -0,0 +1,84 @@
+"""
+Compares AST storage backends by memory per file and build time.
+
+Usage:
+    python -m benchmarks.ast_storage [-d DIR] [-r REPEATS]
+
+By default Java files from the repository tests are used.
+"""
+
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from statistics import mean
+from typing import Dict, List, Type
+
+from javalang.tree import CompilationUnit
+
+from veniq.ast_framework.storage import ASTStorage, CompactStorage, NetworkxStorage
+from veniq.utils.ast_builder import build_ast
+from ._common import TEST_DIRECTORY, measure_time
+
+_storage_types: List[Type[ASTStorage]] = [NetworkxStorage, CompactStorage]
+
+
+def measure_memory(javalang_ast: CompilationUnit, storage_type: Type[ASTStorage]) -> int:
+    """
+    Returns quantity of bytes allocated by the storage and still held by it after the build.
+    """
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        storage, _ = storage_type.build_from_javalang(javalang_ast)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del storage
+    return after - before
+
+
+def measure_build_time(javalang_ast: CompilationUnit, storage_type: Type[ASTStorage], repeats: int) -> float:
+    _, build_time = measure_time(lambda: storage_type.build_from_javalang(javalang_ast), repeats)
+    return build_time
+
+
+def run_benchmark(sources_directory: Path, repeats: int) -> None:
+    memory: Dict[str, List[int]] = {storage_type.__name__: [] for storage_type in _storage_types}
+    build_time: Dict[str, List[float]] = {storage_type.__name__: [] for storage_type in _storage_types}
+    nodes_qty: List[int] = []
+
+    for filepath in sorted(sources_directory.rglob("*.java")):
+        try:
+            javalang_ast = build_ast(str(filepath))
+        except Exception as e:
+            print(f"Skipping {filepath}: {e}")
+            continue
+
+        for storage_type in _storage_types:
+            memory[storage_type.__name__].append(measure_memory(javalang_ast, storage_type))
+            build_time[storage_type.__name__].append(measure_build_time(javalang_ast, storage_type, repeats))
+        nodes_qty.append(len(CompactStorage.build_from_javalang(javalang_ast)[0]))
+
+    if not nodes_qty:
+        print(f"No Java files were parsed in {sources_directory}")
+        return
+
+    print(f"Files: {len(nodes_qty)}, nodes per file: {mean(nodes_qty):.0f}")
+    print(f"{'storage':<20}{'KiB per file':>15}{'bytes per node':>17}{'ms per file':>15}")
+    for storage_name in memory:
+        print(
+            f"{storage_name:<20}"
+            f"{mean(memory[storage_name]) / 1024:>15.1f}"
+            f"{sum(memory[storage_name]) / sum(nodes_qty):>17.1f}"
+            f"{mean(build_time[storage_name]) * 1000:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument(
+        "-d", "--dir", default=str(TEST_DIRECTORY), help="Directory with Java files to build ASTs from"
+    )
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="Number of builds to time for each file")
+    args = parser.parse_args()
+    run_benchmark(Path(args.dir), args.repeats)
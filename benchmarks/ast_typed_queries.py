@@ -0,0 +1,64 @@
+"""
+Compares typed nodes queries answered by full scan and by per node type index.
+The class from LottieImageAsset.java is scaled up by repeating its body.
+
+Usage:
+    python -m benchmarks.ast_typed_queries [-s SCALE] [-r REPEATS]
+"""
+
+from argparse import ArgumentParser
+from typing import Callable, Collection, Iterator, List
+
+from javalang.parse import parse
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.storage import ASTStorage
+from ._common import TEST_DIRECTORY, create_scaled_source, measure_time
+
+_source_file = TEST_DIRECTORY / "ast_framework" / "LottieImageAsset.java"
+
+_queried_types: List[Collection[ASTNodeType]] = [
+    {ASTNodeType.METHOD_DECLARATION},
+    {ASTNodeType.MEMBER_REFERENCE},
+    {ASTNodeType.LOCAL_VARIABLE_DECLARATION},
+    {ASTNodeType.METHOD_INVOCATION, ASTNodeType.MEMBER_REFERENCE},
+    {ASTNodeType.IF_STATEMENT, ASTNodeType.FOR_STATEMENT, ASTNodeType.WHILE_STATEMENT},
+]
+
+NodesQuery = Callable[[ASTStorage, Collection[ASTNodeType]], Iterator[int]]
+
+
+def run_queries(storages: List[ASTStorage], query: NodesQuery) -> int:
+    found_nodes_qty = 0
+    for node_types in _queried_types:
+        for storage in storages:
+            found_nodes_qty += sum(1 for _ in query(storage, node_types))
+    return found_nodes_qty
+
+
+def run_benchmark(scale: int, repeats: int) -> None:
+    source = _source_file.read_text()
+    class_body_start = source.index("{", source.index("public class")) + 1
+    ast = AST.build_from_javalang(parse(create_scaled_source(source, class_body_start, source.rindex("}"), scale)))
+    # whole tree and each method are queried, as metrics and patterns do
+    storages = [ast.storage]
+    storages.extend(method_ast.storage for method_ast in ast.get_subtrees(ASTNodeType.METHOD_DECLARATION))
+    print(f"Nodes: {len(ast.storage)}, methods: {len(storages) - 1}")
+
+    full_scan_query: NodesQuery = ASTStorage.get_nodes_with_types
+    indexed_query: NodesQuery = type(ast.storage).get_nodes_with_types
+    assert run_queries(storages, full_scan_query) == run_queries(storages, indexed_query)
+
+    _, full_scan_time = measure_time(lambda: run_queries(storages, full_scan_query), repeats)
+    _, indexed_time = measure_time(lambda: run_queries(storages, indexed_query), repeats)
+    print(f"{'full scan':<12}{full_scan_time * 1000:>10.2f} ms")
+    print(f"{'index':<12}{indexed_time * 1000:>10.2f} ms")
+    print(f"speedup: {full_scan_time / indexed_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("-s", "--scale", type=int, default=50, help="Number of copies of the class body")
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="Number of runs to time")
+    args = parser.parse_args()
+    run_benchmark(args.scale, args.repeats)
@@ -0,0 +1,89 @@
+"""
+Compares building and traversal of block statement graphs kept in flat arrays
+with the former representation as networkx DiGraph with attributes dicts.
+Methods of BlockStatementGraphExamples.java are replicated to get a large input.
+
+Usage:
+    python -m benchmarks.block_statement_graph [-s SCALE] [-r REPEATS]
+"""
+
+from argparse import ArgumentParser
+from typing import Dict, List, Tuple
+
+from javalang.parse import parse
+from networkx import DiGraph, dfs_labeled_edges
+
+from veniq.ast_framework import AST, ASTNode, ASTNodeType
+from veniq.ast_framework.block_statement_graph import build_block_statement_graph
+from veniq.ast_framework.block_statement_graph._block_extractors import BlockInfo, extract_blocks_from_statement
+from ._common import TEST_DIRECTORY, create_scaled_source, measure_time
+
+_source_file = TEST_DIRECTORY / "ast_framework" / "BlockStatementGraphExamples.java"
+
+
+def build_networkx_graph(method_ast: AST) -> DiGraph:
+    """
+    Builds block statement graph the way it was built before flat arrays, to be compared with.
+    """
+    graph = DiGraph()
+
+    def add_statement(statement: ASTNode) -> int:
+        statement_id = len(graph)
+        graph.add_node(statement_id, node=statement)
+        for block_info in extract_blocks_from_statement(statement):
+            graph.add_edge(statement_id, add_block(block_info))
+        return statement_id
+
+    def add_block(block_info: BlockInfo) -> int:
+        block_id = len(graph)
+        attributes: Dict = {"block_reason": block_info.reason}
+        if block_info.origin_statement is not None:
+            attributes["origin_statement"] = block_info.origin_statement
+        graph.add_node(block_id, **attributes)
+        for statement in block_info.statements:
+            graph.add_edge(block_id, add_statement(statement))
+        return block_id
+
+    add_statement(method_ast.get_root())
+    return graph
+
+
+def traverse_networkx_graph(graph: DiGraph) -> List[Tuple[bool, int]]:
+    # former traversal detected type of each node by its attributes and wrapped it on each event
+    return [
+        ("node" in graph.nodes(data=True)[node_id], node_id)
+        for _, node_id, _ in dfs_labeled_edges(graph, 0)
+    ]
+
+
+def run_benchmark(scale: int, repeats: int) -> None:
+    source = _source_file.read_text()
+    ast = AST.build_from_javalang(parse(create_scaled_source(source, source.index("{") + 1, source.rindex("}"), scale)))
+    methods_asts: List[AST] = list(ast.get_subtrees(ASTNodeType.METHOD_DECLARATION))
+
+    graphs, build_time = measure_time(
+        lambda: [build_block_statement_graph(method_ast) for method_ast in methods_asts], repeats
+    )
+    _, traverse_time = measure_time(
+        lambda: [graph.traverse(lambda _: None, lambda _: None) for graph in graphs], repeats
+    )
+    networkx_graphs, networkx_build_time = measure_time(
+        lambda: [build_networkx_graph(method_ast) for method_ast in methods_asts], repeats
+    )
+    _, networkx_traverse_time = measure_time(
+        lambda: [traverse_networkx_graph(graph) for graph in networkx_graphs], repeats
+    )
+
+    nodes_qty = sum(len(graph) for graph in networkx_graphs)
+    print(f"Methods: {len(methods_asts)}, blocks and statements: {nodes_qty}")
+    print(f"{'graph':<12}{'build, ms':>12}{'traverse, ms':>15}")
+    print(f"{'arrays':<12}{build_time * 1000:>12.2f}{traverse_time * 1000:>15.2f}")
+    print(f"{'networkx':<12}{networkx_build_time * 1000:>12.2f}{networkx_traverse_time * 1000:>15.2f}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("-s", "--scale", type=int, default=100, help="Number of copies of the examples methods")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="Number of runs to time")
+    args = parser.parse_args()
+    run_benchmark(args.scale, args.repeats)
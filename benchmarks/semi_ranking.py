@@ -0,0 +1,139 @@
+"""
+Times stages of SEMI on a long method and reports ranking of extraction opportunities end to end.
+Ranking is compared with the reference one computing LCOM2 by checking similarity of each pair of statements.
+The method from ExampleFromPaper.java is scaled up by repeating its body.
+
+Usage:
+    python -m benchmarks.semi_ranking [-s SCALE] [-r REPEATS]
+"""
+
+from argparse import ArgumentParser
+from itertools import combinations
+from typing import Dict, List, Tuple
+
+from javalang.parse import parse
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.baselines.semi.create_extraction_opportunities import create_extraction_opportunities
+from veniq.baselines.semi.extract_semantic import extract_method_statements_semantic
+from veniq.baselines.semi.filter_extraction_opportunities import filter_extraction_opportunities
+from veniq.baselines.semi.rank_extraction_opportunities import (
+    ExtractionOpportunityGroupSettings,
+    rank_extraction_opportunities,
+)
+from veniq.baselines.semi._common_types import ExtractionOpportunity, Statement, StatementSemantic
+from ._common import TEST_DIRECTORY, create_scaled_source, measure_time
+
+_source_file = TEST_DIRECTORY / "baselines" / "semi" / "ExampleFromPaper.java"
+
+
+def rank_by_pairwise_lcom2(
+    statements_semantic: Dict[Statement, StatementSemantic],
+    extraction_opportunities: List[ExtractionOpportunity],
+) -> List[Tuple[Dict[ExtractionOpportunity, int], int]]:
+    """
+    Reference ranking, which calculates benifit of each opportunity in a group from scratch
+    by LCOM2 counted over all pairs of statements.
+    Returns benifits of opportunities of each group and benifit of the group in order of ranking.
+    """
+    settings = ExtractionOpportunityGroupSettings()
+    all_statements_benifit = _pairwise_lcom2(list(statements_semantic.values()))
+
+    def calculate_benifit(extraction_opportunity: ExtractionOpportunity) -> int:
+        opportunity_benifit = _pairwise_lcom2([statements_semantic[statement] for statement in extraction_opportunity])
+        rest_statements_benifit = _pairwise_lcom2([
+            semantic for statement, semantic in statements_semantic.items() if statement not in extraction_opportunity
+        ])
+        return all_statements_benifit - max(opportunity_benifit, rest_statements_benifit)
+
+    groups: List[Tuple[Dict[ExtractionOpportunity, int], int]] = []
+    while extraction_opportunities:
+        optimal_opportunity = extraction_opportunities[0]
+        benifits = {optimal_opportunity: calculate_benifit(optimal_opportunity)}
+        for extraction_opportunity in extraction_opportunities[1:]:
+            size = len(extraction_opportunity)
+            optimal_size = len(optimal_opportunity)
+            shared_statements_qty = len(set(optimal_opportunity) & set(extraction_opportunity))
+            if (
+                abs(size - optimal_size) / min(size, optimal_size) >= settings.max_size_difference
+                or shared_statements_qty / max(size, optimal_size) <= settings.min_overlap
+            ):
+                continue
+
+            benifit = benifits[extraction_opportunity] = calculate_benifit(extraction_opportunity)
+            optimal_benifit = benifits[optimal_opportunity]
+            max_benifit = max(benifit, optimal_benifit)
+            if max_benifit > 0 and abs(benifit - optimal_benifit) / max_benifit >= \
+                    settings.significant_difference_treshold:
+                is_optimal = benifit > optimal_benifit
+            else:
+                is_optimal = size > optimal_size
+            if is_optimal:
+                optimal_opportunity = extraction_opportunity
+
+        groups.append((benifits, benifits[optimal_opportunity]))
+        extraction_opportunities = [
+            opportunity for opportunity in extraction_opportunities if opportunity not in benifits
+        ]
+    return sorted(groups, key=lambda group: group[1], reverse=True)
+
+
+def _pairwise_lcom2(statements_semantic: List[StatementSemantic]) -> int:
+    similar_pairs_qty = 0
+    not_similar_pairs_qty = 0
+    for semantic1, semantic2 in combinations(statements_semantic, 2):
+        if semantic1.is_similar(semantic2):
+            similar_pairs_qty += 1
+        else:
+            not_similar_pairs_qty += 1
+    return max(not_similar_pairs_qty - similar_pairs_qty, 0)
+
+
+def run_benchmark(scale: int, repeats: int) -> None:
+    source = _source_file.read_text()
+    method_body_start = source.index("{", source.index("grabManifests")) + 1
+    method_body_end = source.index("return manifests;")
+    ast = AST.build_from_javalang(parse(create_scaled_source(source, method_body_start, method_body_end, scale)))
+    method_ast = next(iter(ast.get_subtrees(ASTNodeType.METHOD_DECLARATION)))
+
+    statements_semantic, extraction_time = measure_time(
+        lambda: extract_method_statements_semantic(method_ast), repeats
+    )
+    opportunities, creation_time = measure_time(
+        lambda: create_extraction_opportunities(statements_semantic), repeats
+    )
+    filtered_opportunities, filtering_time = measure_time(
+        lambda: filter_extraction_opportunities(opportunities, statements_semantic, method_ast), repeats
+    )
+    groups, ranking_time = measure_time(
+        lambda: rank_extraction_opportunities(statements_semantic, filtered_opportunities), repeats
+    )
+
+    print(
+        f"Statements: {len(statements_semantic)}, opportunities: {len(opportunities)}, "
+        f"filtered: {len(filtered_opportunities)}, groups: {len(groups)}"
+    )
+    stages_times = [
+        ("semantic", extraction_time),
+        ("creation", creation_time),
+        ("filtering", filtering_time),
+        ("ranking", ranking_time),
+    ]
+    for stage, stage_time in stages_times:
+        print(f"{stage:<12}{stage_time * 1000:>12.2f} ms")
+    print(f"{'total':<12}{sum(stage_time for _, stage_time in stages_times) * 1000:>12.2f} ms")
+
+    reference_groups, reference_ranking_time = measure_time(
+        lambda: rank_by_pairwise_lcom2(statements_semantic, filtered_opportunities), repeats
+    )
+    assert reference_groups == [(dict(group.opportunities), group.benifit) for group in groups]
+    print(f"{'reference':<12}{reference_ranking_time * 1000:>12.2f} ms")
+    print(f"ranking speedup: {reference_ranking_time / ranking_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("-s", "--scale", type=int, default=4, help="Number of copies of the method body")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="Number of runs to time")
+    args = parser.parse_args()
+    run_benchmark(args.scale, args.repeats)
@@ -13,7 +13,8 @@ setup(
     author=veniq.__author__,
     author_email=['katya.garmash@gmail.com', 'vitasprotas@gmail.com'],
     license=veniq.__licence__,
-    packages=find_packages(),
+    # benchmarks are run from a checkout and are not installed
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     entry_points={
         'console_scripts': [
             'veniq = veniq.__main__:main'
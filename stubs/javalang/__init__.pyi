@@ -1 +1,3 @@
 from . import javadoc as javadoc, parse as parse, parser as parser, tokenizer as tokenizer
+
+__version__: str
@@ -1,7 +1,11 @@
+import pickle
 from unittest import TestCase
 from pathlib import Path
 
 from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.computed_fields_catalog.standard_fields import register_standard_computed_properties
+from veniq.ast_framework.computed_fields_registry import computed_fields_registry
+from veniq.ast_framework.storage import CompactStorage, NetworkxStorage
 from veniq.utils.ast_builder import build_ast
 
 
@@ -40,6 +44,51 @@ class ASTNodeTestSuite(TestCase):
 
         self.assertEqual(set(java_class.constructors), set())
 
+    def test_nodes_interned(self):
+        ast = AST.build_from_javalang(
+            build_ast(
+                Path(__file__).absolute().parent / "MethodUseOtherMethodExample.java"
+            )
+        )
+        package = ast.get_root()
+        self.assertIs(ast.get_root(), package)
+        for child in package.children:
+            self.assertIs(child.parent, package)
+        self.assertIs(next(ast.get_proxy_nodes(ASTNodeType.CLASS_DECLARATION)), package.types[0])
+        self.assertEqual(pickle.loads(pickle.dumps(package)).node_index, package.node_index)
+        with self.assertRaises(AttributeError):
+            package.custom_attribute = None
+
+    def test_computed_field_registered_after_nodes_creation(self):
+        ast = AST.build_from_javalang(
+            build_ast(
+                Path(__file__).absolute().parent / "MethodUseOtherMethodExample.java"
+            )
+        )
+        java_class = ast.get_root().types[0]
+        try:
+            computed_fields_registry.register(
+                lambda node: len(list(node.methods)), "methods_qty", ASTNodeType.CLASS_DECLARATION
+            )
+            self.assertEqual(java_class.methods_qty, 6)
+        finally:
+            computed_fields_registry.clear()
+            register_standard_computed_properties()
+
+        with self.assertRaises(AttributeError):
+            java_class.methods_qty
+        self.assertEqual(len(list(java_class.methods)), 6)
+
+    def test_line_of_node_without_position(self):
+        javalang_ast = build_ast(Path(__file__).absolute().parent / "MethodUseOtherMethodExample.java")
+        compact_ast = AST.build_from_javalang(javalang_ast, CompactStorage)
+        networkx_ast = AST.build_from_javalang(javalang_ast, NetworkxStorage)
+        for compact_node, networkx_node in zip(compact_ast, networkx_ast):
+            with self.subTest(node=compact_node):
+                self.assertEqual(compact_node.line, networkx_node.line)
+                if compact_node.node_type == ASTNodeType.STRING:
+                    self.assertEqual(compact_node.line, compact_node.parent.line)
+
     def test_fake_node(self):
         ast = AST.build_from_javalang(
             build_ast(
@@ -64,7 +113,7 @@ class ASTNodeTestSuite(TestCase):
                          "node index: -1\n"
                          "node_type: None")
         self.assertEqual(repr(fake_node), "<ASTNode node_type: None, node_index: -1>")
-        self.assertEqual(dir(fake_node), ["children", "is_fake", "line", "node_index", "parent"])
+        self.assertEqual(dir(fake_node), ["children", "is_fake", "line", "node_index", "parent", "span"])
 
         try:
             hash(fake_node)
@@ -0,0 +1,239 @@
+import pickle
+import sys
+from unittest import TestCase
+from pathlib import Path
+
+from javalang.parse import parse
+
+from veniq.utils.ast_builder import build_ast, parse_with_spans
+from veniq.utils.source_buffer import SourceBuffer
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework._auxiliary_data import attributes_by_node_type
+from veniq.ast_framework.storage import ASTStorage, CompactStorage, NetworkxStorage
+
+
+class ASTStorageTestSuite(TestCase):
+    def test_same_nodes(self):
+        for compact_storage, networkx_storage in self._build_storages():
+            with self.subTest():
+                self.assertEqual(list(compact_storage.get_nodes()), list(networkx_storage.get_nodes()))
+                self.assertEqual(len(compact_storage), len(networkx_storage))
+
+    def test_same_nodes_properties(self):
+        for compact_storage, networkx_storage in self._build_storages():
+            for node_index in compact_storage.get_nodes():
+                with self.subTest(node_index=node_index):
+                    self._assert_same_node(compact_storage, networkx_storage, node_index)
+
+    def test_same_subtrees(self):
+        for compact_storage, networkx_storage in self._build_storages():
+            for node_index in compact_storage.get_nodes():
+                with self.subTest(node_index=node_index):
+                    compact_subtree = compact_storage.get_subtree(node_index)
+                    networkx_subtree = networkx_storage.get_subtree(node_index)
+                    # networkx subgraph does not preserve nodes order
+                    self.assertEqual(list(compact_subtree.get_nodes()), sorted(networkx_subtree.get_nodes()))
+                    self.assertIsNone(compact_subtree.get_parent(node_index))
+                    self.assertIsNone(networkx_subtree.get_parent(node_index))
+
+    def test_same_subtrees_selections(self):
+        for compact_storage, networkx_storage in self._build_storages():
+            class_declaration = next(
+                node_index for node_index in compact_storage.get_nodes()
+                if compact_storage.get_type(node_index) == ASTNodeType.CLASS_DECLARATION
+            )
+            selected_roots = [
+                node_index for node_index in compact_storage.get_children(class_declaration)
+                if compact_storage.get_type(node_index) == ASTNodeType.METHOD_DECLARATION
+            ][::2]
+            compact_selection = compact_storage.select_subtrees(class_declaration, selected_roots)
+            networkx_selection = networkx_storage.select_subtrees(class_declaration, selected_roots)
+            with self.subTest():
+                self.assertEqual(list(compact_selection.get_nodes()), sorted(networkx_selection.get_nodes()))
+                self.assertEqual(len(compact_selection), len(networkx_selection))
+            for node_index in compact_selection.get_nodes():
+                with self.subTest(node_index=node_index):
+                    self._assert_same_node(compact_selection, networkx_selection, node_index)
+                    self.assertEqual(list(compact_selection.get_subtree_nodes(node_index)),
+                                     sorted(networkx_selection.get_subtree_nodes(node_index)))
+
+    def test_subtree_view_shares_tree(self):
+        ast = self._build_ast("LottieImageAsset.java", CompactStorage)
+        for method_ast in ast.get_subtrees(ASTNodeType.METHOD_DECLARATION):
+            with self.subTest(method=method_ast.root):
+                nodes = [node.node_index for node in method_ast]
+                self.assertEqual(nodes, list(range(method_ast.root, method_ast.root + len(nodes))))
+                self.assertEqual(method_ast.get_subtree(method_ast.get_root()).storage, method_ast.storage)
+                self.assertIsNone(method_ast.get_root().parent)
+
+    def test_nodes_with_types(self):
+        node_types_sets = [
+            {ASTNodeType.METHOD_DECLARATION},
+            {ASTNodeType.MEMBER_REFERENCE, ASTNodeType.METHOD_INVOCATION},
+            {ASTNodeType.STRING, ASTNodeType.COLLECTION, ASTNodeType.COMPILATION_UNIT},
+            {ASTNodeType.UNKNOWN},
+        ]
+        for compact_storage, _ in self._build_storages():
+            class_declaration = next(compact_storage.get_nodes_with_types({ASTNodeType.CLASS_DECLARATION}))
+            selected_roots = list(compact_storage.get_children(class_declaration))[1::2]
+            storages = [
+                compact_storage,
+                compact_storage.get_subtree(class_declaration),
+                compact_storage.select_subtrees(class_declaration, selected_roots),
+            ]
+            for storage in storages:
+                for node_types in node_types_sets:
+                    with self.subTest(storage=storage, node_types=node_types):
+                        self.assertEqual(list(storage.get_nodes_with_types(node_types)),
+                                         list(ASTStorage.get_nodes_with_types(storage, node_types)))
+
+    def test_subtree_contains(self):
+        node_types = {ASTNodeType.LAMBDA_EXPRESSION, ASTNodeType.METHOD_INVOCATION}
+        for compact_storage, networkx_storage in self._build_storages():
+            class_declaration = next(compact_storage.get_nodes_with_types({ASTNodeType.CLASS_DECLARATION}))
+            selected_roots = list(compact_storage.get_children(class_declaration))[1::2]
+            selection = compact_storage.select_subtrees(class_declaration, selected_roots)
+            for storage in [compact_storage, networkx_storage, selection]:
+                with self.subTest(storage=storage):
+                    for node_index in storage.get_nodes():
+                        self.assertEqual(storage.subtree_contains(node_index, node_types),
+                                         ASTStorage.subtree_contains(storage, node_index, node_types))
+
+    def test_conversion_to_networkx(self):
+        for compact_storage, networkx_storage in self._build_storages():
+            with self.subTest():
+                compact_graph = compact_storage.to_networkx()
+                networkx_graph = networkx_storage.to_networkx()
+                self.assertEqual(list(compact_graph.edges), list(networkx_graph.edges))
+                self.assertEqual(dict(compact_graph.nodes.items()), dict(networkx_graph.nodes.items()))
+
+    def test_fake_nodes_shared_with_subtrees(self):
+        ast = self._build_ast("SimpleClass.java", CompactStorage)
+        class_declaration = next(ast.get_proxy_nodes(ASTNodeType.CLASS_DECLARATION))
+        subtree = ast.get_subtree(class_declaration)
+        self.assertEqual(ast.create_fake_node().node_index, -1)
+        self.assertEqual(subtree.create_fake_node().node_index, -2)
+
+    def test_deeply_nested_expression(self):
+        operands_qty = 2 * sys.getrecursionlimit()
+        concatenation = " + ".join(f'"part{index}"' for index in range(operands_qty))
+        javalang_ast = parse(f"class Generated {{ String text() {{ return {concatenation}; }} }}")
+        for storage_type in [CompactStorage, NetworkxStorage]:
+            with self.subTest(storage_type=storage_type.__name__):
+                ast = AST.build_from_javalang(javalang_ast, storage_type)
+                binary_operations = list(ast.get_proxy_nodes(ASTNodeType.BINARY_OPERATION))
+                self.assertEqual(len(binary_operations), operands_qty - 1)
+                innermost_operation = binary_operations[-1]
+                self.assertEqual(innermost_operation.operandl.value, '"part0"')
+                self.assertEqual(innermost_operation.parent, binary_operations[-2])
+
+    def test_spans_cover_children(self):
+        for filename in self._java_files:
+            with self.subTest(filename=filename):
+                storage, _ = CompactStorage.build_from_javalang(*self._parse_with_spans(filename)[1:])
+                for node_index in storage.get_nodes():
+                    span = storage.get_span(node_index)
+                    parent_index = storage.get_parent(node_index)
+                    if span is None or parent_index is None:
+                        continue
+                    parent_span = storage.get_span(parent_index)
+                    self.assertLessEqual(parent_span[:2], span[:2])
+                    self.assertGreaterEqual(parent_span[2:], span[2:])
+
+    def test_spans_text(self):
+        source, javalang_ast, javalang_spans = self._parse_with_spans("SimpleClass.java")
+        ast = AST.build_from_javalang(javalang_ast, javalang_spans=javalang_spans)
+        for method_declaration in ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION):
+            method_text = source.get_span_text(method_declaration.span)
+            self.assertTrue(method_text.startswith(("public", "private", "protected", "static", "@")))
+            self.assertTrue(method_text.endswith("}"))
+            self.assertIn(f" {method_declaration.name}(", method_text)
+        statements = ast.get_proxy_nodes(ASTNodeType.RETURN_STATEMENT, ASTNodeType.LOCAL_VARIABLE_DECLARATION)
+        for statement in statements:
+            statement_text = source.get_span_text(statement.span)
+            self.assertTrue(statement_text.endswith(";"))
+            self.assertEqual(statement.span.start_line, statement.line)
+
+    def test_spans_of_all_nodes(self):
+        for filename in self._java_files:
+            with self.subTest(filename=filename):
+                source, javalang_ast, javalang_spans = self._parse_with_spans(filename)
+                ast = AST.build_from_javalang(javalang_ast, javalang_spans=javalang_spans)
+                for node in ast.get_proxy_nodes(*ASTNodeType):
+                    if node.node_type in {ASTNodeType.STRING, ASTNodeType.COLLECTION}:
+                        continue
+                    self.assertIsNotNone(node.span, f"{node.node_type} on line {node.line}")
+                    if node.node_type in {
+                        ASTNodeType.CATCH_CLAUSE_PARAMETER,
+                        ASTNodeType.FORMAL_PARAMETER,
+                        ASTNodeType.INFERRED_FORMAL_PARAMETER,
+                        ASTNodeType.PACKAGE_DECLARATION,
+                        ASTNodeType.VARIABLE_DECLARATOR,
+                    }:
+                        self.assertIn(node.name, source.get_span_text(node.span))
+
+    def test_spans_kept_only_if_given(self):
+        _, javalang_ast, javalang_spans = self._parse_with_spans("SimpleClass.java")
+        compact_storage, root = CompactStorage.build_from_javalang(javalang_ast, javalang_spans)
+        self.assertIsNotNone(compact_storage.get_span(root))
+        self.assertEqual(CompactStorage.from_bytes(compact_storage.to_bytes()).get_span(root),
+                         compact_storage.get_span(root))
+        for storage, root in [
+            CompactStorage.build_from_javalang(javalang_ast),
+            NetworkxStorage.build_from_javalang(javalang_ast, javalang_spans),
+        ]:
+            self.assertIsNone(storage.get_span(root))
+
+    def test_strings_interned(self):
+        for storage_type in [CompactStorage, NetworkxStorage]:
+            with self.subTest(storage_type=storage_type.__name__):
+                first_ast, second_ast = [self._build_ast("SimpleClass.java", storage_type) for _ in range(2)]
+                for first_node, second_node in zip(first_ast, second_ast):
+                    for attribute_name in ["name", "member", "qualifier", "string"]:
+                        first_value = getattr(first_node, attribute_name, None)
+                        if isinstance(first_value, str):
+                            self.assertIs(first_value, getattr(second_node, attribute_name))
+
+    def test_unpickled_strings_interned(self):
+        ast = self._build_ast("SimpleClass.java", CompactStorage)
+        for node, unpickled_node in zip(ast, pickle.loads(pickle.dumps(ast))):
+            for attribute_name in ["name", "member", "qualifier", "string"]:
+                value = getattr(node, attribute_name, None)
+                if isinstance(value, str):
+                    self.assertIs(getattr(unpickled_node, attribute_name), value)
+
+    def _assert_same_node(self, compact_storage: ASTStorage, networkx_storage: ASTStorage, node_index: int):
+        node_type = compact_storage.get_type(node_index)
+        self.assertEqual(node_type, networkx_storage.get_type(node_index))
+        self.assertEqual(compact_storage.get_line(node_index), networkx_storage.get_line(node_index))
+        self.assertEqual(compact_storage.get_subtree_first_line(node_index),
+                         networkx_storage.get_subtree_first_line(node_index))
+        self.assertEqual(compact_storage.get_parent(node_index), networkx_storage.get_parent(node_index))
+        self.assertEqual(list(compact_storage.get_children(node_index)),
+                         list(networkx_storage.get_children(node_index)))
+        for attribute_name in attributes_by_node_type[node_type]:
+            self.assertEqual(compact_storage.get_attribute(node_index, attribute_name),
+                             networkx_storage.get_attribute(node_index, attribute_name))
+
+    def _build_storages(self):
+        for filename in self._java_files:
+            javalang_ast = build_ast(str(Path(__file__).parent.absolute() / filename))
+            compact_storage, _ = CompactStorage.build_from_javalang(javalang_ast)
+            networkx_storage, _ = NetworkxStorage.build_from_javalang(javalang_ast)
+            yield compact_storage, networkx_storage
+
+    def _parse_with_spans(self, filename: str):
+        source = SourceBuffer.from_file(Path(__file__).parent.absolute() / filename)
+        return (source, *parse_with_spans(source.text))
+
+    def _build_ast(self, filename: str, storage_type):
+        javalang_ast = build_ast(str(Path(__file__).parent.absolute() / filename))
+        return AST.build_from_javalang(javalang_ast, storage_type)
+
+    _java_files = [
+        "SimpleClass.java",
+        "StaticConstructor.java",
+        "LottieImageAsset.java",
+        "BlockStatementGraphExamples.java",
+        "ScopeTest.java",
+    ]
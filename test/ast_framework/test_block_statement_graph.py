@@ -3,6 +3,7 @@ from pathlib import Path
 from unittest import TestCase
 
 from veniq.ast_framework.block_statement_graph import build_block_statement_graph, Block, Statement
+from veniq.ast_framework.block_statement_graph.constants import BlockReason
 from veniq.ast_framework import AST, ASTNodeType
 from veniq.utils.ast_builder import build_ast
 
@@ -33,6 +34,40 @@ class BlockStatementTestCase(TestCase):
                     BlockStatementTestCase._expected_flattened_graphs[method_declaration.name],
                 )
 
+    def test_navigation_matches_traversal(self):
+        for method_name, block_statement_graph in self._build_examples_graphs():
+            with self.subTest(method_name=method_name):
+                nodes: List[Union[Block, Statement]] = []
+                block_statement_graph.traverse(nodes.append)
+                for node in nodes:
+                    if isinstance(node, Statement):
+                        # traversal of a subtree ends at its root
+                        self.assertEqual(
+                            self.flatten_block_statement_graph(node),
+                            [str(node.node.node_type)] + [
+                                flattened_node
+                                for block in node.nested_blocks
+                                for flattened_node in self.flatten_block_statement_graph(block)
+                            ],
+                        )
+                        self.assertEqual(node.has_nested_blocks, any(True for _ in node.nested_blocks))
+                    else:
+                        for statement in node.statements:
+                            self.assertIs(statement.parent_block, node)
+
+    def test_else_if_branches_origin_statements(self):
+        block_statement_graph = dict(self._build_examples_graphs())["severalElseIfBranches"]
+        blocks: List[Block] = []
+        block_statement_graph.traverse(lambda node: blocks.append(node) if isinstance(node, Block) else None)
+        then_branches_origins = [block.origin_statement for block in blocks if block.reason == BlockReason.THEN_BRANCH]
+        self.assertEqual(len(then_branches_origins), len(set(then_branches_origins)))
+        self.assertTrue(all(origin.node_type == ASTNodeType.IF_STATEMENT for origin in then_branches_origins))
+
+    def _build_examples_graphs(self):
+        ast = AST.build_from_javalang(build_ast(self.current_directory / "BlockStatementGraphExamples.java"))
+        for method_ast in ast.get_subtrees(ASTNodeType.METHOD_DECLARATION):
+            yield method_ast.get_root().name, build_block_statement_graph(method_ast)
+
     @staticmethod
     def flatten_block_statement_graph(root: Union[Block, Statement]) -> List[str]:
         flattened_graph: List[str] = []
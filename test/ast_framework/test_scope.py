@@ -1,9 +1,11 @@
 from unittest import TestCase
 from pathlib import Path
 from typing import List, Iterator
+from unittest.mock import patch
 
 from veniq.ast_framework import AST, ASTNodeType
 from veniq.ast_framework.scope import Scope
+from veniq.ast_framework.scope_extractors import extract_scopes
 from veniq.utils.ast_builder import build_ast
 
 StatementsTypes = List[ASTNodeType]
@@ -56,6 +58,40 @@ class ScopeTestCase(TestCase):
         self.assertEqual(lambda_scope.parent_node.node_type, ASTNodeType.LAMBDA_EXPRESSION)
         self.assertEqual([parameter.name for parameter in lambda_scope.parameters], ["x", "y"])
 
+    def test_nested_scopes_built_lazily(self) -> None:
+        with patch("veniq.ast_framework.scope.extract_scopes", wraps=extract_scopes) as extract_scopes_mock:
+            scope = Scope.build_from_method_ast(self._get_method_ast("deep_nesting"))
+            self.assertEqual(extract_scopes_mock.call_count, 1)
+            nested_scopes = list(scope.nested_scopes)
+            self.assertEqual(extract_scopes_mock.call_count, 1 + len(scope.statements))
+            self.assertEqual(list(scope.nested_scopes), nested_scopes)
+            self.assertEqual(extract_scopes_mock.call_count, 1 + len(scope.statements))
+
+    def test_statement_scope(self) -> None:
+        for method_name in self._scope_statements_in_preorder_by_method:
+            with self.subTest(method_name=method_name):
+                root_scope = Scope.build_from_method_ast(self._get_method_ast(method_name))
+                scopes_stack = [root_scope]
+                while scopes_stack:
+                    scope = scopes_stack.pop()
+                    for statement in scope.statements:
+                        self.assertEqual(root_scope.get_statement_scope(statement), scope)
+                    for nested_scope in scope.nested_scopes:
+                        self.assertEqual(nested_scope.parent_scope, scope)
+                        scopes_stack.append(nested_scope)
+                self.assertIsNone(root_scope.get_statement_scope(root_scope.parent_node))
+
+    def test_statement_scope_of_method_nodes(self) -> None:
+        method_ast = self._get_method_ast("multiline_lambda")
+        root_scope = Scope.build_from_method_ast(method_ast)
+        lambda_scope = next(root_scope.nested_scopes)
+        statement_expression, return_statement = [
+            next(method_ast.get_proxy_nodes(node_type))
+            for node_type in [ASTNodeType.STATEMENT_EXPRESSION, ASTNodeType.RETURN_STATEMENT]
+        ]
+        self.assertEqual(root_scope.get_statement_scope(statement_expression), root_scope)
+        self.assertEqual(root_scope.get_statement_scope(return_statement), lambda_scope)
+
     def _test_method(self, method_name: str) -> None:
         scope = Scope.build_from_method_ast(self._get_method_ast(method_name))
         self.assertScope(scope, self._scope_statements_in_preorder_by_method[method_name])
@@ -0,0 +1,139 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.block_statement_graph import build_block_statement_graph
+from veniq.baselines.semi.analyze_method import SemiBudget, SemiRecord, _count_statements, analyze_method
+from veniq.baselines.semi.analyze_project import _get_file_ast, analyze_project, find_java_files, main
+from veniq.utils.ast_builder import build_ast
+from veniq.utils.ast_snapshot import ASTSnapshot
+from .utils import get_method_ast
+
+
+class AnalyzeProjectTestCase(TestCase):
+    def test_large_methods_analyzed_separately(self):
+        expected_records = sorted(self._analyze_sequentially())
+        for large_method_size in [0, 100, 10 ** 6]:
+            with self.subTest(large_method_size=large_method_size):
+                records = analyze_project(
+                    find_java_files(self._samples_directory), jobs=2, queue_size=1,
+                    large_method_size=large_method_size,
+                )
+                self.assertEqual(sorted(records), expected_records)
+
+    def test_record_describes_optimal_opportunity(self):
+        records = [
+            record
+            for record in self._analyze_sequentially()
+            if record.method_name == "grabManifests"
+        ]
+        self.assertNotEqual(records, [])
+        for record in records:
+            self.assertEqual(record.class_name, "ExampleFromPaper")
+            self.assertIn({"first_line": record.first_line, "last_line": record.last_line}, record.opportunities)
+            self.assertTrue(record.method_line <= record.first_line <= record.last_line)
+            self.assertIsNone(record.exceeded_budgets)
+
+    def test_statements_budget(self):
+        unlimited_records = self._analyze_sequentially()
+        records = self._analyze_sequentially(SemiBudget(max_statements=5))
+        self.assertIn(["statements"], [record.exceeded_budgets for record in records])
+        for record in records:
+            if record.exceeded_budgets is None:
+                self.assertIn(record, unlimited_records)
+            else:
+                self.assertIsNone(record.benefit)
+
+    def test_statements_budget_checked_before_semantic_extraction(self):
+        with patch(
+            "veniq.baselines.semi.method_analysis_context.extract_method_statements_semantic"
+        ) as extract_semantic:
+            records = self._analyze_sequentially(SemiBudget(max_statements=0))
+        extract_semantic.assert_not_called()
+        self.assertNotEqual(records, [])
+        for record in records:
+            self.assertEqual(record.exceeded_budgets, ["statements"])
+
+    def test_statements_counted(self):
+        method_ast = get_method_ast("SemanticExtractionTest.java", "SimpleMethods", "ifBranching")
+        # "if" statement with "else if" and three statements of branches
+        self.assertEqual(_count_statements(build_block_statement_graph(method_ast)), 4)
+
+    def test_opportunities_budget(self):
+        unlimited_records = self._analyze_sequentially()
+        records = self._analyze_sequentially(SemiBudget(max_opportunities=2))
+        self.assertLess(len(records), len(unlimited_records))
+        self.assertIn(["opportunities"], [record.exceeded_budgets for record in records])
+        for record in records:
+            if record.exceeded_budgets is None:
+                self.assertIn(record, unlimited_records)
+            elif record.opportunities is not None:
+                self.assertLessEqual(len(record.opportunities), 2)
+
+    def test_time_budget(self):
+        records = self._analyze_sequentially(SemiBudget(max_time=0))
+        self.assertNotEqual(records, [])
+        for record in records:
+            self.assertEqual(record.exceeded_budgets, ["time"])
+            self.assertIsNone(record.benefit)
+
+    def test_time_budget_passed_after_semantic_extraction(self):
+        unlimited_records = self._analyze_sequentially()
+        with patch("veniq.baselines.semi.extract_semantic.perf_counter", return_value=0):
+            records = self._analyze_sequentially(SemiBudget(max_time=0))
+        # a group is formed for each method, which has any
+        self.assertEqual(
+            {(record.class_name, record.method_name) for record in records if record.benefit is not None},
+            {(record.class_name, record.method_name) for record in unlimited_records},
+        )
+        for record in records:
+            self.assertEqual(record.exceeded_budgets, ["time"])
+
+    def test_parsing_error(self):
+        with TemporaryDirectory() as directory:
+            Path(directory, "Broken.java").write_text("class Broken { void method( }")
+            record, = analyze_project(find_java_files(Path(directory)), jobs=1)
+        self.assertEqual(Path(record.file).name, "Broken.java")
+        self.assertTrue(record.error.startswith("Parsing failed"))
+
+    def test_cli(self):
+        with TemporaryDirectory() as directory:
+            output_path = Path(directory, "result.jsonl")
+            main(["-d", str(self._samples_directory), "-j", "2", "-o", str(output_path)])
+            with open(output_path) as output:
+                records = [SemiRecord(**json.loads(line)) for line in output]
+        self.assertEqual(sorted(records), sorted(self._analyze_sequentially()))
+
+    def test_snapshot(self):
+        with TemporaryDirectory() as directory:
+            snapshot_path = str(Path(directory, "samples.snapshot"))
+            ASTSnapshot.write(snapshot_path, self._samples_directory)
+            records = analyze_project(find_java_files(self._samples_directory), jobs=2, snapshot_path=snapshot_path)
+            self.assertEqual(sorted(records), sorted(self._analyze_sequentially()))
+
+    def test_file_missing_in_snapshot_parsed(self):
+        missing_file, *snapshot_files = find_java_files(self._samples_directory)
+        with TemporaryDirectory() as directory:
+            snapshot_path = str(Path(directory, "samples.snapshot"))
+            ASTSnapshot.write(snapshot_path, self._samples_directory, snapshot_files)
+            with self.assertWarnsRegex(UserWarning, "not found in the snapshot"):
+                ast = _get_file_ast(str(missing_file), snapshot_path)
+        self.assertEqual(str(ast), str(AST.build_from_javalang(build_ast(str(missing_file)))))
+
+    def _analyze_sequentially(self, budget=SemiBudget()):
+        records = []
+        for file_path in find_java_files(self._samples_directory):
+            ast = AST.build_from_javalang(build_ast(str(file_path)))
+            for class_declaration in ast.get_root().types:
+                if class_declaration.node_type == ASTNodeType.CLASS_DECLARATION:
+                    for method_declaration in class_declaration.methods:
+                        records.extend(analyze_method(
+                            ast.get_subtree(method_declaration), str(file_path),
+                            class_declaration.name, method_declaration.name, budget,
+                        ))
+        return records
+
+    _samples_directory = Path(__file__).absolute().parent
@@ -167,6 +167,11 @@ class ExtractStatementSemanticTestCase(TestCase):
             ],
         )
 
+    def test_passed_deadline(self):
+        method_ast = get_method_ast("SemanticExtractionTest.java", "SimpleMethods", "deepNesting")
+        with self.assertRaises(TimeoutError):
+            extract_method_statements_semantic(method_ast, deadline=0)
+
     def _test_helper(self, method_name: str, expected_statements_semantics: List[StatementSemantic]):
         method_ast = get_method_ast("SemanticExtractionTest.java", "SimpleMethods", method_name)
         method_semantic = extract_method_statements_semantic(method_ast)
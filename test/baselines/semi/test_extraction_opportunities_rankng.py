@@ -1,12 +1,14 @@
-from typing import Dict, Union, Set
+from random import Random
+from typing import Dict, List, Union, Set
 from unittest import TestCase
 
 from networkx import DiGraph
 
-from veniq.baselines.semi._common_types import Statement, StatementSemantic
+from veniq.baselines.semi._common_types import Statement, StatementSemantic, ExtractionOpportunity
 from veniq.baselines.semi.rank_extraction_opportunities import (
     ExtractionOpportunityGroupSettings,
     ExtractionOpportunityGroup,
+    rank_extraction_opportunities,
 )
 from veniq.ast_framework import ASTNode
 
@@ -43,6 +45,55 @@ class ExtractionOpportunitiesRanking(TestCase):
         extraction_opportunity_group.add_extraction_opportunity(extraction_opportunity2)
         self.assertEqual(extraction_opportunity_group.benifit, 1)
 
+    def test_grouping_same_as_reference(self):
+        random = Random(42)
+        for is_continuous in [True, False]:
+            for _ in range(20):
+                statements_semantic = self._create_statements_semantic(
+                    *(random.choice("xyzw") for _ in range(40))
+                )
+                statements = list(statements_semantic.keys())
+                extraction_opportunities: List[ExtractionOpportunity] = []
+                for _ in range(60):
+                    first_index = random.randrange(len(statements))
+                    last_index = random.randrange(first_index, min(first_index + 15, len(statements)))
+                    extraction_opportunity = tuple(statements[first_index:last_index + 1])
+                    if not is_continuous:
+                        extraction_opportunity = extraction_opportunity[::random.randint(1, 2)]
+                    extraction_opportunities.append(extraction_opportunity)
+
+                with self.subTest(is_continuous=is_continuous):
+                    self.assertEqual(
+                        self._get_groups(rank_extraction_opportunities(statements_semantic, extraction_opportunities)),
+                        self._get_groups(self._rank_reference(statements_semantic, extraction_opportunities)),
+                    )
+
+    def test_passed_deadline(self):
+        statements_semantic = self._create_statements_semantic("x", "y", "x", "y")
+        statements = list(statements_semantic.keys())
+        extraction_opportunities = [tuple(statements[:2]), tuple(statements[2:])]
+        groups = rank_extraction_opportunities(statements_semantic, extraction_opportunities, deadline=0)
+        self.assertEqual(len(groups), 1)
+
+    @staticmethod
+    def _rank_reference(statements_semantic, extraction_opportunities):
+        groups = []
+        while extraction_opportunities:
+            group = ExtractionOpportunityGroup(extraction_opportunities[0], statements_semantic)
+            for extraction_opportunity in extraction_opportunities[1:]:
+                if group.is_allowed_to_add_opportunity(extraction_opportunity):
+                    group.add_extraction_opportunity(extraction_opportunity)
+            groups.append(group)
+            used_opportunities = {opportunity for opportunity, _ in group.opportunities}
+            extraction_opportunities = [
+                opportunity for opportunity in extraction_opportunities if opportunity not in used_opportunities
+            ]
+        return sorted(groups, key=lambda group: group.benifit, reverse=True)
+
+    @staticmethod
+    def _get_groups(groups: List[ExtractionOpportunityGroup]):
+        return [(group.optimal_opportunity, group.benifit, list(group.opportunities)) for group in groups]
+
     @staticmethod
     def _create_statements_semantic(
         *used_object_name: Union[str, Set[str]]
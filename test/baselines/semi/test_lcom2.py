@@ -1,10 +1,12 @@
+from itertools import combinations
+from random import Random
 from typing import Dict, Union, Set
 from unittest import TestCase
 
 from networkx import DiGraph
 
 from veniq.baselines.semi._common_types import Statement, StatementSemantic
-from veniq.baselines.semi._lcom2 import LCOM2
+from veniq.baselines.semi._lcom2 import LCOM2, StatementsSimilarity
 
 from veniq.ast_framework import ASTNode
 
@@ -22,6 +24,50 @@ class LCOM2TestCase(TestCase):
         statements_semantic = self._create_statements_semantic("x", {"x", "y"}, {"x", "z"}, {"x", "a"})
         self.assertEqual(LCOM2(statements_semantic), 0)
 
+    def test_statements_subsets(self):
+        random = Random(42)
+        statements_semantic = self._create_statements_semantic(
+            *({random.choice(["a", "b", "a.b", "a.c", "d"]) for _ in range(2)} for _ in range(30))
+        )
+        statements_similarity = StatementsSimilarity(statements_semantic)
+        statements = list(statements_semantic)
+        for _ in range(20):
+            subset = random.sample(statements, random.randint(0, len(statements)))
+            with self.subTest(subset=subset):
+                self.assertEqual(
+                    statements_similarity.lcom2(statements_similarity.get_mask(subset)),
+                    self._calculate_lcom2_by_pairs([statements_semantic[statement] for statement in subset]),
+                )
+
+    def test_split_statements(self):
+        random = Random(7)
+        statements_semantic = self._create_statements_semantic(
+            *({random.choice(["a", "b", "a.b", "a.c", "d"]) for _ in range(2)} for _ in range(30))
+        )
+        statements_similarity = StatementsSimilarity(statements_semantic)
+        statements = list(statements_semantic)
+        for _ in range(20):
+            first_index = random.randrange(len(statements))
+            subset = statements[first_index:random.randint(first_index + 1, len(statements))]
+            rest = [statement for statement in statements if statement not in subset]
+            with self.subTest(subset=subset):
+                expected_lcom2 = (
+                    self._calculate_lcom2_by_pairs([statements_semantic[statement] for statement in subset]),
+                    self._calculate_lcom2_by_pairs([statements_semantic[statement] for statement in rest]),
+                )
+                self.assertEqual(statements_similarity.split_lcom2(subset), expected_lcom2)
+                lower_bounds = statements_similarity.split_lcom2_lower_bounds(subset)
+                self.assertLessEqual(lower_bounds[0], expected_lcom2[0])
+                self.assertLessEqual(lower_bounds[1], expected_lcom2[1])
+
+    @staticmethod
+    def _calculate_lcom2_by_pairs(statements_semantic):
+        similar_pairs_qty = sum(
+            semantic1.is_similar(semantic2) for semantic1, semantic2 in combinations(statements_semantic, 2)
+        )
+        pairs_qty = len(statements_semantic) * (len(statements_semantic) - 1) // 2
+        return max(pairs_qty - 2 * similar_pairs_qty, 0)
+
     @staticmethod
     def _create_statements_semantic(
         *used_object_name: Union[str, Set[str]]
@@ -0,0 +1,78 @@
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.baselines.semi import method_analysis_context
+from veniq.baselines.semi.create_extraction_opportunities import create_extraction_opportunities
+from veniq.baselines.semi.extract_semantic import extract_method_statements_semantic
+from veniq.baselines.semi.filter_extraction_opportunities import filter_extraction_opportunities
+from veniq.baselines.semi.method_analysis_context import MethodAnalysisContext
+from veniq.baselines.semi.rank_extraction_opportunities import (
+    rank_extraction_opportunities, rank_method_extraction_opportunities
+)
+from veniq.utils.ast_builder import build_ast
+
+
+class MethodAnalysisContextTestCase(TestCase):
+    def test_block_statement_graph_built_once(self):
+        method_ast = self._get_method_ast()
+        with patch.object(
+            method_analysis_context,
+            "build_block_statement_graph",
+            wraps=method_analysis_context.build_block_statement_graph,
+        ) as build_block_statement_graph:
+            self._rank(MethodAnalysisContext(method_ast))
+        build_block_statement_graph.assert_called_once_with(method_ast)
+
+    def test_given_semantic_is_used(self):
+        statements_semantic = extract_method_statements_semantic(self._get_method_ast())
+        context = MethodAnalysisContext(None, statements_semantic)
+        self.assertIs(context.statements_semantic, statements_semantic)
+        self.assertEqual(len(context.real_statements_positions), len(
+            [statement for statement in statements_semantic if not statement.is_fake]
+        ))
+        with self.assertRaises(ValueError):
+            context.block_statement_graph
+
+    def test_same_groups_as_without_context(self):
+        method_ast = self._get_method_ast()
+        statements_semantic = extract_method_statements_semantic(method_ast)
+        extraction_opportunities = filter_extraction_opportunities(
+            create_extraction_opportunities(statements_semantic), statements_semantic, method_ast
+        )
+        expected_groups = [
+            list(group.opportunities)
+            for group in rank_extraction_opportunities(statements_semantic, extraction_opportunities)
+        ]
+        actual_groups = [list(group.opportunities) for group in self._rank(MethodAnalysisContext(method_ast))]
+        self.assertEqual(self._describe(actual_groups), self._describe(expected_groups))
+
+    def test_context_and_deadline_keyword_only(self):
+        method_ast = self._get_method_ast()
+        statements_semantic = extract_method_statements_semantic(method_ast)
+        context = MethodAnalysisContext(method_ast, statements_semantic)
+        with self.assertRaises(TypeError):
+            filter_extraction_opportunities([], statements_semantic, method_ast, context)  # type: ignore
+        with self.assertRaises(TypeError):
+            rank_extraction_opportunities(statements_semantic, [], None)  # type: ignore
+
+    @staticmethod
+    def _rank(context):
+        return rank_method_extraction_opportunities(context)
+
+    @staticmethod
+    def _describe(groups):
+        # statements of different ASTs are compared by lines and types
+        return [
+            [
+                ([(statement.line, statement.node_type) for statement in opportunity], benefit)
+                for opportunity, benefit in group
+            ]
+            for group in groups
+        ]
+
+    @staticmethod
+    def _get_method_ast() -> AST:
+        ast = AST.build_from_javalang(build_ast(str(Path(__file__).absolute().parent / "ExampleFromPaper.java")))
+        return next(iter(ast.get_subtrees(ASTNodeType.METHOD_DECLARATION)))
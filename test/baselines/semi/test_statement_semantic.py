@@ -0,0 +1,38 @@
+import pickle
+from unittest import TestCase
+
+from veniq.baselines.semi._common_types import StatementSemantic, get_symbols_ids
+
+
+class StatementSemanticTestCase(TestCase):
+    def test_equal_semantics_interned(self):
+        self.assertIs(StatementSemantic({"a", "b"}, {"run"}), StatementSemantic(["b", "a"], ["run"]))
+        self.assertIs(pickle.loads(pickle.dumps(StatementSemantic({"a"}))), StatementSemantic({"a"}))
+
+    def test_semantic_is_immutable(self):
+        semantic = StatementSemantic({"a"})
+        with self.assertRaises(AttributeError):
+            semantic.used_objects.add("b")  # type: ignore
+        with self.assertRaises(AttributeError):
+            semantic.used_methods = frozenset()  # type: ignore
+
+    def test_derived_objects(self):
+        semantic = StatementSemantic({"a.b.c", "d"})
+        self.assertEqual(semantic.used_objects_unwrapped, {"a", "a.b", "a.b.c", "d"})
+        self.assertEqual(semantic.used_based_objects, {"a", "d"})
+
+    def test_similarity(self):
+        self.assertTrue(StatementSemantic({"a.b"}).is_similar(StatementSemantic({"a.c"})))
+        self.assertTrue(StatementSemantic(used_methods={"run"}).is_similar(StatementSemantic({"o"}, {"run"})))
+        self.assertFalse(StatementSemantic({"run"}).is_similar(StatementSemantic(used_methods={"run"})))
+        self.assertFalse(StatementSemantic().is_similar(StatementSemantic()))
+
+    def test_symbols_ids(self):
+        semantics = [StatementSemantic({"a.b"}), StatementSemantic({"a"}, {"a"}), StatementSemantic({"a.b"})]
+        symbols_ids = get_symbols_ids(semantics)
+        self.assertEqual(len(symbols_ids[0]), 2)
+        self.assertEqual(len(symbols_ids[1]), 2)
+        self.assertEqual(len(symbols_ids[0] & symbols_ids[1]), 1)
+        self.assertIs(symbols_ids[2], symbols_ids[0])
+        # ids are assigned per call, so they are not taken by symbols of other methods
+        self.assertEqual(get_symbols_ids([StatementSemantic(used_methods={"run"})]), [frozenset({0})])
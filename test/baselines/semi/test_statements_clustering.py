@@ -1,11 +1,14 @@
-from typing import Dict, List
+from pathlib import Path
+from random import Random
+from typing import Dict, List, Optional
 from unittest import TestCase
 
 from networkx import DiGraph
 
-from veniq.baselines.semi.extract_semantic import StatementSemantic
+from veniq.baselines.semi.extract_semantic import StatementSemantic, extract_method_statements_semantic
 from veniq.baselines.semi.create_extraction_opportunities import create_extraction_opportunities
-from veniq.ast_framework import ASTNode
+from veniq.ast_framework import AST, ASTNode, ASTNodeType
+from veniq.utils.ast_builder import build_ast
 
 
 class ExtractionOpportunitiesCreationTestCase(TestCase):
@@ -42,6 +45,42 @@ class ExtractionOpportunitiesCreationTestCase(TestCase):
         expected_statement_indexes = [[0], [1], [2]]
         self.assertEqual(expected_statement_indexes, actual_statements_indexes)
 
+    def test_same_as_reference_on_samples(self):
+        for java_file in sorted(Path(__file__).absolute().parent.glob("*.java")):
+            ast = AST.build_from_javalang(build_ast(str(java_file)))
+            for method_ast in ast.get_subtrees(ASTNodeType.METHOD_DECLARATION):
+                statements_semantic = extract_method_statements_semantic(method_ast)
+                with self.subTest(file=java_file.name, method=method_ast.get_root().name):
+                    self.assertEqual(
+                        create_extraction_opportunities(statements_semantic),
+                        _create_extraction_opportunities_reference(statements_semantic),
+                    )
+
+    def test_same_as_reference_on_random_semantic(self):
+        random = Random(42)
+        for _ in range(50):
+            statements_semantic = self._create_statements_semantic_stub(
+                *(
+                    StatementSemantic(used_objects=random.sample("abcdef", random.randint(0, 2)))
+                    for _ in range(random.randint(1, 30))
+                )
+            )
+            with self.subTest(statements_semantic=list(statements_semantic.values())):
+                self.assertEqual(
+                    create_extraction_opportunities(statements_semantic),
+                    _create_extraction_opportunities_reference(statements_semantic),
+                )
+
+    def test_first_opportunities(self):
+        statements_semantic = self._create_statements_semantic_stub(
+            StatementSemantic(used_objects={"x"}),
+            StatementSemantic(used_objects={"y"}),
+            StatementSemantic(used_objects={"x"}),
+        )
+        extraction_opportunities = create_extraction_opportunities(statements_semantic, max_opportunities_qty=2)
+        self.assertEqual([[node.node_index for node in opportunity] for opportunity in extraction_opportunities],
+                         [[0], [1]])
+
     @staticmethod
     def _get_opportunity_nodes_indexes(
         statements_semantic: Dict[ASTNode, StatementSemantic]
@@ -53,3 +92,44 @@ class ExtractionOpportunitiesCreationTestCase(TestCase):
     def _create_statements_semantic_stub(*semantics: StatementSemantic) -> Dict[ASTNode, StatementSemantic]:
         stub_graph = DiGraph()
         return {ASTNode(stub_graph, index): semantic for index, semantic in enumerate(semantics)}
+
+
+def _create_extraction_opportunities_reference(statements_semantic: Dict[ASTNode, StatementSemantic]):
+    """
+    Straightforward implementation of opportunities creation, as it is described in the paper.
+    """
+    statements = list(statements_semantic.keys())
+    extraction_opportunities: List[List[ASTNode]] = []
+    for step in range(1, len(statements) + 1):
+        statement_index = 0
+        while statement_index < len(statements):
+            fails_qty = 0
+            first_statement_index = statement_index
+            last_statement_index: Optional[int] = None
+            statement_index += 1
+            while statement_index < len(statements) and last_statement_index is None:
+                previous_statement = statements[statement_index - fails_qty - 1]
+                current_statement = statements[statement_index]
+                if statements_semantic[current_statement].is_similar(statements_semantic[previous_statement]):
+                    fails_qty = 0
+                    statement_index += 1
+                else:
+                    fails_qty += 1
+                    if fails_qty == step:
+                        statement_index -= step - 1
+                        last_statement_index = statement_index - 1
+                    else:
+                        statement_index += 1
+
+            if last_statement_index is None:
+                last_statement_index = len(statements) - fails_qty - 1
+
+            extraction_opportunity = [
+                statements[index]
+                for index in range(first_statement_index, last_statement_index + 1)
+                if not statements[index].is_fake
+            ]
+            if extraction_opportunity and extraction_opportunity not in extraction_opportunities:
+                extraction_opportunities.append(extraction_opportunity)
+
+    return [tuple(extraction_opportunity) for extraction_opportunity in extraction_opportunities]
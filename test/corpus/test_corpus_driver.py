@@ -0,0 +1,90 @@
+import csv
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from veniq.__main__ import main
+from veniq.baselines.semi.analyze_project import analyze_project
+from veniq.corpus import CorpusRecord, CsvWriter, JsonlWriter, analyze_corpus, analyze_file, find_java_files
+
+
+class CorpusDriverTestSuite(TestCase):
+    def test_analyze_file(self):
+        records = analyze_file(str(self._samples_directory / "SimpleClass.java"), ["ncss", "semi"])
+        self.assertEqual([(record.analyzer, record.error) for record in records],
+                         [("ncss", None), ("semi", None)])
+        self.assertEqual({record.class_name for record in records}, {"Simple"})
+
+    def test_semi_same_as_project_driver(self):
+        file_path = str(Path(__file__).absolute().parent.parent / "baselines" / "semi" / "ExampleFromPaper.java")
+        groups = [
+            (record.method_name, group["first_line"], group["last_line"], group["benefit"])
+            for record in analyze_file(file_path, ["semi"])
+            for group in record.value
+        ]
+        expected_groups = [
+            (record.method_name, record.first_line, record.last_line, record.benefit)
+            for record in analyze_project([Path(file_path)], jobs=1)
+        ]
+        self.assertNotEqual(groups, [])
+        self.assertEqual(groups, expected_groups)
+
+    def test_parsing_error(self):
+        with TemporaryDirectory() as directory:
+            file_path = Path(directory, "Broken.java")
+            file_path.write_text("class Broken { void method( }")
+            record, = analyze_file(str(file_path), ["ncss"])
+        self.assertIsNone(record.analyzer)
+        self.assertTrue(record.error.startswith("Parsing failed"))
+
+    def test_parallel_analysis_same_as_sequential(self):
+        files = sorted(find_java_files(self._samples_directory))
+        expected_records = [record for file in files for record in analyze_file(str(file), ["ncss", "decomposition"])]
+        actual_records = analyze_corpus(files, ["ncss", "decomposition"], jobs=2, queue_size=1)
+        self.assertEqual(sorted(actual_records), sorted(expected_records))
+
+    def test_cached_analysis_same_as_not_cached(self):
+        files = sorted(find_java_files(self._samples_directory))
+        expected_records = sorted(analyze_corpus(files, ["ncss"], jobs=2))
+        with TemporaryDirectory() as cache_directory:
+            for _ in range(2):
+                actual_records = analyze_corpus(files, ["ncss"], jobs=2, cache_directory=cache_directory)
+                self.assertEqual(sorted(actual_records), expected_records)
+
+    def test_java_files_sorted(self):
+        with TemporaryDirectory() as directory:
+            for relative_path in ["b/B.java", "A.java", "a/C.java", "a/Z.txt", "d.java/D.java"]:
+                Path(directory, relative_path).parent.mkdir(parents=True, exist_ok=True)
+                Path(directory, relative_path).write_text("class A {}")
+            files = [path.relative_to(directory).as_posix() for path in find_java_files(Path(directory))]
+        self.assertEqual(files, ["A.java", "a/C.java", "b/B.java", "d.java/D.java"])
+
+    def test_unknown_analyzer(self):
+        with self.assertRaises(ValueError):
+            list(analyze_corpus([], ["unknown"], jobs=1))
+
+    def test_jsonl_writer(self):
+        output = StringIO()
+        JsonlWriter(output).write(self._record)
+        self.assertEqual(json.loads(output.getvalue()), self._record._asdict())
+
+    def test_csv_writer(self):
+        output = StringIO()
+        CsvWriter(output).write(self._record)
+        header, row = csv.reader(StringIO(output.getvalue()))
+        self.assertEqual(header, list(CorpusRecord._fields))
+        self.assertEqual(row, ["A.java", "decomposition", "A", "", '{"strong": 2, "weak": 1}', ""])
+
+    def test_cli(self):
+        with TemporaryDirectory() as directory:
+            output_path = Path(directory, "result.jsonl")
+            main(["-d", str(self._samples_directory), "-a", "ncss", "-j", "2", "-o", str(output_path)])
+            records = [json.loads(line) for line in output_path.read_text().splitlines()]
+        self.assertEqual(len(records), len(list(find_java_files(self._samples_directory))))
+        self.assertTrue(all(record["analyzer"] == "ncss" and record["error"] is None for record in records))
+
+    _samples_directory = Path(__file__).absolute().parent.parent / "ast_framework"
+
+    _record = CorpusRecord("A.java", "decomposition", "A", None, {"strong": 2, "weak": 1})
@@ -0,0 +1,154 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from veniq.corpus import analyze_corpus_incrementally, analyze_file, analyzers_versions
+
+
+class IncrementalAnalysisTestSuite(TestCase):
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        self._corpus = Path(self._temporary_directory.name, "corpus")
+        self._store = Path(self._temporary_directory.name, "store")
+        self._corpus.mkdir()
+        for filename in self._java_files:
+            shutil.copyfile(self._samples_directory / filename, self._corpus / filename)
+        self._analyzed_files = []
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def test_first_run_analyzes_all_files(self):
+        self._run()
+        self.assertEqual(self._analyzed_files, sorted(self._java_files))
+
+    def test_unchanged_files_are_not_analyzed(self):
+        expected_records = self._run()
+        self._analyzed_files.clear()
+        self.assertEqual(self._run(), expected_records)
+        self.assertEqual(self._analyzed_files, [])
+
+    def test_only_changed_and_added_files_are_analyzed(self):
+        self._run()
+        self._analyzed_files.clear()
+        self._change_file("SimpleClass.java")
+        (self._corpus / "Added.java").write_text("class Added { int field; }")
+        (self._corpus / "ScopeTest.java").unlink()
+
+        records = self._run()
+        self.assertEqual(self._analyzed_files, ["Added.java", "SimpleClass.java"])
+        self.assertEqual(
+            {(Path(record.file).name, record.class_name) for record in records},
+            {("Added.java", "Added"), ("SimpleClass.java", "Changed"), ("LottieImageAsset.java", "LottieImageAsset")},
+        )
+
+    def test_touched_files_are_not_analyzed(self):
+        self._run()
+        self._analyzed_files.clear()
+        os.utime(self._corpus / "SimpleClass.java", (0, 0))
+        self._run()
+        self.assertEqual(self._analyzed_files, [])
+
+    def test_failed_files_are_analyzed_again(self):
+        (self._corpus / "Broken.java").write_text("class Broken { void method( }")
+        self._run()
+        self._analyzed_files.clear()
+        records = self._run()
+        self.assertEqual(self._analyzed_files, ["Broken.java"])
+        self.assertIsNotNone(next(record for record in records if Path(record.file).name == "Broken.java").error)
+
+    def test_other_analyzers_require_full_analysis(self):
+        self._run()
+        self._analyzed_files.clear()
+        self._run(["ncss", "decomposition"])
+        self.assertEqual(self._analyzed_files, sorted(self._java_files))
+
+    def test_changed_analyzer_version_requires_full_analysis(self):
+        self._run()
+        self._analyzed_files.clear()
+        with patch.dict(analyzers_versions, {"ncss": analyzers_versions["ncss"] + 1}):
+            self._run()
+            self.assertEqual(self._analyzed_files, sorted(self._java_files))
+            self._analyzed_files.clear()
+            self._run()
+        self.assertEqual(self._analyzed_files, [])
+
+    def test_changes_from_git(self):
+        self._git("init", "-q")
+        self._commit_all()
+        self._run(changes_detection="git")
+        self._analyzed_files.clear()
+
+        self._change_file("SimpleClass.java")
+        self._commit_all()
+        self._run(changes_detection="git")
+        self.assertEqual(self._analyzed_files, ["SimpleClass.java"])
+
+    def test_untracked_files_changes_from_git(self):
+        self._git("init", "-q")
+        self._commit_all()
+        (self._corpus / "Untracked.java").write_text("class Untracked {}")
+        self._run(changes_detection="git")
+        self._analyzed_files.clear()
+
+        self._change_file("Untracked.java")
+        self._run(changes_detection="git")
+        self.assertEqual(self._analyzed_files, ["Untracked.java"])
+
+    def test_reverted_uncommitted_changes_from_git(self):
+        self._git("init", "-q")
+        self._commit_all()
+        self._run(changes_detection="git")
+        self._change_file("SimpleClass.java")
+        self._run(changes_detection="git")
+        self._analyzed_files.clear()
+
+        self._git("checkout", "--", "SimpleClass.java")
+        records = self._run(changes_detection="git")
+        self.assertEqual(self._analyzed_files, ["SimpleClass.java"])
+        self.assertNotIn("Changed", {record.class_name for record in records})
+
+        self._analyzed_files.clear()
+        self._run(changes_detection="git")
+        self.assertEqual(self._analyzed_files, [])
+
+    def test_non_ascii_paths_changes_from_git(self):
+        self._git("init", "-q")
+        (self._corpus / "Äpfel.java").write_text("class Apfel {}")
+        self._commit_all()
+        self._run(changes_detection="git")
+        self._analyzed_files.clear()
+
+        self._change_file("Äpfel.java")
+        self._commit_all()
+        self._run(changes_detection="git")
+        self.assertEqual(self._analyzed_files, ["Äpfel.java"])
+
+    def _run(self, analyzers_names=("ncss",), changes_detection="mtime"):
+        return sorted(analyze_corpus_incrementally(
+            self._corpus, self._store, list(analyzers_names),
+            lambda files: self._analyze(files, analyzers_names), changes_detection
+        ))
+
+    def _analyze(self, files, analyzers_names):
+        for file in files:
+            self._analyzed_files.append(file.name)
+            yield from analyze_file(str(file), analyzers_names)
+
+    def _change_file(self, filename: str):
+        (self._corpus / filename).write_text("class Changed { void method() {} }")
+
+    def _commit_all(self):
+        self._git("add", "-A")
+        self._git("-c", "user.name=test", "-c", "user.email=test@test", "commit", "-q", "-m", "commit")
+
+    def _git(self, *arguments: str):
+        subprocess.run(["git", "-C", str(self._corpus), *arguments], check=True)
+
+    _samples_directory = Path(__file__).absolute().parent.parent / "ast_framework"
+
+    _java_files = ["SimpleClass.java", "ScopeTest.java", "LottieImageAsset.java"]
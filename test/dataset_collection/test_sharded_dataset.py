@@ -0,0 +1,67 @@
+import tarfile
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from veniq.dataset_collection.sharded_dataset import ShardedDataset
+
+
+class ShardedDatasetTestSuite(TestCase):
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        self._folder = Path(self._temporary_directory.name, "dataset")
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def test_rows_are_split_to_shards(self):
+        with self._create_dataset() as dataset:
+            for index in range(5):
+                dataset.add_file_rows(f"File{index}.java", [[f"File{index}.java", "row"]])
+
+        self.assertEqual(len(list(self._folder.glob("out_*.csv"))), 3)
+        self.assertEqual([row["input"] for row in dataset.iterate_rows()],
+                         [f"File{index}.java" for index in range(5)])
+
+    def test_restart_skips_done_files(self):
+        with self._create_dataset() as dataset:
+            dataset.add_file_rows("File0.java", [["File0.java", "row"]])
+            dataset.add_file_rows("File1.java", [])
+
+        with self._create_dataset() as dataset:
+            self.assertEqual(dataset.done_files, {"File0.java", "File1.java"})
+            dataset.add_file_rows("File2.java", [["File2.java", "row"]])
+
+        self.assertEqual([row["input"] for row in dataset.iterate_rows()], ["File0.java", "File2.java"])
+
+    def test_not_journaled_rows_are_dropped(self):
+        dataset = self._create_dataset()
+        dataset.add_file_rows("File0.java", [["File0.java", "row"]])
+        # process dies after rows of the next file are written, but before it is journaled
+        shard_path, = self._folder.glob("out_*.csv")
+        with open(shard_path, "a") as shard_file:
+            shard_file.write("File1.java,row\nFile1.java,partial ro")
+        with open(self._folder / "journal.jsonl", "a") as journal:
+            journal.write('{"file": "File1.java", "sha')
+
+        restarted_dataset = self._create_dataset()
+        self.assertEqual(restarted_dataset.done_files, {"File0.java"})
+        restarted_dataset.add_file_rows("File1.java", [["File1.java", "row"]])
+        restarted_dataset.close()
+        self.assertEqual([row["input"] for row in restarted_dataset.iterate_rows()], ["File0.java", "File1.java"])
+        self.assertEqual(self._create_dataset().done_files, {"File0.java", "File1.java"})
+
+    def test_completed_shards_are_archived(self):
+        input_file = Path(self._temporary_directory.name, "Input.java")
+        input_file.write_text("class Input {}")
+        with self._create_dataset(archive=True) as dataset:
+            dataset.add_file_rows("Input.java", [[str(input_file), "row"], [str(input_file), "row"]])
+            self.assertTrue((self._folder / "archives" / "out_00000.tar.gz").exists())
+            dataset.add_file_rows("Other.java", [])
+
+        with tarfile.open(self._folder / "archives" / "out_00000.tar.gz") as tar:
+            self.assertEqual(set(tar.getnames()), {"dataset/out_00000.csv", "Input.java"})
+        self.assertTrue((self._folder / "archives" / "out_00001.tar.gz").exists())
+
+    def _create_dataset(self, archive=False):
+        return ShardedDataset(self._folder, ["input", "value"], 2, archived_columns=["input"], archive=archive)
@@ -0,0 +1,106 @@
+import os
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from veniq.ast_framework import AST
+from veniq.utils.ast_builder import build_ast
+from veniq.utils.ast_cache import ASTCache
+
+
+class ASTCacheTestSuite(TestCase):
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        self._directory = Path(self._temporary_directory.name)
+        self._java_file = self._directory / "SimpleClass.java"
+        shutil.copyfile(self._samples_directory / "SimpleClass.java", self._java_file)
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def test_cached_ast_same_as_built(self):
+        cache = ASTCache(self._directory / "cache")
+        expected_ast = AST.build_from_javalang(build_ast(str(self._java_file)))
+        for _ in range(2):
+            actual_ast = cache.get_ast(self._java_file)
+            self.assertEqual(str(actual_ast), str(expected_ast))
+
+    def test_second_request_skips_parsing(self):
+        expected_span = ASTCache(self._directory / "cache").get_ast(self._java_file).get_root().span
+        with patch("veniq.utils.ast_cache.parse_with_spans", side_effect=AssertionError("File was parsed again")):
+            ast = ASTCache(self._directory / "cache").get_ast(self._java_file)
+        self.assertIsNotNone(expected_span)
+        self.assertEqual(ast.get_root().span, expected_span)
+
+    def test_cached_ast_strings_interned(self):
+        ASTCache(self._directory / "cache").get_ast(self._java_file)
+        cached_ast = ASTCache(self._directory / "cache").get_ast(self._java_file)
+        expected_ast = AST.build_from_javalang(build_ast(str(self._java_file)))
+        for cached_node, expected_node in zip(cached_ast, expected_ast):
+            for attribute_name in ["name", "member", "qualifier", "string"]:
+                expected_value = getattr(expected_node, attribute_name, None)
+                if isinstance(expected_value, str):
+                    self.assertIs(getattr(cached_node, attribute_name), expected_value)
+
+    def test_changed_file_is_parsed_again(self):
+        cache = ASTCache(self._directory / "cache")
+        cache.get_ast(self._java_file)
+        self._java_file.write_text("class Changed {}")
+        self.assertEqual(cache.get_ast(self._java_file).get_root().types[0].name, "Changed")
+        self.assertEqual(len(self._get_entries()), 2)
+
+    def test_corrupted_entry_is_rebuilt(self):
+        cache = ASTCache(self._directory / "cache")
+        cache.get_ast(self._java_file)
+        entry_path, = self._get_entries()
+        entry_path.write_bytes(b"corrupted")
+        self.assertEqual(cache.get_ast(self._java_file).get_root().types[0].name, "Simple")
+
+    def test_least_recently_used_entries_evicted(self):
+        cache = ASTCache(self._directory / "cache")
+        java_files = []
+        for index in range(3):
+            java_file = self._directory / f"Class{index}.java"
+            java_file.write_text(f"class Class{index} {{ int field{index}; }}")
+            cache.get_ast(java_file)
+            java_files.append(java_file)
+
+        entries_sizes = {entry_path: entry_path.stat().st_size for entry_path in self._get_entries()}
+        # make first file most recently used
+        for access_time, entry_path in enumerate(sorted(entries_sizes, key=lambda path: path.stat().st_mtime)):
+            os.utime(entry_path, (access_time, access_time))
+        cache.get_ast(java_files[0])
+
+        ASTCache(self._directory / "cache", max_size=max(entries_sizes.values())).evict()
+        with patch("veniq.utils.ast_cache.parse_with_spans", side_effect=AssertionError("File was parsed again")):
+            cache.get_ast(java_files[0])
+        self.assertEqual(len(self._get_entries()), 1)
+
+    def test_temporary_file_removed_on_failed_store(self):
+        cache = ASTCache(self._directory / "cache")
+        with patch("veniq.utils.ast_cache.os.replace", side_effect=OSError("No space left on device")):
+            with self.assertRaises(OSError):
+                cache.get_ast(self._java_file)
+        self.assertEqual(list((self._directory / "cache").glob("*/*")), [])
+
+    def test_stale_temporary_files_evicted(self):
+        cache = ASTCache(self._directory / "cache")
+        cache.get_ast(self._java_file)
+        entry_path, = self._get_entries()
+        stale_temporary_file = entry_path.parent / "stale.tmp"
+        stale_temporary_file.write_bytes(b"partial entry")
+        os.utime(stale_temporary_file, (0, 0))
+        fresh_temporary_file = entry_path.parent / "fresh.tmp"
+        fresh_temporary_file.write_bytes(b"entry being written")
+
+        cache.evict()
+        self.assertFalse(stale_temporary_file.exists())
+        self.assertTrue(fresh_temporary_file.exists())
+        self.assertEqual(self._get_entries(), [entry_path])
+
+    def _get_entries(self):
+        return list((self._directory / "cache").glob("*/*.ast"))
+
+    _samples_directory = Path(__file__).absolute().parent.parent / "ast_framework"
@@ -0,0 +1,111 @@
+import os
+import pickle
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.utils.ast_builder import build_ast_with_spans
+from veniq.utils.ast_snapshot import ASTSnapshot, main
+
+
+class ASTSnapshotTestSuite(TestCase):
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        self._directory = Path(self._temporary_directory.name)
+        self._snapshot_path = self._directory / "corpus.snapshot"
+        self._project_directory = self._directory / "project"
+        shutil.copytree(self._samples_directory, self._project_directory)
+        self._java_files = [self._project_directory / file_name for file_name in self._java_files_names]
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def test_snapshot_ast_same_as_built(self):
+        self.assertEqual(ASTSnapshot.write(self._snapshot_path, self._project_directory, self._java_files), [])
+        snapshot = ASTSnapshot(self._snapshot_path)
+        self.assertEqual(list(snapshot), self._java_files_names)
+        for java_file in self._java_files:
+            with self.subTest(java_file=java_file.name):
+                javalang_ast, javalang_spans = build_ast_with_spans(str(java_file))
+                expected_ast = AST.build_from_javalang(javalang_ast, javalang_spans=javalang_spans)
+                actual_ast = snapshot.get_ast(java_file)
+                self.assertEqual(str(actual_ast), str(expected_ast))
+                self.assertEqual(
+                    [node.span for node in actual_ast.get_proxy_nodes(*ASTNodeType)],
+                    [node.span for node in expected_ast.get_proxy_nodes(*ASTNodeType)],
+                )
+
+    def test_snapshot_nodes_pickled(self):
+        ASTSnapshot.write(self._snapshot_path, self._project_directory, self._java_files)
+        method_declaration = next(
+            ASTSnapshot(self._snapshot_path).get_ast(self._java_files[0]).get_proxy_nodes(
+                ASTNodeType.METHOD_DECLARATION
+            )
+        )
+        unpickled_method_declaration = pickle.loads(pickle.dumps(method_declaration))
+        self.assertEqual(unpickled_method_declaration.name, method_declaration.name)
+        self.assertEqual(unpickled_method_declaration.span, method_declaration.span)
+
+    def test_snapshot_strings_interned(self):
+        ASTSnapshot.write(self._snapshot_path, self._project_directory, self._java_files)
+        snapshot_ast = ASTSnapshot(self._snapshot_path).get_ast(self._java_files[0])
+        expected_ast = AST.build_from_javalang(build_ast_with_spans(str(self._java_files[0]))[0])
+        for snapshot_node, expected_node in zip(snapshot_ast, expected_ast):
+            for attribute_name in ["name", "member", "qualifier", "string"]:
+                expected_value = getattr(expected_node, attribute_name, None)
+                if isinstance(expected_value, str):
+                    self.assertIs(getattr(snapshot_node, attribute_name), expected_value)
+
+    def test_failed_files_skipped(self):
+        broken_file = self._project_directory / "Broken.java"
+        broken_file.write_text("class Broken { void method( }")
+        failed_files = ASTSnapshot.write(self._snapshot_path, self._project_directory, [broken_file, *self._java_files])
+        self.assertEqual(failed_files, [str(broken_file)])
+        snapshot = ASTSnapshot(self._snapshot_path)
+        self.assertNotIn(broken_file, snapshot)
+        self.assertEqual(len(snapshot), len(self._java_files))
+        with self.assertRaises(KeyError):
+            snapshot.get_ast(broken_file)
+
+    def test_files_found_by_relative_paths(self):
+        ASTSnapshot.write(self._snapshot_path, self._project_directory)
+        moved_project_directory = self._directory / "moved_project"
+        self._project_directory.rename(moved_project_directory)
+        snapshot = ASTSnapshot(self._snapshot_path, moved_project_directory)
+        for relative_path in ["SimpleClass.java", "../moved_project/SimpleClass.java"]:
+            with self.subTest(relative_path=relative_path):
+                self.assertIn(moved_project_directory / relative_path, snapshot)
+                snapshot.get_ast(moved_project_directory / relative_path)
+        self.assertNotIn(self._samples_directory / "SimpleClass.java", snapshot)
+
+    def test_changed_file_not_taken(self):
+        ASTSnapshot.write(self._snapshot_path, self._project_directory, self._java_files)
+        changed_file = self._java_files[0]
+        changed_file.write_text(changed_file.read_text() + "\n")
+        snapshot = ASTSnapshot(self._snapshot_path)
+        with self.assertRaises(KeyError):
+            snapshot.get_ast(changed_file)
+        snapshot.get_ast(self._java_files[1])
+
+    def test_touched_file_not_taken(self):
+        ASTSnapshot.write(self._snapshot_path, self._project_directory, self._java_files)
+        file_stat = self._java_files[0].stat()
+        os.utime(self._java_files[0], ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10 ** 9))
+        with self.assertRaises(KeyError):
+            ASTSnapshot(self._snapshot_path).get_ast(self._java_files[0])
+
+    def test_other_file_rejected(self):
+        self._snapshot_path.write_bytes(b"class A {}" * 10)
+        with self.assertRaises(ValueError):
+            ASTSnapshot(self._snapshot_path)
+
+    def test_cli(self):
+        main(["-d", str(self._samples_directory), "-o", str(self._snapshot_path)])
+        snapshot = ASTSnapshot(self._snapshot_path)
+        self.assertEqual(len(snapshot), len(list(self._samples_directory.glob("*.java"))))
+
+    _samples_directory = Path(__file__).absolute().parent.parent / "ast_framework"
+
+    _java_files_names = ["SimpleClass.java", "LottieImageAsset.java", "ScopeTest.java"]
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from veniq.utils.braces_index import BracesIndex
+
+
+class BracesIndexTestSuite(TestCase):
+    def test_braces_in_literals_and_comments_ignored(self):
+        braces = BracesIndex(self._source_code)
+        self.assertEqual(braces.get_block_lines(3), (3, 9))
+
+    def test_block_on_single_line(self):
+        braces = BracesIndex(self._source_code)
+        self.assertEqual(braces.get_block_lines(11), (11, 11))
+
+    def test_first_block_after_line(self):
+        braces = BracesIndex(self._source_code)
+        self.assertEqual(braces.get_block_lines(10), (11, 11))
+        self.assertEqual(braces.get_block_lines(1), (1, 12))
+
+    def test_no_block_after_line(self):
+        braces = BracesIndex(self._source_code)
+        self.assertIsNone(braces.get_block_lines(12))
+        self.assertIsNone(braces.get_block_lines(100))
+
+    _source_code = "\n".join([
+        "class Example {",
+        "    @Deprecated",
+        "    void method() {",
+        "        String text = \"}{\";",
+        "        char bracket = '}';",
+        "        /* } */",
+        "        // }",
+        "        run();",
+        "    }",
+        "",
+        "    void empty() { }",
+        "}",
+    ])
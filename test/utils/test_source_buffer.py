@@ -0,0 +1,27 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from veniq.ast_framework.storage import NodeSpan
+from veniq.utils.source_buffer import SourceBuffer
+
+
+class SourceBufferTestSuite(TestCase):
+    def test_lines_same_as_read_from_file(self):
+        for text in ["", "\n", "class A {}", "class A {\n}\n", "class A {\n\n  int a;\n}"]:
+            with self.subTest(text=text), TemporaryDirectory() as directory:
+                file_path = Path(directory, "A.java")
+                file_path.write_text(text)
+                with open(file_path, encoding="utf-8") as java_file:
+                    expected_lines = list(java_file)
+                self.assertEqual(SourceBuffer.from_file(file_path).lines, expected_lines)
+
+    def test_lines_offsets(self):
+        source = SourceBuffer("class A {\n  int a;\n}")
+        for line, offset in zip(source.lines, source.lines_offsets):
+            self.assertTrue(source.text.startswith(line, offset))
+
+    def test_span_text(self):
+        source = SourceBuffer("class A {\n  int a;\n}")
+        self.assertEqual(source.get_span_text(NodeSpan(2, 3, 2, 9)), "int a;")
+        self.assertEqual(source.get_span_text(NodeSpan(1, 9, 3, 2)), "{\n  int a;\n}")
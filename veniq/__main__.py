@@ -0,0 +1,101 @@
+import os
+import sys
+from argparse import ArgumentParser
+from contextlib import ExitStack
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+
+from tqdm import tqdm
+
+from veniq.corpus import analyze_corpus, analyze_corpus_incrementally, analyzers, find_java_files, writers
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    parser = ArgumentParser(prog="veniq", description="Run analyzers over all Java files in a directory.")
+    parser.add_argument("-d", "--dir", required=True, help="Directory with Java files to analyze")
+    parser.add_argument(
+        "-a",
+        "--analyzers",
+        nargs="+",
+        choices=sorted(analyzers),
+        default=sorted(analyzers),
+        help="Analyzers to run. By default all analyzers are run.",
+    )
+    parser.add_argument("-o", "--output", default="-", help="Output file. By default results are printed.")
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=sorted(writers),
+        default=None,
+        help="Output format. By default it is taken from output file extension, otherwise JSONL is used.",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Number of processes to spawn"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=300, help="Maximum time in seconds to analyze a single file"
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=None,
+        help="Maximum number of files submitted to processes at once. By default 4 files per process.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for persistent cache of parsed files. By default files are parsed on each run.",
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=1024, help="Maximum size of parsed files cache in megabytes"
+    )
+    parser.add_argument(
+        "--incremental-store",
+        default=None,
+        help="Directory to keep results between runs. "
+             "If given, only files changed since the previous run are analyzed.",
+    )
+    parser.add_argument(
+        "--changes",
+        choices=["mtime", "git"],
+        default="mtime",
+        help="How changed files are found in incremental mode: "
+             "by modification time or by git diff against commit of the previous run.",
+    )
+    args = parser.parse_args(arguments)
+
+    output_format = args.format or _get_format_by_extension(args.output)
+    with ExitStack() as stack:
+        if args.output == "-":
+            output_stream = sys.stdout
+        else:
+            output_stream = stack.enter_context(open(args.output, "w", newline=""))
+        writer = writers[output_format](output_stream)
+
+        analyze = partial(
+            analyze_corpus,
+            analyzers_names=args.analyzers,
+            jobs=args.jobs,
+            timeout=args.timeout,
+            queue_size=args.queue_size,
+            cache_directory=args.cache_dir,
+            cache_size=args.cache_size * 1024 ** 2,
+        )
+        if args.incremental_store is None:
+            records = analyze(find_java_files(Path(args.dir)))
+        else:
+            records = analyze_corpus_incrementally(
+                Path(args.dir), Path(args.incremental_store), args.analyzers, analyze, args.changes
+            )
+        for record in tqdm(records, unit="record", disable=args.output == "-"):
+            writer.write(record)
+
+
+def _get_format_by_extension(output_path: str) -> str:
+    extension = Path(output_path).suffix.lstrip(".")
+    return extension if extension in writers else "jsonl"
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,14 @@
-from collections import namedtuple, defaultdict
+from collections import namedtuple
 from itertools import islice, repeat, chain
 
 from deprecated import deprecated  # type: ignore
 from javalang.tree import Node
-from networkx import DiGraph, dfs_labeled_edges, dfs_preorder_nodes  # type: ignore
-from typing import Union, Any, Callable, Set, List, Iterator, Tuple, Dict, cast, Optional
+from networkx import DiGraph  # type: ignore
+from typing import Union, Any, Callable, List, Iterator, Mapping, Tuple, Type, Optional
 
 from veniq.ast_framework.ast_node_type import ASTNodeType
-from veniq.ast_framework._auxiliary_data import javalang_to_ast_node_type, attributes_by_node_type, ASTNodeReference
 from veniq.ast_framework.ast_node import ASTNode
+from veniq.ast_framework.storage import ASTStorage, CompactStorage, NetworkxStorage, NodeSpan
 
 MethodInvocationParams = namedtuple('MethodInvocationParams', ['object_name', 'method_name'])
 
@@ -20,45 +20,60 @@ TraverseCallback = Callable[[ASTNode], None]
 
 
 class AST:
-    def __init__(self, networkx_tree: DiGraph, root: int):
-        self.tree = networkx_tree
+    def __init__(self, storage: Union[ASTStorage, DiGraph], root: int):
+        self._storage = storage if isinstance(storage, ASTStorage) else NetworkxStorage(storage)
         self.root = root
 
     @staticmethod
-    def build_from_javalang(javalang_ast_root: Node) -> 'AST':
-        tree = DiGraph()
-        javalang_node_to_index_map: Dict[Node, int] = {}
-        root = AST._add_subtree_from_javalang_node(tree, javalang_ast_root,
-                                                   javalang_node_to_index_map)
-        AST._replace_javalang_nodes_in_attributes(tree, javalang_node_to_index_map)
-        return AST(tree, root)
+    def build_from_javalang(
+        javalang_ast_root: Node,
+        storage_type: Type[ASTStorage] = CompactStorage,
+        javalang_spans: Optional[Mapping[Node, NodeSpan]] = None,
+    ) -> 'AST':
+        '''
+        Spans of javalang nodes are produced by veniq.utils.ast_builder.build_ast_with_spans.
+        '''
+        storage, root = storage_type.build_from_javalang(javalang_ast_root, javalang_spans)
+        return AST(storage, root)
+
+    @property
+    def storage(self) -> ASTStorage:
+        return self._storage
+
+    @property
+    def tree(self) -> DiGraph:
+        '''
+        AST as networkx DiGraph.
+        Graph is created on first request, if AST is kept in other storage.
+        '''
+        return self._storage.to_networkx()
 
     def __str__(self) -> str:
         printed_graph = ''
         depth = 0
-        for _, destination, edge_type in dfs_labeled_edges(self.tree, self.root):
-            if edge_type == 'forward':
+        for node_index, is_entering in self._dfs_labeled_nodes(self.root):
+            if is_entering:
                 printed_graph += '|   ' * depth
-                node_type = self.tree.nodes[destination]['node_type']
+                node_type = self._storage.get_type(node_index)
                 printed_graph += str(node_type) + ': '
                 if node_type == ASTNodeType.STRING:
-                    printed_graph += self.tree.nodes[destination]['string'] + ', '
-                printed_graph += f'node index = {destination}'
-                node_line = self.tree.nodes[destination]['line']
+                    printed_graph += self._storage.get_attribute(node_index, 'string') + ', '
+                printed_graph += f'node index = {node_index}'
+                node_line = self._storage.get_line(node_index)
                 if node_line is not None:
                     printed_graph += f', line = {node_line}'
                 printed_graph += '\n'
                 depth += 1
-            elif edge_type == 'reverse':
+            else:
                 depth -= 1
         return printed_graph
 
     def get_root(self) -> ASTNode:
-        return ASTNode(self.tree, self.root)
+        return ASTNode(self._storage, self.root)
 
     def __iter__(self) -> Iterator[ASTNode]:
-        for node_index in self.tree.nodes:
-            yield ASTNode(self.tree, node_index)
+        for node_index in self._storage.get_nodes():
+            yield ASTNode(self._storage, node_index)
 
     def get_subtrees(self, *root_type: ASTNodeType) -> Iterator['AST']:
         '''
@@ -66,27 +81,16 @@ class AST:
         If such subtrees are one including the other, only the larger one is
         going to be in resulted sequence.
         '''
-        is_inside_subtree = False
-        current_subtree_root = -1  # all node indexes are positive
-        subtree: List[int] = []
-        for _, destination, edge_type in dfs_labeled_edges(self.tree, self.root):
-            if edge_type == 'forward':
-                if is_inside_subtree:
-                    subtree.append(destination)
-                elif self.tree.nodes[destination]['node_type'] in root_type:
-                    subtree.append(destination)
-                    is_inside_subtree = True
-                    current_subtree_root = destination
-            elif edge_type == 'reverse' and destination == current_subtree_root:
-                is_inside_subtree = False
-                yield AST(self.tree.subgraph(subtree), current_subtree_root)
-                subtree = []
-                current_subtree_root = -1
+        nodes_stack: List[int] = [self.root]
+        while nodes_stack:
+            node_index = nodes_stack.pop()
+            if self._storage.get_type(node_index) in root_type:
+                yield AST(self._storage.get_subtree(node_index), node_index)
+            else:
+                nodes_stack.extend(reversed(list(self._storage.get_children(node_index))))
 
     def get_subtree(self, node: ASTNode) -> 'AST':
-        subtree_nodes_indexes = dfs_preorder_nodes(self.tree, node.node_index)
-        subtree = self.tree.subgraph(subtree_nodes_indexes)
-        return AST(subtree, node.node_index)
+        return AST(self._storage.get_subtree(node.node_index), node.node_index)
 
     def traverse(
         self,
@@ -95,37 +99,33 @@ class AST:
         source_node: Optional[ASTNode] = None,
         undirected=False
     ):
-        traverse_graph = self.tree.to_undirected(as_view=True) if undirected else self.tree
         if source_node is None:
             source_node = self.get_root()
 
-        for _, destination, edge_type in dfs_labeled_edges(traverse_graph, source_node.node_index):
-            if edge_type == "forward":
-                on_node_entering(ASTNode(self.tree, destination))
-            elif edge_type == "reverse":
-                on_node_leaving(ASTNode(self.tree, destination))
+        for node_index, is_entering in self._dfs_labeled_nodes(source_node.node_index, undirected):
+            if is_entering:
+                on_node_entering(ASTNode(self._storage, node_index))
+            else:
+                on_node_leaving(ASTNode(self._storage, node_index))
 
     def create_fake_node(self) -> ASTNode:
-        fake_nodes_qty = self._fake_nodes_qty_per_graph[self.tree]
-        self._fake_nodes_qty_per_graph[self.tree] += 1
-        new_fake_node_id = -(fake_nodes_qty + 1)
-        return ASTNode(self.tree, new_fake_node_id)
+        return ASTNode(self._storage, self._storage.create_fake_node_index())
 
     @deprecated(reason='Use ASTNode functionality instead.')
     def children_with_type(self, node: int, child_type: ASTNodeType) -> Iterator[int]:
         '''
         Yields children of node with given type.
         '''
-        for child in self.tree.succ[node]:
-            if self.tree.nodes[child]['node_type'] == child_type:
+        for child in self._storage.get_children(node):
+            if self._storage.get_type(child) == child_type:
                 yield child
 
     @deprecated(reason='Use ASTNode functionality instead.')
     def list_all_children_with_type(self, node: int, child_type: ASTNodeType) -> List[int]:
         list_node: List[int] = []
-        for child in self.tree.succ[node]:
+        for child in self._storage.get_children(node):
             list_node = list_node + self.list_all_children_with_type(child, child_type)
-            if self.tree.nodes[child]['node_type'] == child_type:
+            if self._storage.get_type(child) == child_type:
                 list_node.append(child)
         return sorted(list_node)
 
@@ -138,12 +138,15 @@ class AST:
             yield child
 
     @deprecated(reason='Use ASTNode functionality instead.')
-    def get_first_n_children_with_type(self, node: int, child_type: ASTNodeType, quantity: int) -> List[int]:
+    def get_first_n_children_with_type(self, node: int, child_type: ASTNodeType,
+                                       quantity: int) -> List[Optional[int]]:
         '''
         Returns first quantity of children of node with type child_type.
         Resulted list is padded with None to length quantity.
         '''
-        children_with_type = (child for child in self.tree.succ[node] if self.get_type(child) == child_type)
+        children_with_type: Iterator[Optional[int]] = (
+            child for child in self._storage.get_children(node) if self.get_type(child) == child_type
+        )
         children_with_type_padded = chain(children_with_type, repeat(None))
         return list(islice(children_with_type_padded, 0, quantity))
 
@@ -155,7 +158,7 @@ class AST:
 
     @deprecated(reason='Use ASTNode functionality instead.')
     def get_line_number_from_children(self, node: int) -> int:
-        for child in self.tree.succ[node]:
+        for child in self._storage.get_children(node):
             cur_line = self.get_attr(child, 'line')
             if cur_line is not None:
                 return cur_line
@@ -163,18 +166,21 @@ class AST:
 
     @deprecated(reason='Use get_proxy_nodes instead.')
     def get_nodes(self, type: Union[ASTNodeType, None] = None) -> Iterator[int]:
-        for node in self.tree.nodes:
-            if type is None or self.tree.nodes[node]['node_type'] == type:
-                yield node
+        if type is None:
+            return self._storage.get_nodes()
+        return self._storage.get_nodes_with_types((type,))
 
     def get_proxy_nodes(self, *types: ASTNodeType) -> Iterator[ASTNode]:
-        for node in self.tree.nodes:
-            if len(types) == 0 or self.tree.nodes[node]['node_type'] in types:
-                yield ASTNode(self.tree, node)
+        nodes = self._storage.get_nodes_with_types(types) if types else self._storage.get_nodes()
+        for node in nodes:
+            yield ASTNode(self._storage, node)
 
     @deprecated(reason='Use ASTNode functionality instead.')
     def get_attr(self, node: int, attr_name: str, default_value: Any = None) -> Any:
-        return self.tree.nodes[node].get(attr_name, default_value)
+        try:
+            return self._storage.get_attribute(node, attr_name)
+        except KeyError:
+            return default_value
 
     @deprecated(reason='Use ASTNode functionality instead.')
     def get_type(self, node: int) -> ASTNodeType:
@@ -215,153 +221,32 @@ class AST:
     @deprecated(reason='Use ASTNode functionality instead.')
     def get_binary_operation_params(self, binary_operation_node: int) -> BinaryOperationParams:
         assert(self.get_type(binary_operation_node) == ASTNodeType.BINARY_OPERATION)
-        operation_node, left_side_node, right_side_node = self.tree.succ[binary_operation_node]
+        operation_node, left_side_node, right_side_node = self._storage.get_children(binary_operation_node)
         return BinaryOperationParams(self.get_attr(operation_node, 'string'), left_side_node, right_side_node)
 
-    @staticmethod
-    def _add_subtree_from_javalang_node(tree: DiGraph, javalang_node: Union[Node, Set[Any], str],
-                                        javalang_node_to_index_map: Dict[Node, int]) -> int:
-        node_index, node_type = AST._add_javalang_node(tree, javalang_node)
-        if node_index != AST._UNKNOWN_NODE_TYPE and \
-           node_type not in {ASTNodeType.COLLECTION, ASTNodeType.STRING}:
-            javalang_standard_node = cast(Node, javalang_node)
-            javalang_node_to_index_map[javalang_standard_node] = node_index
-            AST._add_javalang_children(tree, javalang_standard_node.children, node_index,
-                                       javalang_node_to_index_map)
-        return node_index
-
-    @staticmethod
-    def _add_javalang_children(tree: DiGraph, children: List[Any], parent_index: int,
-                               javalang_node_to_index_map: Dict[Node, int]) -> None:
-        for child in children:
-            if isinstance(child, list):
-                AST._add_javalang_children(tree, child, parent_index, javalang_node_to_index_map)
-            else:
-                child_index = AST._add_subtree_from_javalang_node(tree, child, javalang_node_to_index_map)
-                if child_index != AST._UNKNOWN_NODE_TYPE:
-                    tree.add_edge(parent_index, child_index)
-
-    @staticmethod
-    def _add_javalang_node(tree: DiGraph, javalang_node: Union[Node, Set[Any], str]) -> Tuple[int, ASTNodeType]:
-        node_index = AST._UNKNOWN_NODE_TYPE
-        node_type = ASTNodeType.UNKNOWN
-        if isinstance(javalang_node, Node):
-            node_index, node_type = AST._add_javalang_standard_node(tree, javalang_node)
-        elif isinstance(javalang_node, set):
-            node_index = AST._add_javalang_collection_node(tree, javalang_node)
-            node_type = ASTNodeType.COLLECTION
-        elif isinstance(javalang_node, str):
-            node_index = AST._add_javalang_string_node(tree, javalang_node)
-            node_type = ASTNodeType.STRING
-
-        return node_index, node_type
-
-    @staticmethod
-    def _add_javalang_standard_node(tree: DiGraph, javalang_node: Node) -> Tuple[int, ASTNodeType]:
-        node_index = len(tree) + 1
-        node_type = javalang_to_ast_node_type[type(javalang_node)]
-
-        attr_names = attributes_by_node_type[node_type]
-        attributes = {attr_name: getattr(javalang_node, attr_name) for attr_name in attr_names}
-
-        attributes['node_type'] = node_type
-        attributes['line'] = javalang_node.position.line if javalang_node.position is not None else None
-
-        AST._post_process_javalang_attributes(tree, node_type, attributes)
-
-        tree.add_node(node_index, **attributes)
-        return node_index, node_type
-
-    @staticmethod
-    def _post_process_javalang_attributes(tree: DiGraph, node_type: ASTNodeType, attributes: Dict[str, Any]) -> None:
-        """
-        Replace some attributes with more appropriate values for convenient work
-        """
-
-        if node_type == ASTNodeType.METHOD_DECLARATION and attributes["body"] is None:
-            attributes["body"] = []
-
-        if node_type == ASTNodeType.LAMBDA_EXPRESSION and isinstance(attributes["body"], Node):
-            attributes["body"] = [attributes["body"]]
-
-        if node_type in {ASTNodeType.METHOD_INVOCATION, ASTNodeType.MEMBER_REFERENCE} and \
-                attributes["qualifier"] == "":
-            attributes["qualifier"] = None
-
-    @staticmethod
-    def _add_javalang_collection_node(tree: DiGraph, collection_node: Set[Any]) -> int:
-        node_index = len(tree) + 1
-        tree.add_node(node_index, node_type=ASTNodeType.COLLECTION, line=None)
-        # we expect only strings in collection
-        # we add them here as children
-        for item in collection_node:
-            if type(item) == str:
-                string_node_index = AST._add_javalang_string_node(tree, item)
-                tree.add_edge(node_index, string_node_index)
-            elif item is not None:
-                raise ValueError('Unexpected javalang AST node type {} inside \
-                                 "COLLECTION" node'.format(type(item)))
-        return node_index
-
-    @staticmethod
-    def _add_javalang_string_node(tree: DiGraph, string_node: str) -> int:
-        node_index = len(tree) + 1
-        tree.add_node(node_index, node_type=ASTNodeType.STRING, string=string_node, line=None)
-        return node_index
-
-    @staticmethod
-    def _replace_javalang_nodes_in_attributes(tree: DiGraph,
-                                              javalang_node_to_index_map: Dict[Node, int]) -> None:
+    def _dfs_labeled_nodes(self, source_node_index: int, undirected: bool = False) -> Iterator[Tuple[int, bool]]:
         '''
-        All javalang nodes found in networkx nodes attributes are replaced
-        with references to according networkx nodes.
-        Supported attributes types:
-         - just javalang Node
-         - list of javalang Nodes and other such lists (with any depth)
+        Depth first traversal from source node.
+        Yields index of each node twice: with True on entering it and with False on leaving it.
+        If undirected is True, parents are traversed as well as children.
         '''
-        for node, attributes in tree.nodes.items():
-            for attribute_name in attributes:
-                attribute_value = attributes[attribute_name]
-                if isinstance(attribute_value, Node):
-                    node_reference = AST._create_reference_to_node(attribute_value,
-                                                                   javalang_node_to_index_map)
-                    tree.add_node(node, **{attribute_name: node_reference})
-                elif isinstance(attribute_value, list):
-                    node_references = \
-                        AST._replace_javalang_nodes_in_list(attribute_value,
-                                                            javalang_node_to_index_map)
-                    tree.add_node(node, **{attribute_name: node_references})
-
-    @staticmethod
-    def _replace_javalang_nodes_in_list(javalang_nodes_list: List[Any],
-                                        javalang_node_to_index_map: Dict[Node, int]) -> List[Any]:
-        '''
-        javalang_nodes_list: list of javalang Nodes or other such lists (with any depth)
-        All javalang nodes are replaces with according references
-        NOTICE: Any is used, because mypy does not support recurrent type definitions
-        '''
-        node_references_list: List[Any] = []
-        for item in javalang_nodes_list:
-            if isinstance(item, Node):
-                node_references_list.append(
-                    AST._create_reference_to_node(item, javalang_node_to_index_map))
-            elif isinstance(item, list):
-                node_references_list.append(
-                    AST._replace_javalang_nodes_in_list(item, javalang_node_to_index_map))
-            elif isinstance(item, (int, str)) or item is None:
-                node_references_list.append(item)
-            else:
-                raise RuntimeError('Cannot parse "Javalang" attribute:\n'
-                                   f'{item}\n'
-                                   'Expected: Node, list of Nodes, integer or string')
-
-        return node_references_list
-
-    @staticmethod
-    def _create_reference_to_node(javalang_node: Node,
-                                  javalang_node_to_index_map: Dict[Node, int]) -> ASTNodeReference:
-        return ASTNodeReference(javalang_node_to_index_map[javalang_node])
-
-    _UNKNOWN_NODE_TYPE = -1
-
-    _fake_nodes_qty_per_graph: Dict[DiGraph, int] = defaultdict(lambda: 0)
+        visited_nodes = {source_node_index}
+        nodes_stack = [(source_node_index, self._get_neighbours(source_node_index, undirected))]
+        yield source_node_index, True
+        while nodes_stack:
+            node_index, neighbours = nodes_stack[-1]
+            neighbour_index = next(neighbours, None)
+            if neighbour_index is None:
+                nodes_stack.pop()
+                yield node_index, False
+            elif neighbour_index not in visited_nodes:
+                visited_nodes.add(neighbour_index)
+                nodes_stack.append((neighbour_index, self._get_neighbours(neighbour_index, undirected)))
+                yield neighbour_index, True
+
+    def _get_neighbours(self, node_index: int, undirected: bool) -> Iterator[int]:
+        children = self._storage.get_children(node_index)
+        if not undirected:
+            return children
+        parent = self._storage.get_parent(node_index)
+        return chain(children, [parent] if parent is not None else [])
@@ -1,8 +1,8 @@
 from inspect import getmembers
-from typing import Any, List, Iterator, Optional
+from typing import Any, Callable, Dict, List, Iterator, Optional, Tuple, Type, Union
+from weakref import ref
 
-from networkx import DiGraph, dfs_preorder_nodes  # type: ignore
-from cached_property import cached_property  # type: ignore
+from networkx import DiGraph  # type: ignore
 
 from veniq.ast_framework._auxiliary_data import (
     common_attributes,
@@ -11,31 +11,67 @@ from veniq.ast_framework._auxiliary_data import (
 )
 from veniq.ast_framework import ASTNodeType
 from veniq.ast_framework.computed_fields_registry import computed_fields_registry
+from veniq.ast_framework.storage import ASTStorage, NetworkxStorage, NodeSpan
 
 
 class ASTNode:
-    def __init__(self, graph: DiGraph, node_index: int):
-        self._graph = graph
-        self._node_index = node_index
+    """
+    Lightweight handle of a node in AST storage.
+    Handles are interned: while a handle is alive, the same object is returned
+    for the same storage object and node index.
+
+    Each handle of a real node is an instance of a subclass generated for its node type,
+    which has a property for each its field, so reading a field does not go through __getattr__.
+    __getattr__ serves fake nodes and nodes missing in their storage.
+    """
+
+    __slots__ = ("_storage", "_node_index", "__weakref__")
+
+    _storage: ASTStorage
+    _node_index: int
+
+    def __new__(cls, storage: Union[ASTStorage, DiGraph], node_index: int) -> "ASTNode":
+        # checking a concrete class avoids slow instance checks of abstract ASTStorage
+        if isinstance(storage, DiGraph):
+            storage = NetworkxStorage(storage)
+
+        # storage is kept alive by the handle, so its id is not reused while the handle is alive
+        cache_key = (id(storage), node_index)
+        node_reference = _nodes_cache.get(cache_key)
+        if node_reference is not None:
+            node = node_reference()
+            if node is not None:
+                return node
+
+        node = object.__new__(cls if node_index < 0 else _get_node_class(storage, node_index))
+        node._storage = storage
+        node._node_index = node_index
+        _nodes_cache[cache_key] = ref(node)
+        if len(_nodes_cache) > _nodes_cache_limit:
+            _remove_dead_references()
+        return node
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return ASTNode, (self._storage, self._node_index)
 
     @property
     def children(self) -> Iterator["ASTNode"]:
         if self.is_fake:
             return iter(())
 
-        for child_index in self._graph.succ[self._node_index]:
-            yield ASTNode(self._graph, child_index)
+        storage = self._storage
+        for child_index in storage.get_children(self._node_index):
+            yield ASTNode(storage, child_index)
 
     @property
     def parent(self) -> Optional["ASTNode"]:
         if self.is_fake:
             return None
 
-        try:
-            parent_index = next(self._graph.predecessors(self._node_index))
-            return ASTNode(self._graph, parent_index)
-        except StopIteration:
+        parent_index = self._storage.get_parent(self._node_index)
+        if parent_index is None:
             return None
+        return ASTNode(self._storage, parent_index)
 
     @property
     def node_index(self) -> int:
@@ -45,25 +81,16 @@ class ASTNode:
     def is_fake(self) -> bool:
         return self._node_index < 0
 
-    @cached_property
+    @property
     def line(self) -> int:
         if self.is_fake:
             return -1
 
-        line = self._get_line(self._node_index)
+        # try to find source code line information from nodes reachable from self
+        line = self._get_line(self._node_index) or self._storage.get_subtree_first_line(self._node_index)
         if line is not None:
             return line
 
-        children_lines: List[int] = [
-            self._get_line(child_index)  # type: ignore # all Nones filtered out in list comprehension
-            for child_index in dfs_preorder_nodes(self._graph, self._node_index)
-            if self._get_line(child_index) is not None
-        ]
-
-        # try to find source code line information from nodes reachable from self
-        if children_lines:
-            return min(children_lines)
-
         # try to  find source code line information from parents up to the root
         parent_index = self._get_parent(self._node_index)
         while line is None and parent_index is not None:
@@ -79,6 +106,14 @@ class ASTNode:
             "does not have any source code line information either."
         )
 
+    @property
+    def span(self) -> Optional[NodeSpan]:
+        """
+        Source code position of the node start and position right after its end,
+        available only if the AST was built with spans.
+        """
+        return self._storage.get_span(self._node_index)
+
     def __getattr__(self, attribute_name: str):
         if self.is_fake:
             return None
@@ -99,7 +134,7 @@ class ASTNode:
         if attribute_name in computed_fields:
             attribute = computed_fields[attribute_name](self)
         else:
-            attribute = self._graph.nodes[self._node_index][attribute_name]
+            attribute = self._storage.get_attribute(self._node_index, attribute_name)
 
         # common_attributes and javalang_fields may contain ASTNodeReference
         # which needs to be replaces with actual ASTNode for convince API
@@ -149,7 +184,7 @@ class ASTNode:
             raise NotImplementedError(
                 f"ASTNode support comparission only with themselves, but {type(other)} was provided."
             )
-        return self._graph == other._graph and self._node_index == other._node_index
+        return self is other or (self._storage == other._storage and self._node_index == other._node_index)
 
     def __hash__(self):
         return hash(self._node_index)
@@ -173,21 +208,88 @@ class ASTNode:
         return list_with_nodes
 
     def _create_node_from_reference(self, reference: ASTNodeReference) -> "ASTNode":
-        return ASTNode(self._graph, reference.node_index)
+        return ASTNode(self._storage, reference.node_index)
 
     def _get_type(self, node_index: int) -> ASTNodeType:
         if self.is_fake:
             return ASTNodeType.UNKNOWN
 
-        return self._graph.nodes[node_index]["node_type"]
+        return self._storage.get_type(node_index)
 
     def _get_line(self, node_index: int) -> Optional[int]:
-        return self._graph.nodes[node_index]["line"]
+        return self._storage.get_line(node_index)
 
     def _get_parent(self, node_index: int) -> Optional[int]:
-        # there is maximum one parent in a tree
-        return next(self._graph.predecessors(node_index), None)
+        return self._storage.get_parent(node_index)
+
+    @staticmethod
+    def _get_public_fixed_interface() -> List[str]:
+        # fields of subclasses generated for node types are not part of fixed interface
+        return [name for name, _ in getmembers(ASTNode) if not name.startswith("_")]
+
+
+# subclasses of ASTNode with fields of a node type as properties, created for the first node of the type
+_node_classes: Dict[ASTNodeType, Type[ASTNode]] = {}
+
+
+def _get_node_class(storage: ASTStorage, node_index: int) -> Type[ASTNode]:
+    try:
+        node_type = storage.get_type(node_index)
+    except (KeyError, IndexError):
+        # node is missing in the storage, so its fields are resolved by __getattr__ on access
+        return ASTNode
+
+    node_class = _node_classes.get(node_type)
+    if node_class is None:
+        node_class = type(f"ASTNode_{node_type.name}", (ASTNode,), {"__slots__": ()})
+        _set_node_class_fields(node_class, node_type)
+        _node_classes[node_type] = node_class
+    return node_class
+
+
+def _set_node_class_fields(node_class: Type[ASTNode], node_type: ASTNodeType) -> None:
+    fields: Dict[str, property] = {"node_type": property(lambda node: node_type)}
+    for attribute_name in attributes_by_node_type[node_type]:
+        fields[attribute_name] = property(_create_javalang_field_getter(attribute_name))
+    # computed fields take precedence over javalang fields with the same name
+    for field_name, compute_field in computed_fields_registry.get_fields(node_type).items():
+        fields[field_name] = property(compute_field)
+
+    for field_name in [name for name in vars(node_class) if name not in fields and not name.startswith("_")]:
+        delattr(node_class, field_name)
+    for field_name, field in fields.items():
+        setattr(node_class, field_name, field)
+
+
+def _create_javalang_field_getter(attribute_name: str) -> Callable[[ASTNode], Any]:
+    def get_javalang_field(node: ASTNode) -> Any:
+        attribute = node._storage.get_attribute(node._node_index, attribute_name)
+        # ASTNodeReference needs to be replaced with actual ASTNode for convince API
+        if isinstance(attribute, ASTNodeReference):
+            return ASTNode(node._storage, attribute.node_index)
+        elif isinstance(attribute, list):
+            return node._replace_references_with_nodes(attribute)
+        return attribute
+
+    return get_javalang_field
+
+
+def _update_node_classes_fields() -> None:
+    for node_type, node_class in _node_classes.items():
+        _set_node_class_fields(node_class, node_type)
+
+
+computed_fields_registry.add_listener(_update_node_classes_fields)
+
+# weak references to alive handles by storage id and node index,
+# references to collected handles are removed in bulk, when the cache doubles in size
+_nodes_cache: Dict[Tuple[int, int], "ref[ASTNode]"] = {}
+_nodes_cache_limit = 1024
+
 
-    @classmethod
-    def _get_public_fixed_interface(cls) -> List[str]:
-        return [name for name, _ in getmembers(cls) if not name.startswith("_")]
+def _remove_dead_references() -> None:
+    global _nodes_cache_limit
+    for cache_key, node_reference in list(_nodes_cache.items()):
+        if node_reference() is None:
+            del _nodes_cache[cache_key]
+    _nodes_cache_limit = max(1024, 2 * len(_nodes_cache))
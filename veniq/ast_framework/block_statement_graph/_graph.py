@@ -0,0 +1,141 @@
+from array import array
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+from veniq.ast_framework import ASTNode
+from .block import Block
+from .constants import BlockReason, NodeId, NodeType
+from .statement import Statement
+
+TraverseCallback = Callable[[Union[Block, Statement]], None]
+
+_block_reasons = list(BlockReason)
+_block_reasons_indexes = {reason: index for index, reason in enumerate(_block_reasons)}
+
+
+class BlockStatementGraph:
+    """
+    Blocks and statements of a method stored in parallel arrays indexed by node id.
+    Ids are given in depth first order, children of a node are linked by next sibling references,
+    so a subtree is traversed iteratively following parent, first child and next sibling links without a stack.
+    AST node of a statement or origin statement of a block is kept as is, so its cached fields are shared.
+    Block and Statement wrappers are created once per node on the first request.
+    """
+
+    def __init__(self) -> None:
+        self._types = array("b")
+        # index of block reason in _block_reasons, -1 for statements
+        self._reasons = array("b")
+        self._parents = array("i")
+        self._first_children = array("i")
+        self._next_siblings = array("i")
+        self._last_children = array("i")
+        self._ast_nodes: List[Optional[ASTNode]] = []
+        self._wrappers: List[Union[Block, Statement, None]] = []
+
+    def add_statement(self, parent_id: NodeId, statement: ASTNode) -> NodeId:
+        return self._add_node(NodeType.Statement, -1, parent_id, statement)
+
+    def add_block(self, parent_id: NodeId, reason: BlockReason, origin_statement: Optional[ASTNode]) -> NodeId:
+        return self._add_node(NodeType.Block, _block_reasons_indexes[reason], parent_id, origin_statement)
+
+    def get_node(self, node_id: NodeId) -> Union[Block, Statement]:
+        wrapper = self._wrappers[node_id]
+        if wrapper is None:
+            if self._types[node_id] == _statement_type:
+                wrapper = Statement(self, node_id)
+            else:
+                wrapper = Block(self, node_id)
+            self._wrappers[node_id] = wrapper
+        return wrapper
+
+    def get_block(self, node_id: NodeId) -> Block:
+        block = self.get_node(node_id)
+        assert isinstance(block, Block), f"Node {node_id} is not a block."
+        return block
+
+    def get_statement(self, node_id: NodeId) -> Statement:
+        statement = self.get_node(node_id)
+        assert isinstance(statement, Statement), f"Node {node_id} is not a statement."
+        return statement
+
+    def get_reason(self, block_id: NodeId) -> BlockReason:
+        return _block_reasons[self._reasons[block_id]]
+
+    def get_ast_node(self, node_id: NodeId) -> Optional[ASTNode]:
+        return self._ast_nodes[node_id]
+
+    def get_parent(self, node_id: NodeId) -> NodeId:
+        return self._parents[node_id]
+
+    def get_children(self, node_id: NodeId) -> Iterator[NodeId]:
+        child_id = self._first_children[node_id]
+        while child_id != -1:
+            yield child_id
+            child_id = self._next_siblings[child_id]
+
+    def has_children(self, node_id: NodeId) -> bool:
+        return self._first_children[node_id] != -1
+
+    def iterate_events(self, start_node_id: NodeId) -> Iterator[Tuple[NodeId, bool]]:
+        """
+        Yields ids of nodes of a subtree in depth first order together with a flag,
+        which is True on entering a node and False on leaving it.
+        """
+        first_children = self._first_children
+        next_siblings = self._next_siblings
+        parents = self._parents
+        node_id = start_node_id
+        while True:
+            yield node_id, True
+            if first_children[node_id] != -1:
+                node_id = first_children[node_id]
+                continue
+            while True:
+                yield node_id, False
+                if node_id == start_node_id:
+                    return
+                if next_siblings[node_id] != -1:
+                    node_id = next_siblings[node_id]
+                    break
+                node_id = parents[node_id]
+
+    def traverse(
+        self,
+        start_node_id: NodeId,
+        on_node_entering: TraverseCallback,
+        on_node_leaving: TraverseCallback = lambda _: None,
+    ) -> None:
+        get_node = self.get_node
+        for node_id, is_entering in self.iterate_events(start_node_id):
+            if is_entering:
+                on_node_entering(get_node(node_id))
+            else:
+                on_node_leaving(get_node(node_id))
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def _add_node(
+        self, node_type: NodeType, reason_index: int, parent_id: NodeId, ast_node: Optional[ASTNode]
+    ) -> NodeId:
+        node_id = len(self._types)
+        self._types.append(_statement_type if node_type == NodeType.Statement else _block_type)
+        self._reasons.append(reason_index)
+        self._parents.append(parent_id)
+        self._first_children.append(-1)
+        self._next_siblings.append(-1)
+        self._last_children.append(-1)
+        self._ast_nodes.append(ast_node)
+        self._wrappers.append(None)
+        if parent_id != -1:
+            last_sibling_id = self._last_children[parent_id]
+            if last_sibling_id == -1:
+                self._first_children[parent_id] = node_id
+            else:
+                self._next_siblings[last_sibling_id] = node_id
+            self._last_children[parent_id] = node_id
+        return node_id
+
+
+_statement_type = 0
+_block_type = 1
@@ -1,43 +1,27 @@
-from typing import Dict, TYPE_CHECKING
-from networkx import DiGraph
+from typing import List, Tuple, Union
 
 from veniq.ast_framework import AST, ASTNode
-from .constants import NODE, BLOCK_REASON, ORIGIN_STATEMENT, NodeId
-from ._nodes_factory import NodesFactory
+from .block import Block
+from .constants import NodeId
 from ._block_extractors import BlockInfo, extract_blocks_from_statement
-
-if TYPE_CHECKING:
-    from .block import Block
-
-
-def build_block_statement_graph(method_ast: AST) -> "Block":
-    graph = DiGraph()
-    root_index = _build_graph_from_statement(method_ast.get_root(), graph)
-    return NodesFactory.create_block_node(graph, root_index)
-
-
-def _build_graph_from_statement(statement: ASTNode, graph: DiGraph) -> NodeId:
-    new_statement_index = len(graph)
-    new_statement_attributes = {NODE: statement}
-    graph.add_node(new_statement_index, **new_statement_attributes)
-
-    blocks = extract_blocks_from_statement(statement)
-    for block in blocks:
-        new_block_index = _build_graph_from_block(block, graph)
-        graph.add_edge(new_statement_index, new_block_index)
-
-    return new_statement_index
-
-
-def _build_graph_from_block(block_info: BlockInfo, graph: DiGraph) -> NodeId:
-    new_block_index = len(graph)
-    new_block_attributes: Dict = {BLOCK_REASON: block_info.reason}
-    if block_info.origin_statement is not None:
-        new_block_attributes[ORIGIN_STATEMENT] = block_info.origin_statement
-    graph.add_node(new_block_index, **new_block_attributes)
-
-    for statement in block_info.statements:
-        new_statement_index = _build_graph_from_statement(statement, graph)
-        graph.add_edge(new_block_index, new_statement_index)
-
-    return new_block_index
+from ._graph import BlockStatementGraph
+
+
+def build_block_statement_graph(method_ast: AST) -> Block:
+    """
+    Nodes are added in depth first order using a stack of statements and blocks waiting for their parents ids.
+    Traversal of the returned graph starts with the method declaration statement.
+    """
+    graph = BlockStatementGraph()
+    pending_nodes: List[Tuple[NodeId, Union[ASTNode, BlockInfo]]] = [(-1, method_ast.get_root())]
+    while pending_nodes:
+        parent_id, node = pending_nodes.pop()
+        if isinstance(node, BlockInfo):
+            node_id = graph.add_block(parent_id, node.reason, node.origin_statement)
+            children: List[Union[ASTNode, BlockInfo]] = list(node.statements)
+        else:
+            node_id = graph.add_statement(parent_id, node)
+            children = list(extract_blocks_from_statement(node))
+        pending_nodes.extend((node_id, child) for child in reversed(children))
+
+    return Block(graph, 0)
@@ -1,6 +1,6 @@
 from collections import defaultdict
 import sys
-from typing import Dict, Callable, Any, TYPE_CHECKING
+from typing import Dict, Callable, Any, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from veniq.ast_framework import ASTNode, ASTNodeType  # noqa: F401
@@ -9,6 +9,7 @@ if TYPE_CHECKING:
 class _ComputedFieldsRegistry:
     def __init__(self) -> None:
         self._registry: Dict["ASTNodeType", Dict[str, Callable[["ASTNode"], Any]]] = defaultdict(dict)
+        self._listeners: List[Callable[[], None]] = []
 
     def register(
         self,
@@ -26,6 +27,7 @@ class _ComputedFieldsRegistry:
                 )
 
             computed_fields[name] = compute_field
+        self._notify_listeners()
 
     def get_fields(
         self, node_type: "ASTNodeType"
@@ -34,6 +36,17 @@ class _ComputedFieldsRegistry:
 
     def clear(self) -> None:
         self._registry = defaultdict(dict)
+        self._notify_listeners()
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Listener is called after each change of registered fields.
+        """
+        self._listeners.append(listener)
+
+    def _notify_listeners(self) -> None:
+        for listener in self._listeners:
+            listener()
 
     @staticmethod
     def _is_in_interactive_shell() -> bool:
@@ -1,10 +1,11 @@
 from cached_property import cached_property  # type: ignore
 from deprecated import deprecated  # type: ignore
 
-from typing import Dict, Set, TYPE_CHECKING
+from typing import Dict, Set, Union, TYPE_CHECKING
 from networkx import DiGraph  # type: ignore
 
 from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.storage import ASTStorage
 from veniq.ast_framework.java_class_method import JavaClassMethod
 from veniq.ast_framework.java_class_field import JavaClassField
 
@@ -14,16 +15,15 @@ if TYPE_CHECKING:
 
 @deprecated("This functionality must be transmitted to ASTNode")
 class JavaClass(AST):
-    def __init__(self, tree: DiGraph, root: int, java_package: 'JavaPackage'):
-        self.tree = tree
-        self.root = root
+    def __init__(self, tree: Union[ASTStorage, DiGraph], root: int, java_package: 'JavaPackage'):
+        super().__init__(tree, root)
         self._java_package = java_package
 
     @cached_property
     def name(self) -> str:
         try:
             class_name = next(self.children_with_type(self.root, ASTNodeType.STRING))
-            return self.tree.nodes[class_name]['string']
+            return self.storage.get_attribute(class_name, 'string')
         except StopIteration:
             raise ValueError("Provided AST does not has 'STRING' node type right under the root")
 
@@ -35,7 +35,7 @@ class JavaClass(AST):
     def methods(self) -> Dict[str, Set[JavaClassMethod]]:
         methods: Dict[str, Set[JavaClassMethod]] = {}
         for method_ast in self.get_subtrees(ASTNodeType.METHOD_DECLARATION):
-            method = JavaClassMethod(method_ast.tree, method_ast.root, self)
+            method = JavaClassMethod(method_ast.storage, method_ast.root, self)
             if method.name in methods:
                 methods[method.name].add(method)
             else:
@@ -46,6 +46,6 @@ class JavaClass(AST):
     def fields(self) -> Dict[str, JavaClassField]:
         fields: Dict[str, JavaClassField] = {}
         for field_ast in self.get_subtrees(ASTNodeType.FIELD_DECLARATION):
-            field = JavaClassField(field_ast.tree, field_ast.root, self)
+            field = JavaClassField(field_ast.storage, field_ast.root, self)
             fields[field.name] = field
         return fields
@@ -175,16 +175,17 @@ def _filter_class_methods_and_fields(
         allowed_methods_names: Set[str]
 ) -> AST:
     class_declaration = class_ast.get_root()
-    allowed_nodes = {class_declaration.node_index}
+    allowed_subtrees_roots: List[int] = []
 
     for field_declaration in class_declaration.fields:
         if len(allowed_fields_names & set(field_declaration.names)) != 0:
-            field_ast = class_ast.get_subtree(field_declaration)
-            allowed_nodes.update(node.node_index for node in field_ast)
+            allowed_subtrees_roots.append(field_declaration.node_index)
 
     for method_declaration in class_declaration.methods:
         if method_declaration.name in allowed_methods_names:
-            method_ast = class_ast.get_subtree(method_declaration)
-            allowed_nodes.update(node.node_index for node in method_ast)
+            allowed_subtrees_roots.append(method_declaration.node_index)
 
-    return AST(class_ast.tree.subgraph(allowed_nodes), class_declaration.node_index)
+    return AST(
+        class_ast.storage.select_subtrees(class_declaration.node_index, allowed_subtrees_roots),
+        class_declaration.node_index,
+    )
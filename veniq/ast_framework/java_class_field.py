@@ -1,10 +1,11 @@
 from cached_property import cached_property  # type: ignore
 from deprecated import deprecated  # type: ignore
 
-from typing import TYPE_CHECKING
+from typing import Union, TYPE_CHECKING
 from networkx import DiGraph  # type: ignore
 
 from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.storage import ASTStorage
 
 if TYPE_CHECKING:
     from veniq.ast_framework.java_class import JavaClass
@@ -12,9 +13,8 @@ if TYPE_CHECKING:
 
 @deprecated("This functionality must be transmitted to ASTNode")
 class JavaClassField(AST):
-    def __init__(self, tree: DiGraph, root: int, java_class: 'JavaClass'):
-        self.tree = tree
-        self.root = root
+    def __init__(self, tree: Union[ASTStorage, DiGraph], root: int, java_class: 'JavaClass'):
+        super().__init__(tree, root)
         self._java_class = java_class
 
     @cached_property
@@ -22,7 +22,7 @@ class JavaClassField(AST):
         try:
             field_declarator = next(self.children_with_type(self.root, ASTNodeType.VARIABLE_DECLARATOR))
             field_name = next(self.children_with_type(field_declarator, ASTNodeType.STRING))
-            return self.tree.nodes[field_name]['string']
+            return self.storage.get_attribute(field_name, 'string')
         except StopIteration:
             raise ValueError("Provided AST does not has 'STRING' node type right under the root")
 
@@ -1,10 +1,11 @@
 from cached_property import cached_property  # type: ignore
-from typing import Dict, Set, TYPE_CHECKING
-from networkx import DiGraph, dfs_tree  # type: ignore
+from typing import Dict, Set, Union, TYPE_CHECKING
+from networkx import DiGraph  # type: ignore
 from deprecated import deprecated  # type: ignore
 
 from veniq.utils.cfg_builder import build_cfg
 from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.storage import ASTStorage
 from veniq.ast_framework.java_class_field import JavaClassField
 
 if TYPE_CHECKING:
@@ -13,16 +14,15 @@ if TYPE_CHECKING:
 
 @deprecated("This functionality must be transmitted to ASTNode")
 class JavaClassMethod(AST):
-    def __init__(self, tree: DiGraph, root: int, java_class: 'JavaClass'):
-        self.tree = tree
-        self.root = root
+    def __init__(self, tree: Union[ASTStorage, DiGraph], root: int, java_class: 'JavaClass'):
+        super().__init__(tree, root)
         self._java_class = java_class
 
     @cached_property
     def name(self) -> str:
         try:
             method_name = next(self.children_with_type(self.root, ASTNodeType.STRING))
-            return self.tree.nodes[method_name]['string']
+            return self.storage.get_attribute(method_name, 'string')
         except StopIteration:
             raise ValueError("Provided AST does not has 'STRING' node type right under the root")
 
@@ -36,7 +36,7 @@ class JavaClassMethod(AST):
         for parameter_node in self.children_with_type(self.root, ASTNodeType.FORMAL_PARAMETER):
             parameter_name_node = next(iter(self.children_with_type(parameter_node, ASTNodeType.STRING)))
             parameter_name = self.get_attr(parameter_name_node, 'string')
-            parameters[parameter_name] = AST(dfs_tree(self.tree, parameter_node), parameter_node)
+            parameters[parameter_name] = AST(self.storage.get_subtree(parameter_node), parameter_node)
 
         return parameters
 
@@ -12,14 +12,14 @@ from veniq.ast_framework.java_class import JavaClass
 class JavaPackage(AST):
     def __init__(self, filename: str):
         ast = AST.build_from_javalang(build_ast(filename))
-        super().__init__(ast.tree, ast.root)
+        super().__init__(ast.storage, ast.root)
 
     @cached_property
     def name(self) -> str:
         try:
             package_declaration = next(self.children_with_type(self.root, ASTNodeType.PACKAGE_DECLARATION))
             package_name = next(self.children_with_type(package_declaration, ASTNodeType.STRING))
-            return self.tree.nodes[package_name]['string']
+            return self.storage.get_attribute(package_name, 'string')
         except StopIteration:
             pass
 
@@ -29,6 +29,6 @@ class JavaPackage(AST):
     def java_classes(self) -> Dict[str, JavaClass]:
         classes: Dict[str, JavaClass] = {}
         for class_ast in self.get_subtrees(ASTNodeType.CLASS_DECLARATION):
-            java_class = JavaClass(class_ast.tree, class_ast.root, self)
+            java_class = JavaClass(class_ast.storage, class_ast.root, self)
             classes[java_class.name] = java_class
         return classes
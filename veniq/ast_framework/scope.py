@@ -1,15 +1,59 @@
-from typing import List, Iterator, Optional
-
-from networkx import DiGraph  # type: ignore
+from typing import Dict, List, Iterator, Optional
 
 from .ast import AST
 from .ast_node import ASTNode
 from .ast_node_type import ASTNodeType
-from .scope_extractors import extract_scopes
+from .scope_extractors import ScopeAttributes, extract_scopes
+
+
+class _ScopesTree:
+    """
+    Scopes of a method numbered in order of creation.
+    Nested scopes of a scope are extracted from its statements on the first request only.
+    Scope of each statement is found by a map, which is filled for the whole method on the first lookup.
+    """
+
+    def __init__(self, method_ast: AST):
+        self.method_ast = method_ast
+        self.scopes_attributes: List[ScopeAttributes] = []
+        self.parents: List[Optional[int]] = []
+        self._nested_scopes: List[Optional[List[int]]] = []
+        self._statements_scopes: Optional[Dict[ASTNode, int]] = None
+
+    def add_scopes(self, node: ASTNode, parent_scope_id: Optional[int]) -> List[int]:
+        new_scopes_ids: List[int] = []
+        for scope_attributes in extract_scopes(node, self.method_ast):
+            new_scopes_ids.append(len(self.scopes_attributes))
+            self.scopes_attributes.append(scope_attributes)
+            self.parents.append(parent_scope_id)
+            self._nested_scopes.append(None)
+        return new_scopes_ids
+
+    def get_nested_scopes(self, scope_id: int) -> List[int]:
+        nested_scopes = self._nested_scopes[scope_id]
+        if nested_scopes is None:
+            nested_scopes = [
+                nested_scope_id
+                for statement in self.scopes_attributes[scope_id].statements
+                for nested_scope_id in self.add_scopes(statement, scope_id)
+            ]
+            self._nested_scopes[scope_id] = nested_scopes
+        return nested_scopes
+
+    def get_statement_scope(self, statement: ASTNode) -> Optional[int]:
+        if self._statements_scopes is None:
+            self._statements_scopes = {}
+            scopes_stack = [0]
+            while scopes_stack:
+                scope_id = scopes_stack.pop()
+                for scope_statement in self.scopes_attributes[scope_id].statements:
+                    self._statements_scopes[scope_statement] = scope_id
+                scopes_stack.extend(self.get_nested_scopes(scope_id))
+        return self._statements_scopes.get(statement)
 
 
 class Scope:
-    def __init__(self, scope_tree: DiGraph, scope_id: int):
+    def __init__(self, scope_tree: _ScopesTree, scope_id: int):
         self._scope_tree = scope_tree
         self._scope_id = scope_id
 
@@ -20,15 +64,15 @@ class Scope:
             method_declaration.node_type == ASTNodeType.METHOD_DECLARATION
         ), "Building scopes tree supported only for method declaration."
 
-        scope_tree = DiGraph()
-        root_scopes_id = Scope._create_scopes_from_node(method_declaration, method_ast, scope_tree)
+        scope_tree = _ScopesTree(method_ast)
+        root_scopes_id = scope_tree.add_scopes(method_declaration, None)
 
         assert len(root_scopes_id) == 1, "Method declaration must produce a single scope."
         return Scope(scope_tree, root_scopes_id[0])
 
     @property
     def parent_scope(self) -> Optional["Scope"]:
-        parent_scope_id: Optional[int] = next(self._scope_tree.predecessors(self._scope_id), None)
+        parent_scope_id = self._scope_tree.parents[self._scope_id]
 
         if parent_scope_id is None:
             return None
@@ -37,39 +81,37 @@ class Scope:
 
     @property
     def nested_scopes(self) -> Iterator["Scope"]:
-        for nested_scope_id in self._scope_tree.successors(self._scope_id):
+        for nested_scope_id in self._scope_tree.get_nested_scopes(self._scope_id):
             yield Scope(self._scope_tree, nested_scope_id)
 
     @property
     def statements(self) -> List[ASTNode]:
-        return self._scope_tree.nodes[self._scope_id]["statements"]
+        return self._scope_tree.scopes_attributes[self._scope_id].statements
 
     @property
     def parent_node(self) -> ASTNode:
-        return self._scope_tree.nodes[self._scope_id]["parent_node"]
+        return self._scope_tree.scopes_attributes[self._scope_id].parent_node
 
     @property
     def parameters(self) -> List[ASTNode]:
-        return self._scope_tree.nodes[self._scope_id]["parameters"]
+        return self._scope_tree.scopes_attributes[self._scope_id].parameters
+
+    def get_statement_scope(self, statement: ASTNode) -> Optional["Scope"]:
+        """
+        Returns the innermost scope of the method, which has the statement among its own statements,
+        or None, if there is no such scope.
+        """
+        scope_id = self._scope_tree.get_statement_scope(statement)
+        if scope_id is None:
+            return None
 
-    @staticmethod
-    def _create_scopes_from_node(node: ASTNode, method_ast: AST, scope_tree: DiGraph) -> List[int]:
-        scopes = extract_scopes(node, method_ast)
+        return Scope(self._scope_tree, scope_id)
 
-        new_scopes_ids: List[int] = []
-        for scope in scopes:
-            new_scope_id = len(scope_tree)
-            new_scopes_ids.append(new_scope_id)
-            scope_tree.add_node(
-                new_scope_id,
-                statements=scope.statements,
-                parent_node=scope.parent_node,
-                parameters=scope.parameters,
-            )
-
-            for statement in scope.statements:
-                nested_scopes_ids = Scope._create_scopes_from_node(statement, method_ast, scope_tree)
-                for nested_scope_id in nested_scopes_ids:
-                    scope_tree.add_edge(new_scope_id, nested_scope_id)
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Scope):
+            return NotImplemented
 
-        return new_scopes_ids
+        return self._scope_tree is other._scope_tree and self._scope_id == other._scope_id
+
+    def __hash__(self) -> int:
+        return hash((id(self._scope_tree), self._scope_id))
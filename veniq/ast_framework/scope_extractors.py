@@ -1,4 +1,4 @@
-from typing import Dict, List, Callable, NamedTuple
+from typing import Dict, List, Callable, NamedTuple, Optional
 from itertools import chain
 
 from .ast import AST
@@ -22,8 +22,7 @@ def extract_scopes(node: ASTNode, ast: AST) -> List[ScopeAttributes]:
 def _extract_scopes_from_assert(assert_node: ASTNode, method_ast: AST) -> List[ScopeAttributes]:
     assert assert_node.node_type == ASTNodeType.ASSERT_STATEMENT
 
-    expression_ast = method_ast.get_subtree(assert_node.condition)
-    return _find_scopes_in_expressions(expression_ast)
+    return _find_scopes_in_expression(assert_node.condition, method_ast)
 
 
 def _extract_scopes_from_block(block_node: ASTNode, _) -> List[ScopeAttributes]:
@@ -41,15 +40,13 @@ def _extract_scopes_from_expression_statement(
         ASTNodeType.THROW_STATEMENT,
     }
 
-    expression_ast = method_ast.get_subtree(expression_statement.expression)
-    return _find_scopes_in_expressions(expression_ast)
+    return _find_scopes_in_expression(expression_statement.expression, method_ast)
 
 
 def _extract_scopes_from_for_cycle(for_cycle: ASTNode, method_ast: AST) -> List[ScopeAttributes]:
     assert for_cycle.node_type == ASTNodeType.FOR_STATEMENT
 
-    control_ast = method_ast.get_subtree(for_cycle.control)
-    scopes = _find_scopes_in_expressions(control_ast)
+    scopes = _find_scopes_in_expression(for_cycle.control, method_ast)
     scopes.append(
         ScopeAttributes(statements=_get_block_statements_list(for_cycle.body), parent_node=for_cycle)
     )
@@ -60,16 +57,14 @@ def _extract_scopes_from_for_cycle(for_cycle: ASTNode, method_ast: AST) -> List[
 def _extract_scopes_from_if_statement(if_node: ASTNode, method_ast: AST) -> List[ScopeAttributes]:
     assert if_node.node_type == ASTNodeType.IF_STATEMENT
 
-    condition_ast = method_ast.get_subtree(if_node.condition)
-    scopes = _find_scopes_in_expressions(condition_ast)
+    scopes = _find_scopes_in_expression(if_node.condition, method_ast)
     scopes.append(
         ScopeAttributes(statements=_get_block_statements_list(if_node.then_statement), parent_node=if_node)
     )
 
     while if_node.else_statement is not None and if_node.else_statement.node_type == ASTNodeType.IF_STATEMENT:
         if_node = if_node.else_statement
-        condition_ast = method_ast.get_subtree(if_node.condition)
-        scopes.extend(_find_scopes_in_expressions(condition_ast))
+        scopes.extend(_find_scopes_in_expression(if_node.condition, method_ast))
         scopes.append(
             ScopeAttributes(
                 statements=_get_block_statements_list(if_node.then_statement), parent_node=if_node
@@ -93,7 +88,7 @@ def _extract_scopes_from_variable_declaration(
 
     return list(
         chain.from_iterable(
-            _find_scopes_in_expressions(method_ast.get_subtree(declarator.initializer))
+            _find_scopes_in_expression(declarator.initializer, method_ast)
             for declarator in variable_declaration.declarators
         )
     )
@@ -110,8 +105,7 @@ def _extract_scopes_from_switch_statement(
 ) -> List[ScopeAttributes]:
     assert switch_statement.node_type == ASTNodeType.SWITCH_STATEMENT
 
-    expression_ast = method_ast.get_subtree(switch_statement.expression)
-    scopes = _find_scopes_in_expressions(expression_ast)
+    scopes = _find_scopes_in_expression(switch_statement.expression, method_ast)
 
     # all case statements belong to one scope
     # thats why cases are not surrounded with curly braces
@@ -130,8 +124,7 @@ def _extract_scopes_from_switch_statement(
 def _extract_scopes_from_synchronized(synchronized_block: ASTNode, method_ast: AST) -> List[ScopeAttributes]:
     assert synchronized_block.node_type == ASTNodeType.SYNCHRONIZED_STATEMENT
 
-    lock_ast = method_ast.get_subtree(synchronized_block.lock)
-    scopes = _find_scopes_in_expressions(lock_ast)
+    scopes = _find_scopes_in_expression(synchronized_block.lock, method_ast)
     scopes.append(ScopeAttributes(statements=synchronized_block.block, parent_node=synchronized_block))
 
     return scopes
@@ -143,8 +136,7 @@ def _extract_scopes_from_try_statement(try_node: ASTNode, method_ast: AST) -> Li
     scopes: List[ScopeAttributes] = []
 
     for resource in try_node.resources:
-        initializer_ast = method_ast.get_subtree(resource.value)
-        scopes.extend(_find_scopes_in_expressions(initializer_ast))
+        scopes.extend(_find_scopes_in_expression(resource.value, method_ast))
 
     scopes.append(ScopeAttributes(statements=try_node.block, parent_node=try_node))
 
@@ -160,8 +152,7 @@ def _extract_scopes_from_try_statement(try_node: ASTNode, method_ast: AST) -> Li
 def _extract_scopes_from_while_cycle(while_cycle: ASTNode, method_ast: AST) -> List[ScopeAttributes]:
     assert while_cycle.node_type in {ASTNodeType.DO_STATEMENT, ASTNodeType.WHILE_STATEMENT}
 
-    condition_ast = method_ast.get_subtree(while_cycle.condition)
-    scopes = _find_scopes_in_expressions(condition_ast)
+    scopes = _find_scopes_in_expression(while_cycle.condition, method_ast)
     scopes.append(
         ScopeAttributes(statements=_get_block_statements_list(while_cycle.body), parent_node=while_cycle)
     )
@@ -169,16 +160,23 @@ def _extract_scopes_from_while_cycle(while_cycle: ASTNode, method_ast: AST) -> L
     return scopes
 
 
-def _find_scopes_in_expressions(expression_ast: AST) -> List[ScopeAttributes]:
+def _find_scopes_in_expression(expression: Optional[ASTNode], method_ast: AST) -> List[ScopeAttributes]:
     """
     Finds top level lambda expressions and returns their bodies.
     Each found nested scope represented by a list of its statements. List of such list is returned.
+    Expression subtree is walked only if storage reports a lambda expression in it.
     TODO: Add support for others scopes can be found in expressions like anonymous classes.
     """
 
+    if expression is None or not method_ast.storage.subtree_contains(
+        expression.node_index, _scope_expressions_types
+    ):
+        return []
+
     nested_scopes_statements: List[ScopeAttributes] = []
-    for nested_scope in expression_ast.get_subtrees(ASTNodeType.LAMBDA_EXPRESSION):
-        lambda_declaration = nested_scope.get_root()
+    for nested_scope in method_ast.get_subtree(expression).get_subtrees(ASTNodeType.LAMBDA_EXPRESSION):
+        # nodes of a subtree view are not equal to the same nodes of the method, so they are taken from the method
+        lambda_declaration = ASTNode(method_ast.storage, nested_scope.root)
         nested_scopes_statements.append(
             ScopeAttributes(
                 statements=lambda_declaration.body,
@@ -199,6 +197,8 @@ def _get_block_statements_list(node: ASTNode) -> List[ASTNode]:
     return [node]
 
 
+_scope_expressions_types = {ASTNodeType.LAMBDA_EXPRESSION}
+
 _scope_extractors_by_node_type: Dict[ASTNodeType, Callable[[ASTNode, AST], List[ScopeAttributes]]] = {
     ASTNodeType.ASSERT_STATEMENT: _extract_scopes_from_assert,
     ASTNodeType.BLOCK_STATEMENT: _extract_scopes_from_block,
@@ -0,0 +1,3 @@
+from .ast_storage import ASTStorage, NodeSpan  # noqa: F401
+from .networkx_storage import NetworkxStorage  # noqa: F401
+from .compact_storage import CompactStorage  # noqa: F401
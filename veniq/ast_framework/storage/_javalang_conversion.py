@@ -0,0 +1,193 @@
+from enum import Enum
+from sys import intern
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from javalang.tree import Node
+
+from veniq.ast_framework.ast_node_type import ASTNodeType
+from veniq.ast_framework._auxiliary_data import (
+    javalang_to_ast_node_type,
+    attributes_by_node_type,
+    ASTNodeReference,
+)
+
+
+JavalangTreeItem = Union[Node, Set[Any], str]
+_javalang_tree_item_types = (Node, set, str)
+
+_EXIT_MARKER = object()
+
+
+class TraversalEvent(Enum):
+    ENTER = 0
+    EXIT = 1
+
+
+def iterate_javalang_tree(javalang_ast_root: Node) -> Iterator[Tuple[TraversalEvent, JavalangTreeItem]]:
+    """
+    Walks javalang AST in preorder with an explicit stack, so depth of the tree is not limited by recursion.
+    Javalang nodes, collections (sets of strings) and strings become AST nodes,
+    nested lists of children are flattened and other values are skipped.
+    Each item is entered before any item of its subtree and exited after all of them,
+    except strings, which are leaves and are never exited.
+    """
+
+    # items to enter and exit markers, the item to exit on a marker is the last one of open items
+    stack: List[Any] = [javalang_ast_root]
+    open_items: List[JavalangTreeItem] = []
+    while stack:
+        item = stack.pop()
+        if item is _EXIT_MARKER:
+            yield TraversalEvent.EXIT, open_items.pop()
+            continue
+
+        yield TraversalEvent.ENTER, item
+        if isinstance(item, Node):
+            children = _flatten_javalang_children(item.children)
+        elif isinstance(item, set):
+            children = _get_collection_items(item)
+        else:
+            continue
+        open_items.append(item)
+        stack.append(_EXIT_MARKER)
+        stack.extend(reversed(children))
+
+
+def _flatten_javalang_children(children: List[Any]) -> List[JavalangTreeItem]:
+    flat_children: List[JavalangTreeItem] = []
+    # lists of children may be nested, an iterator is kept for each unfinished list
+    iterators_stack = [iter(children)]
+    while iterators_stack:
+        for child in iterators_stack[-1]:
+            if isinstance(child, _javalang_tree_item_types):
+                flat_children.append(child)
+            elif isinstance(child, list):
+                iterators_stack.append(iter(child))
+                break
+        else:
+            iterators_stack.pop()
+    return flat_children
+
+
+def _get_collection_items(collection_node: Set[Any]) -> List[JavalangTreeItem]:
+    # we expect only strings in collection
+    # they become children of collection node
+    items: List[JavalangTreeItem] = []
+    for item in collection_node:
+        if isinstance(item, str):
+            items.append(item)
+        elif item is not None:
+            raise ValueError('Unexpected javalang AST node type {} inside \
+                             "COLLECTION" node'.format(type(item)))
+    return items
+
+
+# attributes holding identifiers, literals and operators, which are interned
+_interned_attributes_names = {"name", "member", "qualifier", "value", "operator", "path", "type", "pattern_type",
+                              "label", "goto"}
+# keyed by javalang classes, as they are hashed faster than ASTNodeType
+_interned_attributes_by_javalang_type: Dict[type, List[str]] = {
+    javalang_type: sorted(_interned_attributes_names.intersection(attributes_by_node_type[node_type]))
+    for javalang_type, node_type in javalang_to_ast_node_type.items()
+}
+
+
+def get_javalang_node_type(javalang_node: Node) -> ASTNodeType:
+    return javalang_to_ast_node_type[type(javalang_node)]
+
+
+def get_javalang_node_line(javalang_node: Node) -> Optional[int]:
+    return javalang_node.position.line if javalang_node.position is not None else None
+
+
+def extract_javalang_attributes(javalang_node: Node, node_type: ASTNodeType) -> Dict[str, Any]:
+    attr_names = attributes_by_node_type[node_type]
+    attributes = {attr_name: getattr(javalang_node, attr_name) for attr_name in attr_names}
+    _post_process_javalang_attributes(node_type, attributes)
+    for attr_name in _interned_attributes_by_javalang_type[type(javalang_node)]:
+        value = attributes[attr_name]
+        if type(value) is str:
+            attributes[attr_name] = intern(value)
+    return attributes
+
+
+def intern_javalang_string(value: str) -> str:
+    """
+    Javalang creates a new string for each token, so equal identifiers, literals and modifiers
+    of all ASTs are interned to be kept once per process and to be compared by identity.
+    Documentation comments are unique, so they are kept as is.
+    """
+    return value if value.startswith("/**") else intern(value)
+
+
+def intern_attribute_values(attribute_name: str, values: List[Any]) -> None:
+    """
+    Interns in place strings among values of an attribute, which are interned on building ASTs,
+    to restore identity of strings lost by pickling.
+    """
+    if attribute_name == "string":
+        values[:] = [intern_javalang_string(value) if type(value) is str else value for value in values]
+    elif attribute_name in _interned_attributes_names:
+        values[:] = [intern(value) if type(value) is str else value for value in values]
+
+
+def _post_process_javalang_attributes(node_type: ASTNodeType, attributes: Dict[str, Any]) -> None:
+    """
+    Replace some attributes with more appropriate values for convenient work
+    """
+
+    if node_type == ASTNodeType.METHOD_DECLARATION and attributes["body"] is None:
+        attributes["body"] = []
+
+    if node_type == ASTNodeType.LAMBDA_EXPRESSION and isinstance(attributes["body"], Node):
+        attributes["body"] = [attributes["body"]]
+
+    if node_type in {ASTNodeType.METHOD_INVOCATION, ASTNodeType.MEMBER_REFERENCE} and \
+            attributes["qualifier"] == "":
+        attributes["qualifier"] = None
+
+
+def replace_javalang_nodes_in_value(value: Any, javalang_node_to_index_map: Dict[Node, int]) -> Any:
+    '''
+    Javalang nodes found in attribute value are replaced
+    with references to according storage nodes.
+    Supported attributes types:
+     - just javalang Node
+     - list of javalang Nodes and other such lists (with any depth)
+    Other values are returned as is.
+    '''
+    if isinstance(value, Node):
+        return create_reference_to_node(value, javalang_node_to_index_map)
+    elif isinstance(value, list):
+        return replace_javalang_nodes_in_list(value, javalang_node_to_index_map)
+    return value
+
+
+def replace_javalang_nodes_in_list(javalang_nodes_list: List[Any],
+                                   javalang_node_to_index_map: Dict[Node, int]) -> List[Any]:
+    '''
+    javalang_nodes_list: list of javalang Nodes or other such lists (with any depth)
+    All javalang nodes are replaces with according references
+    NOTICE: Any is used, because mypy does not support recurrent type definitions
+    '''
+    node_references_list: List[Any] = []
+    for item in javalang_nodes_list:
+        if isinstance(item, Node):
+            node_references_list.append(
+                create_reference_to_node(item, javalang_node_to_index_map))
+        elif isinstance(item, list):
+            node_references_list.append(
+                replace_javalang_nodes_in_list(item, javalang_node_to_index_map))
+        elif isinstance(item, (int, str)) or item is None:
+            node_references_list.append(item)
+        else:
+            raise RuntimeError('Cannot parse "Javalang" attribute:\n'
+                               f'{item}\n'
+                               'Expected: Node, list of Nodes, integer or string')
+
+    return node_references_list
+
+
+def create_reference_to_node(javalang_node: Node,
+                             javalang_node_to_index_map: Dict[Node, int]) -> ASTNodeReference:
+    return ASTNodeReference(javalang_node_to_index_map[javalang_node])
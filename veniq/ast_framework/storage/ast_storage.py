@@ -0,0 +1,132 @@
+from abc import ABC, abstractmethod
+from typing import Any, Collection, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from javalang.tree import Node
+from networkx import DiGraph  # type: ignore
+
+from veniq.ast_framework.ast_node_type import ASTNodeType
+
+
+class NodeSpan(NamedTuple):
+    """
+    Position of the first character of a node in source code and position right after its last character.
+    Lines and columns are 1-based, as in javalang.
+    """
+
+    start_line: int
+    start_column: int
+    end_line: int
+    end_column: int
+
+
+class ASTStorage(ABC):
+    """
+    Storage of AST nodes and their attributes.
+    Nodes are identified by positive integer indexes.
+    Attributes, which refer other nodes, hold ASTNodeReference objects.
+    """
+
+    @staticmethod
+    @abstractmethod
+    def build_from_javalang(
+        javalang_ast_root: Node, javalang_spans: Optional[Mapping[Node, NodeSpan]] = None
+    ) -> Tuple["ASTStorage", int]:
+        """
+        Copies javalang AST to a new storage.
+        Spans of javalang nodes, if provided, are extended to cover spans of their children
+        and kept by storages supporting them.
+        Returns the storage and index of the root node.
+        """
+
+    @abstractmethod
+    def get_nodes(self) -> Iterator[int]:
+        """
+        Yields indexes of all nodes in the storage in preorder.
+        """
+
+    @abstractmethod
+    def get_type(self, node_index: int) -> ASTNodeType:
+        pass
+
+    @abstractmethod
+    def get_line(self, node_index: int) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def get_attribute(self, node_index: int, attribute_name: str) -> Any:
+        """
+        Raises KeyError, if node does not have such attribute.
+        """
+
+    @abstractmethod
+    def get_children(self, node_index: int) -> Iterator[int]:
+        pass
+
+    @abstractmethod
+    def get_parent(self, node_index: int) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def get_subtree(self, node_index: int) -> "ASTStorage":
+        """
+        Storage with the node and all nodes reachable from it.
+        """
+
+    @abstractmethod
+    def select_subtrees(self, root_index: int, subtrees_roots: Iterable[int]) -> "ASTStorage":
+        """
+        Storage with the root node and whole subtrees of given nodes.
+        Subtrees roots are expected to be descendants of the root, which do not contain each other.
+        """
+
+    @abstractmethod
+    def create_fake_node_index(self) -> int:
+        """
+        Returns negative index, which was not returned before by this storage or any its subtree.
+        """
+
+    @abstractmethod
+    def to_networkx(self) -> DiGraph:
+        """
+        Representation of the storage as networkx DiGraph.
+        Each node holds a dictionary of its attributes.
+        """
+
+    def get_span(self, node_index: int) -> Optional[NodeSpan]:
+        """
+        Returns None, if span of the node is unknown or the storage does not keep spans.
+        """
+        return None
+
+    def get_nodes_with_types(self, node_types: Collection[ASTNodeType]) -> Iterator[int]:
+        """
+        Yields indexes of nodes having any of given types in the same order as get_nodes.
+        """
+        return (node_index for node_index in self.get_nodes() if self.get_type(node_index) in node_types)
+
+    def get_subtree_nodes(self, node_index: int) -> Iterator[int]:
+        """
+        Yields indexes of node and all nodes reachable from it in preorder.
+        """
+        nodes_stack: List[int] = [node_index]
+        while nodes_stack:
+            current_node = nodes_stack.pop()
+            yield current_node
+            nodes_stack.extend(reversed(list(self.get_children(current_node))))
+
+    def get_subtree_first_line(self, node_index: int) -> Optional[int]:
+        """
+        Returns the smallest line of node and all nodes reachable from it,
+        or None, if none of them has a line.
+        """
+        lines = [line for line in map(self.get_line, self.get_subtree_nodes(node_index)) if line is not None]
+        return min(lines, default=None)
+
+    def subtree_contains(self, node_index: int, node_types: Collection[ASTNodeType]) -> bool:
+        """
+        Checks whether node or any node reachable from it has any of given types.
+        """
+        return any(self.get_type(subtree_node) in node_types for subtree_node in self.get_subtree_nodes(node_index))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.get_nodes())
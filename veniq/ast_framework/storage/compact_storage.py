@@ -0,0 +1,580 @@
+import pickle
+from array import array
+from struct import Struct
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from heapq import merge
+from itertools import chain
+from typing import IO, Any, Collection, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from javalang.tree import Node
+from networkx import DiGraph  # type: ignore
+
+from veniq.ast_framework.ast_node_type import ASTNodeType
+from veniq.ast_framework._auxiliary_data import attributes_by_node_type
+from .ast_storage import ASTStorage, NodeSpan
+from ._javalang_conversion import (
+    get_javalang_node_type,
+    get_javalang_node_line,
+    extract_javalang_attributes,
+    intern_javalang_string,
+    intern_attribute_values,
+    replace_javalang_nodes_in_value,
+    iterate_javalang_tree,
+    JavalangTreeItem,
+    TraversalEvent,
+)
+
+# ASTNodeType are kept in arrays as indexes in this tuple
+_node_types: Tuple[ASTNodeType, ...] = tuple(ASTNodeType)
+_node_types_codes: Dict[ASTNodeType, int] = {node_type: code for code, node_type in enumerate(_node_types)}
+
+AttributesColumns = Dict[str, List[Any]]
+
+# attributes values, which may hold javalang nodes to be replaced with references
+_javalang_reference_types = (Node, list)
+
+# each node takes this number of items in spans array
+_SPAN_SIZE = len(NodeSpan._fields)
+_ABSENT_SPAN = (0,) * _SPAN_SIZE
+
+# nodes qty (including placeholder), whether spans are kept and size of pickled attributes columns
+_snapshot_header = Struct("=iiq")
+# format and items qty per node of node types, parents, subtree ends, lines, rows and spans arrays
+_snapshot_arrays_layout: List[Tuple[Any, int]] = [("B", 1), ("i", 1), ("i", 1), ("i", 1), ("i", 1), ("i", _SPAN_SIZE)]
+# each array of a tree in a snapshot starts at an offset aligned to this number of bytes
+_SNAPSHOT_ALIGNMENT = 8
+
+
+class _CompactTree:
+    """
+    Nodes are numbered in preorder starting from 1.
+    Their types, parents, lines and ends of subtrees are kept in flat typed arrays,
+    and node index is used as an index in all of them.
+    Item with index 0 is a placeholder. Parent 0 and line 0 means absence of a value.
+    Subtree of a node occupies indexes from the node index up to its subtree end (exclusive),
+    so children of a node are its next node and subtree ends of previous children.
+
+    Javalang attributes are kept in columns, separately for each node type.
+    Node attributes are in the row with index from 'rows' array.
+    Columns are created only for node types present in the tree.
+
+    If the tree is built with spans, they are kept in a single flat array with _SPAN_SIZE items per node,
+    zero start line means absence of a span.
+
+    A tree opened from a snapshot keeps memoryviews over the snapshot buffer instead of arrays,
+    and its attributes columns are unpickled on the first access to an attribute.
+
+    Sorted arrays of nodes indexes for each node type are built on the first typed query.
+    The smallest line in a subtree of each node is found for all nodes on the first request of such line.
+    """
+
+    __slots__ = (
+        "node_types",
+        "parents",
+        "subtree_ends",
+        "lines",
+        "rows",
+        "attributes_columns",
+        "pickled_attributes_columns",
+        "fake_nodes_qty",
+        "spans",
+        "networkx_tree",
+        "nodes_by_type",
+        "subtree_first_lines",
+    )
+
+    def __init__(self) -> None:
+        self.node_types = array("B", [0])
+        self.parents = array("i", [0])
+        self.subtree_ends = array("i", [0])
+        self.lines = array("i", [0])
+        self.rows = array("i", [0])
+        self.attributes_columns: Dict[ASTNodeType, AttributesColumns] = {}
+        self.pickled_attributes_columns: Optional[memoryview] = None
+        self.fake_nodes_qty = 0
+        self.spans: Optional[array] = None
+        self.networkx_tree: Optional[DiGraph] = None
+        self.nodes_by_type: Optional[Dict[ASTNodeType, memoryview]] = None
+        self.subtree_first_lines: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.node_types)
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        # cached representations are not saved, views of a snapshot are saved as arrays
+        return (
+            _to_array(self.node_types),
+            _to_array(self.parents),
+            _to_array(self.subtree_ends),
+            _to_array(self.lines),
+            _to_array(self.rows),
+            self.get_attributes_columns(),
+            self.fake_nodes_qty,
+            None if self.spans is None else _to_array(self.spans),
+        )
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        (
+            self.node_types,
+            self.parents,
+            self.subtree_ends,
+            self.lines,
+            self.rows,
+            self.attributes_columns,
+            self.fake_nodes_qty,
+            self.spans,
+        ) = state
+        _intern_attributes_columns(self.attributes_columns)
+        self.pickled_attributes_columns = None
+        self.networkx_tree = None
+        self.nodes_by_type = None
+        self.subtree_first_lines = None
+
+    def write_snapshot(self, output: IO[bytes]) -> None:
+        """
+        Writes the header and the arrays of the tree as they are kept in memory followed by pickled attributes columns,
+        so the tree can be opened from a buffer without copying by read_snapshot.
+        """
+        pickled_attributes_columns = pickle.dumps(self.get_attributes_columns(), protocol=pickle.HIGHEST_PROTOCOL)
+        output.write(_snapshot_header.pack(len(self), self.spans is not None, len(pickled_attributes_columns)))
+        arrays = [self.node_types, self.parents, self.subtree_ends, self.lines, self.rows]
+        if self.spans is not None:
+            arrays.append(self.spans)
+        for values in arrays:
+            data = values.tobytes()
+            output.write(data)
+            output.write(bytes(-len(data) % _SNAPSHOT_ALIGNMENT))
+        output.write(pickled_attributes_columns)
+
+    @staticmethod
+    def read_snapshot(buffer: memoryview) -> "_CompactTree":
+        nodes_qty, has_spans, pickled_attributes_columns_size = _snapshot_header.unpack_from(buffer)
+        offset = _snapshot_header.size
+        views: List[memoryview] = []
+        for array_format, items_per_node in _snapshot_arrays_layout[:6 if has_spans else 5]:
+            size = nodes_qty * items_per_node * array(array_format).itemsize
+            views.append(buffer[offset:offset + size].cast(array_format))
+            offset += size + -size % _SNAPSHOT_ALIGNMENT
+
+        tree = _CompactTree.__new__(_CompactTree)
+        tree.__setstate__((*views[:5], {}, 0, views[5] if has_spans else None))
+        tree.pickled_attributes_columns = buffer[offset:offset + pickled_attributes_columns_size]
+        return tree
+
+    def get_attributes_columns(self) -> Dict[ASTNodeType, AttributesColumns]:
+        if self.pickled_attributes_columns is not None:
+            self.attributes_columns = pickle.loads(self.pickled_attributes_columns)
+            _intern_attributes_columns(self.attributes_columns)
+            self.pickled_attributes_columns = None
+        return self.attributes_columns
+
+    def get_nodes_by_type(self) -> Dict[ASTNodeType, memoryview]:
+        if self.nodes_by_type is None:
+            nodes_by_type_code: Dict[int, array] = defaultdict(lambda: array("i"))
+            for node_index in range(1, len(self.node_types)):
+                nodes_by_type_code[self.node_types[node_index]].append(node_index)
+
+            self.nodes_by_type = {
+                _node_types[node_type_code]: memoryview(nodes)
+                for node_type_code, nodes in nodes_by_type_code.items()
+            }
+        return self.nodes_by_type
+
+    def get_subtree_first_lines(self) -> array:
+        if self.subtree_first_lines is None:
+            # children follow their parents in preorder, so walking backwards visits a subtree before its root
+            subtree_first_lines = array("i", self.lines)
+            for node_index in range(len(subtree_first_lines) - 1, 1, -1):
+                line = subtree_first_lines[node_index]
+                parent_index = self.parents[node_index]
+                if line and (not subtree_first_lines[parent_index] or line < subtree_first_lines[parent_index]):
+                    subtree_first_lines[parent_index] = line
+            self.subtree_first_lines = subtree_first_lines
+        return self.subtree_first_lines
+
+
+def _to_array(values: Any) -> array:
+    return values if isinstance(values, array) else array(values.format, values)
+
+
+def _intern_attributes_columns(attributes_columns: Dict[ASTNodeType, AttributesColumns]) -> None:
+    for columns in attributes_columns.values():
+        for attribute_name, column in columns.items():
+            intern_attribute_values(attribute_name, column)
+
+
+class CompactStorage(ASTStorage):
+    """
+    Keeps AST in flat arrays with per node type attributes columns.
+    Storage may represent only a subtree, i.e. a range of node indexes,
+    while sharing arrays with the whole tree.
+    """
+
+    def __init__(self, tree: _CompactTree, start: int, end: int):
+        self._tree = tree
+        self._start = start
+        self._end = end
+
+    @staticmethod
+    def build_from_javalang(
+        javalang_ast_root: Node, javalang_spans: Optional[Mapping[Node, NodeSpan]] = None
+    ) -> Tuple["CompactStorage", int]:
+        tree = _CompactTreeBuilder(javalang_spans).build(javalang_ast_root)
+        return CompactStorage(tree, 1, len(tree)), 1
+
+    def get_nodes(self) -> Iterator[int]:
+        return iter(range(self._start, self._end))
+
+    def to_bytes(self) -> bytes:
+        """
+        Binary representation of the storage, which includes the whole tree even for a subtree view.
+        """
+        return pickle.dumps((self._tree, self._start, self._end), protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "CompactStorage":
+        tree, start, end = pickle.loads(data)
+        return CompactStorage(tree, start, end)
+
+    def write_snapshot(self, output: IO[bytes]) -> None:
+        """
+        Writes the whole tree even for a subtree view in a layout, which is read without copying by from_snapshot.
+        """
+        self._tree.write_snapshot(output)
+
+    @staticmethod
+    def from_snapshot(buffer: memoryview) -> "CompactStorage":
+        """
+        Storage of a tree written by write_snapshot, which reads nodes straight from the buffer,
+        e.g. a memory-mapped file shared by several processes.
+        """
+        tree = _CompactTree.read_snapshot(buffer)
+        return CompactStorage(tree, 1, len(tree))
+
+    def get_nodes_with_types(self, node_types: Collection[ASTNodeType]) -> Iterator[int]:
+        nodes_by_type = self._tree.get_nodes_by_type()
+        nodes_with_types = [
+            self._select_nodes_in_ranges(nodes_by_type[node_type])
+            for node_type in set(node_types)
+            if node_type in nodes_by_type
+        ]
+        if len(nodes_with_types) == 1:
+            return nodes_with_types[0]
+        return merge(*nodes_with_types)
+
+    def subtree_contains(self, node_index: int, node_types: Collection[ASTNodeType]) -> bool:
+        # nodes of a type are sorted, so the first one not preceding the node tells if the subtree has any
+        subtree_end = self._tree.subtree_ends[node_index]
+        nodes_by_type = self._tree.get_nodes_by_type()
+        for node_type in node_types:
+            nodes = nodes_by_type.get(node_type)
+            if nodes is not None:
+                position = bisect_left(nodes, node_index)
+                if position < len(nodes) and nodes[position] < subtree_end:
+                    return True
+        return False
+
+    def get_type(self, node_index: int) -> ASTNodeType:
+        return _node_types[self._tree.node_types[node_index]]
+
+    def get_line(self, node_index: int) -> Optional[int]:
+        return self._tree.lines[node_index] or None
+
+    def get_subtree_first_line(self, node_index: int) -> Optional[int]:
+        return self._tree.get_subtree_first_lines()[node_index] or None
+
+    def get_span(self, node_index: int) -> Optional[NodeSpan]:
+        spans = self._tree.spans
+        if spans is None or node_index < 0:
+            return None
+        offset = node_index * _SPAN_SIZE
+        if not spans[offset]:
+            return None
+        return NodeSpan(*spans[offset:offset + _SPAN_SIZE])
+
+    def get_attribute(self, node_index: int, attribute_name: str) -> Any:
+        if attribute_name == "node_type":
+            return self.get_type(node_index)
+        elif attribute_name == "line":
+            return self.get_line(node_index)
+
+        tree = self._tree
+        if tree.pickled_attributes_columns is not None:
+            tree.get_attributes_columns()
+        attributes_columns = tree.attributes_columns[self.get_type(node_index)]
+        return attributes_columns[attribute_name][self._tree.rows[node_index]]
+
+    def get_children(self, node_index: int) -> Iterator[int]:
+        subtree_ends = self._tree.subtree_ends
+        child_index = node_index + 1
+        subtree_end = subtree_ends[node_index]
+        while child_index < subtree_end:
+            yield child_index
+            child_index = subtree_ends[child_index]
+
+    def get_parent(self, node_index: int) -> Optional[int]:
+        if node_index == self._start:
+            return None
+        return self._tree.parents[node_index] or None
+
+    def get_subtree(self, node_index: int) -> "CompactStorage":
+        return CompactStorage(self._tree, node_index, self._tree.subtree_ends[node_index])
+
+    def get_subtree_nodes(self, node_index: int) -> Iterator[int]:
+        return iter(range(node_index, self._tree.subtree_ends[node_index]))
+
+    def select_subtrees(self, root_index: int, subtrees_roots: Iterable[int]) -> "CompactStorage":
+        subtrees_ranges = [(root_index, root_index + 1)]
+        subtrees_ranges.extend(
+            (subtree_root, self._tree.subtree_ends[subtree_root]) for subtree_root in sorted(subtrees_roots)
+        )
+        return _CompactStorageSelection(self._tree, subtrees_ranges)
+
+    def create_fake_node_index(self) -> int:
+        self._tree.fake_nodes_qty += 1
+        return -self._tree.fake_nodes_qty
+
+    def to_networkx(self) -> DiGraph:
+        if self._tree.networkx_tree is None:
+            self._tree.networkx_tree = self._create_networkx_tree()
+
+        if self._start == 1 and self._end == len(self._tree):
+            return self._tree.networkx_tree
+        return self._tree.networkx_tree.subgraph(range(self._start, self._end))
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            type(other) is CompactStorage
+            and self._tree is other._tree
+            and self._start == other._start
+            and self._end == other._end
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self._tree), self._start, self._end))
+
+    def _get_ranges(self) -> List[Tuple[int, int]]:
+        return [(self._start, self._end)]
+
+    def _select_nodes_in_ranges(self, sorted_nodes: memoryview) -> Iterator[int]:
+        """
+        Yields nodes from sorted sequence, which belong to the storage, without scanning the whole sequence.
+        """
+        for start, end in self._get_ranges():
+            yield from sorted_nodes[bisect_left(sorted_nodes, start):bisect_left(sorted_nodes, end)]
+
+    def _create_networkx_tree(self) -> DiGraph:
+        whole_tree = CompactStorage(self._tree, 1, len(self._tree))
+        networkx_tree = DiGraph()
+        for node_index in whole_tree.get_nodes():
+            node_type = whole_tree.get_type(node_index)
+            attributes = {
+                attribute_name: column[self._tree.rows[node_index]]
+                for attribute_name, column in self._tree.get_attributes_columns().get(node_type, {}).items()
+            }
+            networkx_tree.add_node(node_index, node_type=node_type, line=whole_tree.get_line(node_index), **attributes)
+
+            parent_index = whole_tree.get_parent(node_index)
+            if parent_index is not None:
+                networkx_tree.add_edge(parent_index, node_index)
+        return networkx_tree
+
+
+class _CompactStorageSelection(CompactStorage):
+    """
+    Several subtrees of the same tree, i.e. sorted not overlapping ranges of node indexes.
+    Nodes outside of the ranges are not visible as children or parents.
+    """
+
+    def __init__(self, tree: _CompactTree, ranges: List[Tuple[int, int]]):
+        super().__init__(tree, ranges[0][0], ranges[-1][1])
+        self._ranges = ranges
+        self._ranges_starts = [start for start, _ in ranges]
+
+    def get_nodes(self) -> Iterator[int]:
+        return chain.from_iterable(range(start, end) for start, end in self._ranges)
+
+    def get_children(self, node_index: int) -> Iterator[int]:
+        return (child for child in super().get_children(node_index) if self._contains(child))
+
+    def get_parent(self, node_index: int) -> Optional[int]:
+        parent_index = self._tree.parents[node_index]
+        return parent_index if self._contains(parent_index) else None
+
+    def get_subtree(self, node_index: int) -> CompactStorage:
+        subtree_end = self._tree.subtree_ends[node_index]
+        if subtree_end <= self._get_range(node_index)[1]:
+            return CompactStorage(self._tree, node_index, subtree_end)
+        return _CompactStorageSelection(
+            self._tree,
+            [(start, end) for start, end in self._ranges if node_index <= start < subtree_end],
+        )
+
+    def get_subtree_nodes(self, node_index: int) -> Iterator[int]:
+        return self.get_subtree(node_index).get_nodes()
+
+    def subtree_contains(self, node_index: int, node_types: Collection[ASTNodeType]) -> bool:
+        return any(True for _ in self.get_subtree(node_index).get_nodes_with_types(node_types))
+
+    def get_subtree_first_line(self, node_index: int) -> Optional[int]:
+        if self._tree.subtree_ends[node_index] <= self._get_range(node_index)[1]:
+            return super().get_subtree_first_line(node_index)
+        # some nodes of the subtree are not selected
+        return ASTStorage.get_subtree_first_line(self, node_index)
+
+    def to_networkx(self) -> DiGraph:
+        return CompactStorage(self._tree, 1, len(self._tree)).to_networkx().subgraph(self.get_nodes())
+
+    def __len__(self) -> int:
+        return sum(end - start for start, end in self._ranges)
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, _CompactStorageSelection)
+            and self._tree is other._tree
+            and self._ranges == other._ranges
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self._tree), tuple(self._ranges)))
+
+    def _get_ranges(self) -> List[Tuple[int, int]]:
+        return self._ranges
+
+    def _contains(self, node_index: int) -> bool:
+        start, end = self._get_range(node_index)
+        return start <= node_index < end
+
+    def _get_range(self, node_index: int) -> Tuple[int, int]:
+        range_index = bisect_right(self._ranges_starts, node_index) - 1
+        return self._ranges[range_index] if range_index >= 0 else (0, 0)
+
+
+class _CompactTreeBuilder:
+    """
+    Copies javalang AST to a _CompactTree in a single preorder pass with an explicit stack.
+    Nodes get the same indexes as in NetworkxStorage.
+    Javalang nodes in attributes refer to descendants of a node,
+    so they are replaced with references as soon as the node subtree is closed.
+    Span of a closed subtree is known as well, so it is merged into the span of the parent at that moment.
+    """
+
+    def __init__(self, javalang_spans: Optional[Mapping[Node, NodeSpan]] = None) -> None:
+        self._tree = _CompactTree()
+        self._javalang_spans = javalang_spans
+        if javalang_spans is not None:
+            self._tree.spans = array("i", _ABSENT_SPAN)
+        self._javalang_node_to_index_map: Dict[Node, int] = {}
+        self._rows_qty_by_node_type_code: List[int] = [0] * len(_node_types)
+        # cells of attributes columns holding javalang nodes, which are not replaced with references yet
+        self._unresolved_cells: List[Tuple[List[Any], int]] = []
+
+    def build(self, javalang_ast_root: Node) -> _CompactTree:
+        # nodes, whose subtrees are not closed yet, with positions of their first unresolved cells,
+        # the last one is a parent of the next node
+        open_nodes: List[Tuple[int, int]] = [(0, 0)]
+        for event, javalang_item in iterate_javalang_tree(javalang_ast_root):
+            if event is TraversalEvent.EXIT:
+                node_index, first_unresolved_cell = open_nodes.pop()
+                self._close_subtree(node_index)
+                if self._javalang_spans is not None:
+                    self._close_span(node_index, javalang_item)
+                if first_unresolved_cell < len(self._unresolved_cells):
+                    self._replace_javalang_nodes_in_attributes(first_unresolved_cell)
+                continue
+
+            first_unresolved_cell = len(self._unresolved_cells)
+            parent_index = open_nodes[-1][0]
+            if isinstance(javalang_item, Node):
+                node_index = self._add_javalang_standard_node(javalang_item, parent_index)
+            elif isinstance(javalang_item, set):
+                node_index = self._add_node(ASTNodeType.COLLECTION, parent_index, None, {})
+            else:
+                # strings are leaves, so their subtrees are closed already
+                string = intern_javalang_string(javalang_item)
+                self._add_node(ASTNodeType.STRING, parent_index, None, {"string": string})
+                continue
+            open_nodes.append((node_index, first_unresolved_cell))
+        return self._tree
+
+    def _add_javalang_standard_node(self, javalang_node: Node, parent_index: int) -> int:
+        node_type = get_javalang_node_type(javalang_node)
+        node_index = self._add_node(
+            node_type,
+            parent_index,
+            get_javalang_node_line(javalang_node),
+            extract_javalang_attributes(javalang_node, node_type),
+        )
+        self._javalang_node_to_index_map[javalang_node] = node_index
+        return node_index
+
+    def _add_node(
+        self, node_type: ASTNodeType, parent_index: int, line: Optional[int], attributes: Dict[str, Any]
+    ) -> int:
+        tree = self._tree
+        node_index = len(tree.node_types)
+        node_type_code = _node_types_codes[node_type]
+        row = self._rows_qty_by_node_type_code[node_type_code]
+        self._rows_qty_by_node_type_code[node_type_code] = row + 1
+        tree.node_types.append(node_type_code)
+        tree.parents.append(parent_index)
+        tree.subtree_ends.append(node_index + 1)
+        tree.lines.append(line or 0)
+        tree.rows.append(row)
+        if tree.spans is not None:
+            tree.spans.extend(_ABSENT_SPAN)
+
+        if attributes:
+            attributes_columns = tree.attributes_columns.get(node_type)
+            if attributes_columns is None:
+                attributes_columns = tree.attributes_columns[node_type] = {
+                    attribute_name: [] for attribute_name in sorted(attributes_by_node_type[node_type])
+                }
+            for attribute_name, column in attributes_columns.items():
+                value = attributes[attribute_name]
+                column.append(value)
+                if isinstance(value, _javalang_reference_types):
+                    self._unresolved_cells.append((column, row))
+
+        return node_index
+
+    def _close_subtree(self, node_index: int) -> None:
+        self._tree.subtree_ends[node_index] = len(self._tree.node_types)
+
+    def _close_span(self, node_index: int, javalang_item: JavalangTreeItem) -> None:
+        assert self._javalang_spans is not None and self._tree.spans is not None
+        if isinstance(javalang_item, Node):
+            javalang_span = self._javalang_spans.get(javalang_item)
+            if javalang_span is not None:
+                self._extend_span(node_index, javalang_span)
+
+        offset = node_index * _SPAN_SIZE
+        parent_index = self._tree.parents[node_index]
+        if parent_index and self._tree.spans[offset]:
+            self._extend_span(parent_index, self._tree.spans[offset:offset + _SPAN_SIZE])
+
+    def _extend_span(self, node_index: int, span: Iterable[int]) -> None:
+        spans = self._tree.spans
+        assert spans is not None
+        offset = node_index * _SPAN_SIZE
+        start_line, start_column, end_line, end_column = span
+        if not spans[offset] or (start_line, start_column) < (spans[offset], spans[offset + 1]):
+            spans[offset] = start_line
+            spans[offset + 1] = start_column
+        if (end_line, end_column) > (spans[offset + 2], spans[offset + 3]):
+            spans[offset + 2] = end_line
+            spans[offset + 3] = end_column
+
+    def _replace_javalang_nodes_in_attributes(self, first_cell: int) -> None:
+        '''
+        Javalang nodes found in unresolved cells starting from the given one are replaced
+        with references to according nodes.
+        Cells of descendants are already resolved at that moment, so only cells of a single node are left.
+        '''
+        for column, row in self._unresolved_cells[first_cell:]:
+            column[row] = replace_javalang_nodes_in_value(column[row], self._javalang_node_to_index_map)
+        del self._unresolved_cells[first_cell:]
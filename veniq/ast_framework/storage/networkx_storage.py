@@ -0,0 +1,132 @@
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Union
+
+from javalang.tree import Node
+from networkx import DiGraph, dfs_preorder_nodes  # type: ignore
+
+from veniq.ast_framework.ast_node_type import ASTNodeType
+from .ast_storage import ASTStorage, NodeSpan
+from ._javalang_conversion import (
+    get_javalang_node_type,
+    get_javalang_node_line,
+    extract_javalang_attributes,
+    intern_javalang_string,
+    replace_javalang_nodes_in_value,
+    iterate_javalang_tree,
+    TraversalEvent,
+)
+
+
+class NetworkxStorage(ASTStorage):
+    """
+    Keeps AST in networkx DiGraph.
+    Each node holds a dictionary of its attributes.
+    Spans of nodes are not kept.
+    """
+
+    def __init__(self, graph: DiGraph):
+        self.graph = graph
+
+    @staticmethod
+    def build_from_javalang(
+        javalang_ast_root: Node, javalang_spans: Optional[Mapping[Node, NodeSpan]] = None
+    ) -> Tuple["NetworkxStorage", int]:
+        tree = DiGraph()
+        javalang_node_to_index_map: Dict[Node, int] = {}
+        # indexes of nodes, whose subtrees are not finished yet, the last one is a parent of the next node
+        open_nodes: List[int] = []
+        for event, javalang_item in iterate_javalang_tree(javalang_ast_root):
+            if event is TraversalEvent.EXIT:
+                node_index = open_nodes.pop()
+                if isinstance(javalang_item, Node):
+                    # all nodes of the subtree are added, so references to them can be resolved
+                    NetworkxStorage._replace_javalang_nodes_in_attributes(
+                        tree.nodes[node_index], javalang_node_to_index_map
+                    )
+                continue
+
+            node_index = NetworkxStorage._add_javalang_node(tree, javalang_item)
+            if isinstance(javalang_item, Node):
+                javalang_node_to_index_map[javalang_item] = node_index
+            if open_nodes:
+                tree.add_edge(open_nodes[-1], node_index)
+            if not isinstance(javalang_item, str):
+                open_nodes.append(node_index)
+        return NetworkxStorage(tree), 1
+
+    def get_nodes(self) -> Iterator[int]:
+        return iter(self.graph.nodes)
+
+    def get_type(self, node_index: int) -> ASTNodeType:
+        return self.graph.nodes[node_index]["node_type"]
+
+    def get_line(self, node_index: int) -> Optional[int]:
+        return self.graph.nodes[node_index]["line"]
+
+    def get_attribute(self, node_index: int, attribute_name: str) -> Any:
+        return self.graph.nodes[node_index][attribute_name]
+
+    def get_children(self, node_index: int) -> Iterator[int]:
+        return iter(self.graph.succ[node_index])
+
+    def get_parent(self, node_index: int) -> Optional[int]:
+        # there is maximum one parent in a tree
+        return next(self.graph.predecessors(node_index), None)
+
+    def get_subtree(self, node_index: int) -> "NetworkxStorage":
+        subtree_nodes_indexes = dfs_preorder_nodes(self.graph, node_index)
+        return NetworkxStorage(self.graph.subgraph(subtree_nodes_indexes))
+
+    def get_subtree_nodes(self, node_index: int) -> Iterator[int]:
+        return dfs_preorder_nodes(self.graph, node_index)
+
+    def select_subtrees(self, root_index: int, subtrees_roots: Iterable[int]) -> "NetworkxStorage":
+        selected_nodes = {root_index}
+        for subtree_root in subtrees_roots:
+            selected_nodes.update(dfs_preorder_nodes(self.graph, subtree_root))
+        return NetworkxStorage(self.graph.subgraph(selected_nodes))
+
+    def create_fake_node_index(self) -> int:
+        # graph attributes are shared by the graph and all its subgraphs
+        fake_nodes_qty = self.graph.graph.get(self._FAKE_NODES_QTY, 0) + 1
+        self.graph.graph[self._FAKE_NODES_QTY] = fake_nodes_qty
+        return -fake_nodes_qty
+
+    def to_networkx(self) -> DiGraph:
+        return self.graph
+
+    def __len__(self) -> int:
+        return len(self.graph)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, NetworkxStorage) and self.graph is other.graph
+
+    def __hash__(self) -> int:
+        return hash(id(self.graph))
+
+    @staticmethod
+    def _add_javalang_node(tree: DiGraph, javalang_item: Union[Node, Set[Any], str]) -> int:
+        node_index = len(tree) + 1
+        if isinstance(javalang_item, Node):
+            node_type = get_javalang_node_type(javalang_item)
+            attributes = extract_javalang_attributes(javalang_item, node_type)
+            tree.add_node(node_index, node_type=node_type, line=get_javalang_node_line(javalang_item), **attributes)
+        elif isinstance(javalang_item, set):
+            tree.add_node(node_index, node_type=ASTNodeType.COLLECTION, line=None)
+        else:
+            string = intern_javalang_string(javalang_item)
+            tree.add_node(node_index, node_type=ASTNodeType.STRING, string=string, line=None)
+        return node_index
+
+    @staticmethod
+    def _replace_javalang_nodes_in_attributes(attributes: Dict[str, Any],
+                                              javalang_node_to_index_map: Dict[Node, int]) -> None:
+        '''
+        All javalang nodes found in networkx node attributes are replaced
+        with references to according networkx nodes.
+        '''
+        for attribute_name, attribute_value in attributes.items():
+            if isinstance(attribute_value, (Node, list)):
+                attributes[attribute_name] = replace_javalang_nodes_in_value(attribute_value,
+                                                                             javalang_node_to_index_map)
+
+    _FAKE_NODES_QTY = "fake_nodes_qty"
@@ -1,40 +1,110 @@
-from dataclasses import dataclass, field
 from itertools import accumulate
-from typing import Tuple, Set
+from typing import AbstractSet, Any, Dict, FrozenSet, Iterable, List, Tuple
+from weakref import WeakValueDictionary
 
 from veniq.ast_framework import ASTNode
 
 Statement = ASTNode
 
 
-@dataclass
 class StatementSemantic:
-    used_objects: Set[str] = field(default_factory=set)
-    used_methods: Set[str] = field(default_factory=set)
+    """
+    Objects and methods used by a statement.
 
-    def is_similar(self, other: "StatementSemantic") -> bool:
-        return (
-            len(self.used_objects_unwrapped & other.used_objects_unwrapped) != 0
-            or len(self.used_methods & other.used_methods) != 0
-        )
+    Semantics are immutable and interned, so equal semantics are represented by the same object.
+    Derived sets of names used for similarity checks are computed once on creation.
+    """
+
+    __slots__ = ("used_objects", "used_methods", "used_objects_unwrapped", "used_based_objects", "__weakref__")
 
-    @property
-    def used_objects_unwrapped(self) -> Set[str]:
-        """
-        Turns each name from "a.b.c" to "a", "a.b", "a.b.c"
-        """
-        return {
+    used_objects: FrozenSet[str]
+    used_methods: FrozenSet[str]
+    used_objects_unwrapped: FrozenSet[str]
+    used_based_objects: FrozenSet[str]
+
+    def __new__(cls, used_objects: Iterable[str] = (), used_methods: Iterable[str] = ()) -> "StatementSemantic":
+        key = (frozenset(used_objects), frozenset(used_methods))
+        semantic = _interned_semantics.get(key)
+        if semantic is None:
+            semantic = super().__new__(cls)
+            semantic._init(*key)
+            _interned_semantics[key] = semantic
+        return semantic
+
+    def _init(self, used_objects: FrozenSet[str], used_methods: FrozenSet[str]) -> None:
+        # each name "a.b.c" is turned to "a", "a.b", "a.b.c"
+        used_objects_unwrapped = frozenset(
             ".".join(name_parts)
-            for object_name in self.used_objects
+            for object_name in used_objects
             for name_parts in accumulate([name_part] for name_part in object_name.split("."))
-        }
-
-    @property
-    def used_based_objects(self) -> Set[str]:
-        """
-        Turns each name from "a.b.c" to "a"
-        """
-        return {object_name.split(".")[0] for object_name in self.used_objects}
+        )
+        # each name "a.b.c" is turned to "a"
+        used_based_objects = frozenset(object_name.split(".")[0] for object_name in used_objects)
+
+        object.__setattr__(self, "used_objects", used_objects)
+        object.__setattr__(self, "used_methods", used_methods)
+        object.__setattr__(self, "used_objects_unwrapped", used_objects_unwrapped)
+        object.__setattr__(self, "used_based_objects", used_based_objects)
+
+    def is_similar(self, other: "StatementSemantic") -> bool:
+        return not (
+            self.used_objects_unwrapped.isdisjoint(other.used_objects_unwrapped)
+            and self.used_methods.isdisjoint(other.used_methods)
+        )
+
+    def union(
+        self, used_objects: AbstractSet[str] = frozenset(), used_methods: AbstractSet[str] = frozenset()
+    ) -> "StatementSemantic":
+        return StatementSemantic(self.used_objects | used_objects, self.used_methods | used_methods)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, StatementSemantic):
+            return NotImplemented
+        return self.used_objects == other.used_objects and self.used_methods == other.used_methods
+
+    def __hash__(self) -> int:
+        return hash((self.used_objects, self.used_methods))
+
+    def __repr__(self) -> str:
+        return f"StatementSemantic(used_objects={set(self.used_objects)}, used_methods={set(self.used_methods)})"
+
+    def __reduce__(self):
+        return StatementSemantic, (self.used_objects, self.used_methods)
+
+
+def get_symbols_ids(semantics: Iterable[StatementSemantic]) -> List[FrozenSet[int]]:
+    """
+    Ids of symbols (unwrapped object names and method names) used by each semantic, e.g. of statements of a method.
+    Semantics are similar if they share a symbol id.
+    Ids are assigned anew on each call, so no table of names outlives analysis of a method.
+    """
+    objects_ids: Dict[str, int] = {}
+    methods_ids: Dict[str, int] = {}
+    semantics_symbols_ids: Dict[StatementSemantic, FrozenSet[int]] = {}
+
+    def get_symbol_id(symbols_ids: Dict[str, int], name: str) -> int:
+        symbol_id = symbols_ids.get(name)
+        if symbol_id is None:
+            symbol_id = symbols_ids[name] = len(objects_ids) + len(methods_ids)
+        return symbol_id
+
+    symbols_ids: List[FrozenSet[int]] = []
+    for semantic in semantics:
+        semantic_symbols_ids = semantics_symbols_ids.get(semantic)
+        if semantic_symbols_ids is None:
+            semantic_symbols_ids = semantics_symbols_ids[semantic] = frozenset(
+                [get_symbol_id(objects_ids, name) for name in semantic.used_objects_unwrapped]
+                + [get_symbol_id(methods_ids, name) for name in semantic.used_methods]
+            )
+        symbols_ids.append(semantic_symbols_ids)
+    return symbols_ids
+
+
+_interned_semantics: "WeakValueDictionary[Tuple[FrozenSet[str], FrozenSet[str]], StatementSemantic]" = \
+    WeakValueDictionary()
 
 
 ExtractionOpportunity = Tuple[Statement, ...]
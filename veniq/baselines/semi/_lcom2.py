@@ -1,20 +1,113 @@
-from typing import Dict
-from itertools import combinations
+from typing import Dict, Iterable, List, Sequence, Tuple
 
-from ._common_types import Statement, StatementSemantic
+from ._common_types import Statement, StatementSemantic, get_symbols_ids
+
+StatementsMask = int
+
+
+class StatementsSimilarity:
+    """
+    Similarity of all pairs of statements of a method encoded as bitsets.
+
+    Each statement gets a bit by its position in statements_semantic.
+    Statements using a symbol (an id of unwrapped object name or of method name assigned per method)
+    are collected to a bitset per symbol,
+    so bitset of statements similar to a statement is a union of bitsets of its symbols.
+    LCOM2 of any subset of statements is then computed by intersecting bitsets with the subset mask.
+    Quantities of statements similar to each one are kept as well, so LCOM2 of the rest statements of the method
+    and bounds of LCOM2 are derived in time linear to the subset size.
+    """
+
+    def __init__(self, statements_semantic: Dict[Statement, StatementSemantic]):
+        self._statements_indexes: Dict[Statement, int] = {}
+        statements_with_symbol: Dict[int, StatementsMask] = {}
+        statements_symbols = get_symbols_ids(statements_semantic.values())
+        for index, (statement, symbols) in enumerate(zip(statements_semantic, statements_symbols)):
+            statement_bit = 1 << index
+            self._statements_indexes[statement] = index
+            for symbol in symbols:
+                statements_with_symbol[symbol] = statements_with_symbol.get(symbol, 0) | statement_bit
+
+        # similar statements of each statement excluding the statement itself
+        self._similar_statements: List[StatementsMask] = []
+        for index, symbols in enumerate(statements_symbols):
+            similar_statements = 0
+            for symbol in symbols:
+                similar_statements |= statements_with_symbol[symbol]
+            self._similar_statements.append(similar_statements & ~(1 << index))
+        self._similar_statements_qty = [_bits_qty(similar) for similar in self._similar_statements]
+
+        self._statements_qty = len(statements_symbols)
+        # each similar pair is counted twice, once for each of its statements
+        self._similar_pairs_qty = sum(self._similar_statements_qty) // 2
+        self.all_statements: StatementsMask = (1 << self._statements_qty) - 1
+
+    def get_mask(self, statements: Iterable[Statement]) -> StatementsMask:
+        mask = 0
+        for statement in statements:
+            mask |= 1 << self._statements_indexes[statement]
+        return mask
+
+    def lcom2(self, statements_mask: StatementsMask) -> int:
+        return _lcom2(_bits_qty(statements_mask), self._count_similar_pairs(statements_mask))
+
+    def split_lcom2(self, statements: Sequence[Statement]) -> Tuple[int, int]:
+        """
+        Returns LCOM2 of distinct statements and LCOM2 of the rest statements of the method.
+        Similar pairs of the rest statements are all similar pairs except ones with a given statement,
+        which are counted from similar pairs among given statements and quantities of statements similar to them.
+        """
+        statements_mask = self.get_mask(statements)
+        statements_qty = _bits_qty(statements_mask)
+        similar_pairs_qty = self._count_similar_pairs(statements_mask)
+        rest_similar_pairs_qty = self._similar_pairs_qty - self._sum_similar_statements_qty(statements) + \
+            similar_pairs_qty
+        return (
+            _lcom2(statements_qty, similar_pairs_qty),
+            _lcom2(self._statements_qty - statements_qty, rest_similar_pairs_qty),
+        )
+
+    def split_lcom2_lower_bounds(self, statements: Sequence[Statement]) -> Tuple[int, int]:
+        """
+        Returns lower bounds of both values of split_lcom2 for distinct statements without looking at bitsets.
+        Similar pairs among statements are bounded by quantity of all their pairs and
+        by half of the sum of quantities of statements similar to them.
+        """
+        statements_qty = len(statements)
+        similar_statements_qty = self._sum_similar_statements_qty(statements)
+        max_similar_pairs_qty = min(statements_qty * (statements_qty - 1) // 2, similar_statements_qty // 2)
+        return (
+            _lcom2(statements_qty, max_similar_pairs_qty),
+            _lcom2(
+                self._statements_qty - statements_qty,
+                self._similar_pairs_qty - similar_statements_qty + max_similar_pairs_qty,
+            ),
+        )
+
+    def _sum_similar_statements_qty(self, statements: Iterable[Statement]) -> int:
+        return sum(self._similar_statements_qty[self._statements_indexes[statement]] for statement in statements)
+
+    def _count_similar_pairs(self, statements_mask: StatementsMask) -> int:
+        # each similar pair is counted twice, once for each of its statements
+        doubled_similar_pairs_qty = 0
+        rest_statements = statements_mask
+        while rest_statements:
+            lowest_bit = rest_statements & -rest_statements
+            rest_statements ^= lowest_bit
+            statement_index = lowest_bit.bit_length() - 1
+            doubled_similar_pairs_qty += _bits_qty(self._similar_statements[statement_index] & statements_mask)
+        return doubled_similar_pairs_qty // 2
 
 
 def LCOM2(statements_semantic: Dict[Statement, StatementSemantic]) -> int:
-    similar_pairs_qty = 0
-    not_similar_pairs_qty = 0
-    for semantic1, semantic2 in combinations(statements_semantic.values(), 2):
-        if semantic1.is_similar(semantic2):
-            similar_pairs_qty += 1
-        else:
-            not_similar_pairs_qty += 1
-
-    lcom2 = not_similar_pairs_qty - similar_pairs_qty
-    if lcom2 < 0:
-        lcom2 = 0
-
-    return lcom2
+    statements_similarity = StatementsSimilarity(statements_semantic)
+    return statements_similarity.lcom2(statements_similarity.all_statements)
+
+
+def _lcom2(statements_qty: int, similar_pairs_qty: int) -> int:
+    not_similar_pairs_qty = statements_qty * (statements_qty - 1) // 2 - similar_pairs_qty
+    return max(not_similar_pairs_qty - similar_pairs_qty, 0)
+
+
+def _bits_qty(mask: StatementsMask) -> int:
+    return bin(mask).count("1")
@@ -0,0 +1,139 @@
+from typing import Dict, List, Mapping, Set, Union
+
+from ._common_types import StatementSemantic, ExtractionOpportunity
+from veniq.ast_framework.block_statement_graph import Block, Statement
+from veniq.ast_framework import ASTNode, ASTNodeType
+
+
+class StatementsTable:
+    """
+    Statements of a method in order of block statement graph traversal
+    with everything syntactic and semantic filters need to know about them.
+
+    The graph is traversed once, then each extraction opportunity is checked against the table
+    in time linear to its size, so all opportunities of a method are filtered without more traversals.
+    Opportunities statements are expected to be in traversal order, as they are created.
+    """
+
+    def __init__(
+        self,
+        method_block_statement_graph: Block,
+        statements_semantic: Mapping[ASTNode, StatementSemantic] = {},
+    ):
+        self._positions: Dict[ASTNode, int] = {}
+        self._statements: List[ASTNode] = []
+        # position following the last nested statement of each statement
+        self._subtree_ends: List[int] = []
+        # each block is identified by the order of entering it, the root one is -1
+        self._parent_blocks: List[int] = []
+        # position of the nearest enclosing cycle statement or -1
+        self._parent_cycles: List[int] = []
+
+        self._blocks_stack: List[int] = [-1]
+        self._blocks_qty = 0
+        self._cycles_stack: List[int] = [-1]
+        method_block_statement_graph.traverse(self._on_node_entering, self._on_node_leaving)
+
+        # position of the last statement using each object, as base of a name "a.b.c" or as "a"
+        self._objects_last_uses: Dict[str, int] = {}
+        for position, statement in enumerate(self._statements):
+            if statement in statements_semantic:
+                for object_name in statements_semantic[statement].used_based_objects:
+                    self._objects_last_uses[object_name] = position
+
+    def is_syntactically_extractable(self, statements: ExtractionOpportunity) -> bool:
+        """
+        Statements are extractable, if they are a continuous range of statements of the same block
+        together with all their nested statements.
+        """
+        first_position = self._positions.get(statements[0])
+        if first_position is None:
+            # opportunities starting with a condition of "else if" are not checked, as it is not a graph statement
+            return True
+        for offset, statement in enumerate(statements):
+            if self._positions.get(statement) != first_position + offset:
+                return False
+
+        end_position = first_position + len(statements)
+        parent_block = self._parent_blocks[first_position]
+        position = first_position
+        while position < end_position:
+            if self._parent_blocks[position] != parent_block:
+                return False
+            position = self._subtree_ends[position]
+        return position == end_position
+
+    def is_semantically_extractable(self, statements: ExtractionOpportunity) -> bool:
+        """
+        Statements are extractable, if 'break' and 'continue' among them have their cycles extracted too
+        and at most one variable declared in them is used after them.
+        """
+        positions: Set[int] = set()
+        declared_variables: Set[str] = set()
+        for statement in statements:
+            position = self._positions.get(statement)
+            if position is None:
+                continue
+            positions.add(position)
+            if statement.node_type == ASTNodeType.LOCAL_VARIABLE_DECLARATION:
+                declared_variables.update(statement.names)
+            elif statement.node_type in _control_flow_breaking_statements:
+                if not self._is_inside_cycle_among(position, positions):
+                    return False
+
+        # variables usages are checked after the last statement only, if it is a graph statement
+        last_position = self._positions.get(statements[-1])
+        if last_position is None:
+            return True
+        variables_needed_to_return = [
+            variable
+            for variable in declared_variables
+            if self._objects_last_uses.get(variable, -1) > last_position
+        ]
+        return len(variables_needed_to_return) <= 1
+
+    def _is_inside_cycle_among(self, position: int, positions: Set[int]) -> bool:
+        cycle_position = self._parent_cycles[position]
+        while cycle_position != -1:
+            if cycle_position in positions:
+                return True
+            cycle_position = self._parent_cycles[cycle_position]
+        return False
+
+    def _on_node_entering(self, node: Union[Block, Statement]) -> None:
+        if isinstance(node, Block):
+            self._blocks_stack.append(self._blocks_qty)
+            self._blocks_qty += 1
+        elif isinstance(node, Statement):
+            position = len(self._statements)
+            self._positions[node.node] = position
+            self._statements.append(node.node)
+            self._subtree_ends.append(-1)
+            self._parent_blocks.append(self._blocks_stack[-1])
+            self._parent_cycles.append(self._cycles_stack[-1])
+            if node.node.node_type in _cycles_statements:
+                self._cycles_stack.append(position)
+        else:
+            raise ValueError(f"Unknown node {node}")
+
+    def _on_node_leaving(self, node: Union[Block, Statement]) -> None:
+        if isinstance(node, Block):
+            self._blocks_stack.pop()
+        elif isinstance(node, Statement):
+            position = self._positions[node.node]
+            self._subtree_ends[position] = len(self._statements)
+            if self._cycles_stack[-1] == position:
+                self._cycles_stack.pop()
+        else:
+            raise ValueError(f"Unknown node {node}")
+
+
+# following statements are closely tight with control flow and cannot be extracted easily
+_control_flow_breaking_statements = {ASTNodeType.BREAK_STATEMENT, ASTNodeType.CONTINUE_STATEMENT}
+
+# only cycles may have _control_flow_breaking_statements in subtrees
+_cycles_statements = {
+    ASTNodeType.DO_STATEMENT,
+    ASTNodeType.FOR_STATEMENT,
+    ASTNodeType.WHILE_STATEMENT,
+}
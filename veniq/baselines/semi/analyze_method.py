@@ -0,0 +1,169 @@
+"""
+Ranks extraction opportunities of a single method within a budget and describes groups as records.
+Used by both the project driver of SEMI and the "semi" analyzer of a corpus.
+"""
+
+from time import perf_counter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.block_statement_graph import Block, Statement as BlockStatement
+from ._common_types import ExtractionOpportunity, Statement, StatementSemantic
+from .create_extraction_opportunities import iterate_extraction_opportunities
+from .method_analysis_context import MethodAnalysisContext
+from .rank_extraction_opportunities import rank_method_extraction_opportunities
+
+
+class SemiBudget(NamedTuple):
+    """
+    Limits of analysis of a single method, which is degraded instead of stalling the run:
+     - a method with more statements than max_statements is not analyzed,
+       statements are counted before their semantic is extracted,
+     - only max_opportunities first extraction opportunities are ranked,
+     - max_time seconds is checked at every stage, if it passes while semantic is extracted,
+       the method is not analyzed, otherwise each following stage stops as soon as it has a result,
+       i.e. at least one opportunity is created and accepted and at least one group is formed.
+    """
+
+    max_statements: Optional[int] = None
+    max_opportunities: Optional[int] = None
+    max_time: Optional[float] = None
+
+
+class SemiRecord(NamedTuple):
+    """
+    Extraction opportunities group of a method described by lines of the optimal opportunity.
+    Names of budgets exceeded by the method ("statements", "opportunities", "time") are listed in each its record,
+    a method without groups due to exceeded budgets is reported by a record without a group.
+    A file or a method, which failed to be analyzed, is reported as a record with an error.
+    File is None for records of a corpus analyzer, which reports it by itself.
+    """
+
+    file: Optional[str]
+    class_name: Optional[str] = None
+    method_name: Optional[str] = None
+    method_line: Optional[int] = None
+    first_line: Optional[int] = None
+    last_line: Optional[int] = None
+    benefit: Optional[int] = None
+    opportunities: Optional[List[Dict[str, int]]] = None
+    exceeded_budgets: Optional[List[str]] = None
+    error: Optional[str] = None
+
+
+class MethodInfo(NamedTuple):
+    ast: AST
+    class_name: str
+    method_name: str
+    method_line: int
+
+
+def analyze_method(
+    method_ast: AST,
+    file_path: Optional[str],
+    class_name: str,
+    method_name: str,
+    budget: SemiBudget = SemiBudget(),
+) -> List[SemiRecord]:
+    """
+    Opportunities of a group are described by their lines only,
+    so benifits of opportunities, which cannot be optimal, are not calculated.
+    """
+    deadline = None if budget.max_time is None else perf_counter() + budget.max_time
+    method_record = SemiRecord(file_path, class_name, method_name, method_ast.get_root().line)
+    context = MethodAnalysisContext(method_ast, deadline=deadline)
+    # statements are counted on block statement graph, so semantic of an oversized method is never extracted
+    if (
+        budget.max_statements is not None
+        and _count_statements(context.block_statement_graph) > budget.max_statements
+    ):
+        return [method_record._replace(exceeded_budgets=["statements"])]
+
+    try:
+        statements_semantic = context.statements_semantic
+    except TimeoutError:
+        return [method_record._replace(exceeded_budgets=["time"])]
+
+    exceeded_budgets: List[str] = []
+    # opportunities are created while filtered, so both stop at the deadline once one opportunity is accepted
+    extraction_opportunities = _iterate_limited_extraction_opportunities(
+        statements_semantic, budget.max_opportunities, exceeded_budgets
+    )
+    extraction_opportunities_groups = rank_method_extraction_opportunities(context, extraction_opportunities)
+    if deadline is not None and perf_counter() >= deadline:
+        exceeded_budgets.append("time")
+
+    records = [
+        method_record._replace(
+            first_line=group.optimal_opportunity[0].line,
+            last_line=group.optimal_opportunity[-1].line,
+            benefit=group.benifit,
+            opportunities=[
+                {"first_line": opportunity[0].line, "last_line": opportunity[-1].line}
+                for opportunity in group.opportunities_without_benifits
+            ],
+            exceeded_budgets=exceeded_budgets or None,
+        )
+        for group in extraction_opportunities_groups
+    ]
+    if not records and exceeded_budgets:
+        records.append(method_record._replace(exceeded_budgets=exceeded_budgets))
+    return records
+
+
+def analyze_method_safely(
+    method_info: MethodInfo, file_path: Optional[str], budget: SemiBudget = SemiBudget()
+) -> List[SemiRecord]:
+    """
+    Failure of the method is reported as a record with an error, so other methods of a file are still analyzed.
+    """
+    try:
+        return analyze_method(method_info.ast, file_path, method_info.class_name, method_info.method_name, budget)
+    except Exception as e:
+        return [
+            SemiRecord(
+                file_path,
+                method_info.class_name,
+                method_info.method_name,
+                method_info.method_line,
+                error=repr(e),
+            )
+        ]
+
+
+def iterate_methods(ast: AST) -> Iterator[MethodInfo]:
+    for class_declaration in ast.get_root().types:
+        if class_declaration.node_type != ASTNodeType.CLASS_DECLARATION:
+            continue
+        for method_declaration in class_declaration.methods:
+            yield MethodInfo(
+                ast.get_subtree(method_declaration),
+                class_declaration.name,
+                method_declaration.name,
+                method_declaration.line,
+            )
+
+
+def _count_statements(block_statement_graph: Block) -> int:
+    statements_qty = 0
+
+    def on_node_entering(node: Union[Block, BlockStatement]) -> None:
+        nonlocal statements_qty
+        if isinstance(node, BlockStatement):
+            statements_qty += 1
+
+    block_statement_graph.traverse(on_node_entering)
+    # method declaration itself is not counted
+    return statements_qty - 1
+
+
+def _iterate_limited_extraction_opportunities(
+    statements_semantic: Dict[Statement, StatementSemantic],
+    max_opportunities_qty: Optional[int],
+    exceeded_budgets: List[str],
+) -> Iterator[ExtractionOpportunity]:
+    for opportunities_qty, extraction_opportunity in enumerate(iterate_extraction_opportunities(statements_semantic)):
+        if opportunities_qty == max_opportunities_qty:
+            exceeded_budgets.append("opportunities")
+            return
+        yield extraction_opportunity
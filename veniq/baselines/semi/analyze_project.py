@@ -0,0 +1,223 @@
+"""
+Runs SEMI over all Java files of a project in a pool of processes
+and writes ranked extraction opportunities groups as JSON lines.
+
+Analysis of a single method may be limited by SemiBudget, then partial results are written
+together with names of exceeded budgets.
+
+Each file is parsed by a worker, which ranks opportunities of small methods right away.
+Methods larger than a threshold are scheduled as separate tasks, the largest ones first and before
+remaining files, so a few giant methods are spread across workers instead of finishing the run alone.
+If an AST snapshot of the project is given, workers read ASTs of files found in it instead of parsing them,
+files missing in the snapshot or changed since it was written are parsed with a warning.
+
+Usage:
+    python -m veniq.baselines.semi.analyze_project -d DIR [-o OUTPUT] [-j JOBS] [--timeout SECONDS]
+        [--max-statements QTY] [--max-opportunities QTY] [--max-method-time SECONDS] [--snapshot SNAPSHOT]
+"""
+
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from contextlib import ExitStack
+from functools import lru_cache, partial
+from heapq import heappop, heappush
+from itertools import count
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from warnings import warn
+
+from veniq.ast_framework import AST
+from veniq.corpus.driver import find_java_files
+from veniq.utils.ast_builder import build_ast
+from veniq.utils.ast_snapshot import ASTSnapshot
+from veniq.utils.parallel import get_result_or_error, run_in_pool
+from .analyze_method import SemiBudget, SemiRecord, analyze_method_safely, iterate_methods
+
+# methods with more AST nodes are analyzed as separate tasks
+DEFAULT_LARGE_METHOD_SIZE = 2000
+
+
+class _Task(NamedTuple):
+    file: str
+    # index of a method in order of iterate_methods, the whole file is analyzed if None
+    method_index: Optional[int] = None
+    method_size: int = 0
+    class_name: Optional[str] = None
+    method_name: Optional[str] = None
+    method_line: Optional[int] = None
+
+
+class _TaskResult(NamedTuple):
+    records: List[SemiRecord]
+    large_methods: List[_Task]
+
+
+def analyze_project(
+    files: Iterable[Path],
+    jobs: int,
+    timeout: Optional[float] = None,
+    queue_size: Optional[int] = None,
+    large_method_size: int = DEFAULT_LARGE_METHOD_SIZE,
+    budget: SemiBudget = SemiBudget(),
+    snapshot_path: Optional[str] = None,
+) -> Iterator[SemiRecord]:
+    """
+    Ranks extraction opportunities of all methods in files in a pool of processes
+    and yields records as soon as a file or a large method is done.
+    Only queue_size tasks (by default 4 per process) are submitted to the pool at once.
+    Large methods found in analyzed files are submitted before remaining files in order of decreasing size.
+    A task lasting longer than timeout seconds is reported as a record with an error,
+    while budget limits analysis of each method leaving partial results.
+    Files found in the AST snapshot are not parsed, each process maps the snapshot once.
+    """
+    tasks = _TasksQueue(map(str, files))
+    run_task = partial(_run_task, large_method_size=large_method_size, budget=budget, snapshot_path=snapshot_path)
+    for task, future in run_in_pool(run_task, tasks, jobs, timeout, queue_size):
+        result, error = get_result_or_error(future)
+        if error is not None:
+            yield SemiRecord(task.file, task.class_name, task.method_name, task.method_line, error=error)
+            continue
+        for large_method in result.large_methods:
+            tasks.add_large_method(large_method)
+        yield from result.records
+
+
+class _TasksQueue:
+    """
+    Tasks of large methods in order of decreasing size followed by tasks of remaining files.
+    Large methods are added as results of files come, so the queue may run out for a while
+    until run_in_pool asks it for more tasks after the next call is finished.
+    """
+
+    def __init__(self, files: Iterator[str]):
+        self._files = files
+        self._large_methods: List[Tuple[int, int, _Task]] = []
+        self._tasks_counter = count()
+
+    def add_large_method(self, task: _Task) -> None:
+        heappush(self._large_methods, (-task.method_size, next(self._tasks_counter), task))
+
+    def __iter__(self) -> "_TasksQueue":
+        return self
+
+    def __next__(self) -> _Task:
+        if self._large_methods:
+            return heappop(self._large_methods)[-1]
+        return _Task(next(self._files))
+
+
+def _run_task(
+    task: _Task, large_method_size: int, budget: SemiBudget, snapshot_path: Optional[str] = None
+) -> _TaskResult:
+    try:
+        ast = _get_file_ast(task.file, snapshot_path)
+    except Exception as e:
+        return _TaskResult([SemiRecord(task.file, error=f"Parsing failed: {e!r}")], [])
+
+    records: List[SemiRecord] = []
+    large_methods: List[_Task] = []
+    for method_index, method_info in enumerate(iterate_methods(ast)):
+        if task.method_index is None:
+            method_size = len(method_info.ast.storage)
+            if method_size > large_method_size:
+                large_methods.append(_Task(
+                    task.file, method_index, method_size,
+                    method_info.class_name, method_info.method_name, method_info.method_line,
+                ))
+                continue
+        elif task.method_index != method_index:
+            continue
+        records.extend(analyze_method_safely(method_info, task.file, budget))
+    return _TaskResult(records, large_methods)
+
+
+@lru_cache(maxsize=16)
+def _get_file_ast(file_path: str, snapshot_path: Optional[str]) -> AST:
+    # a file with several large methods is parsed once by a worker, which gets more than one of them
+    if snapshot_path is not None:
+        try:
+            return _open_snapshot(snapshot_path).get_ast(file_path)
+        except KeyError as e:
+            warn(f"{e.args[0]} It is parsed instead.")
+    return AST.build_from_javalang(build_ast(file_path))
+
+
+@lru_cache(maxsize=None)
+def _open_snapshot(snapshot_path: str) -> ASTSnapshot:
+    return ASTSnapshot(snapshot_path)
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    parser = ArgumentParser(description="Rank extraction opportunities of all methods in a project with SEMI.")
+    parser.add_argument("-d", "--dir", required=True, help="Directory with Java files to analyze")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file. By default results are printed.")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Number of processes to spawn"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=300,
+        help="Maximum time in seconds to analyze a file with its small methods or a single large method",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=None,
+        help="Maximum number of tasks submitted to processes at once. By default 4 tasks per process.",
+    )
+    parser.add_argument(
+        "--large-method-size",
+        type=int,
+        default=DEFAULT_LARGE_METHOD_SIZE,
+        help="Methods with more AST nodes are analyzed as separate tasks",
+    )
+    parser.add_argument(
+        "--max-statements",
+        type=int,
+        default=None,
+        help="Methods with more statements are not analyzed. By default all methods are analyzed.",
+    )
+    parser.add_argument(
+        "--max-opportunities",
+        type=int,
+        default=None,
+        help="Maximum number of extraction opportunities of a method to rank. By default all of them are ranked.",
+    )
+    parser.add_argument(
+        "--max-method-time",
+        type=float,
+        default=None,
+        help="Time in seconds after which groups of opportunities found so far are reported for a method",
+    )
+    parser.add_argument(
+        "--snapshot",
+        default=None,
+        help="AST snapshot written by veniq.utils.ast_snapshot for the same directory. "
+        "Files found in it are not parsed.",
+    )
+    args = parser.parse_args(arguments)
+
+    with ExitStack() as stack:
+        if args.output == "-":
+            output_stream = sys.stdout
+        else:
+            output_stream = stack.enter_context(open(args.output, "w"))
+        budget = SemiBudget(args.max_statements, args.max_opportunities, args.max_method_time)
+        records = analyze_project(
+            find_java_files(Path(args.dir)),
+            args.jobs,
+            args.timeout,
+            args.queue_size,
+            args.large_method_size,
+            budget,
+            args.snapshot,
+        )
+        for record in records:
+            output_stream.write(json.dumps(record._asdict()) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,93 @@
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 from veniq.ast_framework import AST
 from .extract_semantic import extract_method_statements_semantic
 from ._common_cli import common_cli
-from ._common_types import Statement, StatementSemantic, ExtractionOpportunity
+from ._common_types import Statement, StatementSemantic, ExtractionOpportunity, get_symbols_ids
 
 
 def create_extraction_opportunities(
-    statements_semantic: Dict[Statement, StatementSemantic]
+    statements_semantic: Dict[Statement, StatementSemantic], max_opportunities_qty: Optional[int] = None
 ) -> List[ExtractionOpportunity]:
-    extraction_opportunities: List[ExtractionOpportunity] = []
-    for step in range(1, len(statements_semantic) + 1):
-        for extraction_opportunity in _ExtractionOpportunityIterator(statements_semantic, step):
-            if extraction_opportunity and extraction_opportunity not in extraction_opportunities:
-                extraction_opportunities.append(extraction_opportunity)
-
-    return extraction_opportunities
-
-
-class _ExtractionOpportunityIterator:
-    def __init__(self, statements_semantic: Dict[Statement, StatementSemantic], step: int):
-        self._statements_semantic = statements_semantic
-        self._statements = list(statements_semantic.keys())
-        self._step = step
-
-        self._statement_index = 0
-
-    def __iter__(self):
-        return self
-
-    def __next__(self) -> ExtractionOpportunity:
-        if self._statement_index >= len(self._statements_semantic):
-            raise StopIteration
-
-        fails_qty = 0
-        first_statement_index = self._statement_index
-        last_statement_index: Optional[int] = None
-
-        self._statement_index += 1
-
-        while self._statement_index < len(self._statements) and last_statement_index is None:
-            previous_statement_semantic = self._get_statement_semantic(self._statement_index - fails_qty - 1)
-            current_statement_semantic = self._get_statement_semantic(self._statement_index)
-
-            if current_statement_semantic.is_similar(previous_statement_semantic):
-                fails_qty = 0
-                self._statement_index += 1
-            else:
-                fails_qty += 1
-                if fails_qty == self._step:
-                    self._statement_index -= self._step - 1
-                    last_statement_index = self._statement_index - 1
-                else:
-                    self._statement_index += 1
-
-        # self._statement_index has passed over self._statements
-        # put last_statement_index to the last statement before sequence of failures
-        if last_statement_index is None:
-            last_statement_index = len(self._statements) - fails_qty - 1
-
-        return tuple(
-            self._statements[i]
-            for i in range(first_statement_index, last_statement_index + 1)
-            if not self._statements[i].is_fake
-        )
+    """
+    Returns extraction opportunities in order they are found.
+    If max_opportunities_qty is given, generation stops after that many first opportunities.
+    """
+    return list(islice(iterate_extraction_opportunities(statements_semantic), max_opportunities_qty))
+
 
-    def _get_statement_semantic(self, statement_index: int) -> StatementSemantic:
-        current_statement = self._statements[statement_index]
-        return self._statements_semantic[current_statement]
+def iterate_extraction_opportunities(
+    statements_semantic: Dict[Statement, StatementSemantic]
+) -> Iterator[ExtractionOpportunity]:
+    """
+    Lazily yields distinct extraction opportunities for each step from 1 to the number of statements.
+
+    For a given step an opportunity starts with a statement and grows by the next statement similar
+    to the last included one, unless it is a step or more statements away.
+    The next opportunity starts right after the last included statement.
+    Fake statements are not included, so an opportunity is identified by its first and last real statements
+    and duplicates are found by a set lookup.
+    """
+    statements = list(statements_semantic.keys())
+    statements_qty = len(statements)
+    is_fake = [statement.is_fake for statement in statements]
+    next_similar_statements = _find_next_similar_statements(list(statements_semantic.values()))
+
+    # the nearest real statement at or after each position and at or before it
+    next_real_statements = [statements_qty] * (statements_qty + 1)
+    for index in reversed(range(statements_qty)):
+        next_real_statements[index] = next_real_statements[index + 1] if is_fake[index] else index
+    previous_real_statements = [-1] * (statements_qty + 1)
+    for index in range(statements_qty):
+        previous_real_statements[index] = previous_real_statements[index - 1] if is_fake[index] else index
+
+    found_opportunities: Set[Tuple[int, int]] = set()
+    for step in range(1, statements_qty + 1):
+        first_statement_index = 0
+        while first_statement_index < statements_qty:
+            last_statement_index = first_statement_index
+            next_statement_index = next_similar_statements[last_statement_index]
+            while next_statement_index != -1 and next_statement_index - last_statement_index <= step:
+                last_statement_index = next_statement_index
+                next_statement_index = next_similar_statements[last_statement_index]
+
+            opportunity_bounds = (
+                next_real_statements[first_statement_index],
+                previous_real_statements[last_statement_index],
+            )
+            if opportunity_bounds[0] <= opportunity_bounds[1] and opportunity_bounds not in found_opportunities:
+                found_opportunities.add(opportunity_bounds)
+                yield tuple(
+                    statements[index]
+                    for index in range(opportunity_bounds[0], opportunity_bounds[1] + 1)
+                    if not is_fake[index]
+                )
+
+            # statements after the last one in the method are never similar to it,
+            # so there must be enough of them to finish the opportunity and start the next one
+            if last_statement_index + step >= statements_qty:
+                break
+            first_statement_index = last_statement_index + 1
+
+
+def _find_next_similar_statements(semantics: List[StatementSemantic]) -> List[int]:
+    """
+    Returns index of the nearest following similar statement for each statement or -1, if there is no such one.
+    Similar statements share a symbol, so it is the nearest following occurrence of any of statement symbols.
+    """
+    next_similar_statements = [-1] * len(semantics)
+    symbols_next_occurrences: Dict[int, int] = {}
+    statements_symbols = get_symbols_ids(semantics)
+    for index in reversed(range(len(semantics))):
+        symbols_ids = statements_symbols[index]
+        next_similar_statements[index] = min(
+            (symbols_next_occurrences[symbol] for symbol in symbols_ids if symbol in symbols_next_occurrences),
+            default=-1,
+        )
+        for symbol in symbols_ids:
+            symbols_next_occurrences[symbol] = index
+    return next_similar_statements
 
 
 def _print_extraction_opportunities(method_ast: AST, filepath: str, class_name: str, method_name: str):
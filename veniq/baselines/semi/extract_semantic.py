@@ -1,5 +1,7 @@
 from collections import OrderedDict
-from typing import Callable, Dict, Union
+from sys import intern
+from time import perf_counter
+from typing import Callable, Dict, Optional, Set, Union
 
 from veniq.ast_framework import AST, ASTNode, ASTNodeType
 from veniq.ast_framework.block_statement_graph import build_block_statement_graph, Block, Statement
@@ -8,17 +10,25 @@ from ._common_cli import common_cli
 from ._common_types import Statement as ExtractionStatement, StatementSemantic
 
 
-def extract_method_statements_semantic(method_ast: AST) -> Dict[ExtractionStatement, StatementSemantic]:
-    block_statement_graph = build_block_statement_graph(method_ast)
-    semantic_extractor = _SemanticExtractor(method_ast)
+def extract_method_statements_semantic(
+    method_ast: AST, block_statement_graph: Optional[Block] = None, deadline: Optional[float] = None
+) -> Dict[ExtractionStatement, StatementSemantic]:
+    """
+    Block statement graph of the method is built, unless it is provided.
+    If deadline, a value of time.perf_counter(), passes before all statements are handled, TimeoutError is raised.
+    """
+    if block_statement_graph is None:
+        block_statement_graph = build_block_statement_graph(method_ast)
+    semantic_extractor = _SemanticExtractor(method_ast, deadline)
     block_statement_graph.traverse(semantic_extractor.on_node_entering, semantic_extractor.on_node_leaving)
     return semantic_extractor.statements_semantic
 
 
 class _SemanticExtractor:
-    def __init__(self, method_ast: AST):
+    def __init__(self, method_ast: AST, deadline: Optional[float] = None):
         self.statements_semantic: Dict[ExtractionStatement, StatementSemantic] = OrderedDict()
         self._ast = method_ast
+        self._deadline = deadline
 
         self._semantic_extractors: Dict[ASTNodeType, Callable[[ExtractionStatement], StatementSemantic]] = {
             ASTNodeType.FOR_STATEMENT: self._extract_semantic_from_field_factory("control"),
@@ -41,6 +51,8 @@ class _SemanticExtractor:
         }
 
     def on_node_entering(self, node: Union[Block, Statement]) -> None:
+        if self._deadline is not None and perf_counter() >= self._deadline:
+            raise TimeoutError("Deadline passed while extracting semantic of statements.")
         if isinstance(node, Block):
             self._on_block_entering(node)
         elif isinstance(node, Statement):
@@ -122,28 +134,29 @@ class _SemanticExtractor:
             self.statements_semantic[self._ast.create_fake_node()] = StatementSemantic()
 
     def _extract_semantic_from_ast(self, ast_root: ASTNode) -> StatementSemantic:
-        statement_semantic = StatementSemantic()
+        used_objects: Set[str] = set()
+        used_methods: Set[str] = set()
         for node in self._ast.get_subtree(ast_root).get_proxy_nodes(
             ASTNodeType.MEMBER_REFERENCE, ASTNodeType.METHOD_INVOCATION, ASTNodeType.VARIABLE_DECLARATOR
         ):
             if node.node_type == ASTNodeType.MEMBER_REFERENCE:
                 used_object_name = node.member
                 if node.qualifier is not None:
-                    used_object_name = node.qualifier + "." + used_object_name
-                statement_semantic.used_objects.add(used_object_name)
+                    # qualified names are compared across statements, so they are interned like AST strings
+                    used_object_name = intern(node.qualifier + "." + used_object_name)
+                used_objects.add(used_object_name)
             elif node.node_type == ASTNodeType.METHOD_INVOCATION:
-                statement_semantic.used_methods.add(node.member)
+                used_methods.add(node.member)
                 if node.qualifier is not None:
-                    statement_semantic.used_objects.add(node.qualifier)
+                    used_objects.add(node.qualifier)
             elif node.node_type == ASTNodeType.VARIABLE_DECLARATOR:
-                statement_semantic.used_objects.add(node.name)
+                used_objects.add(node.name)
 
-        return statement_semantic
+        return StatementSemantic(used_objects, used_methods)
 
     def _extract_semantic_from_try_resource(self, try_resource: ASTNode) -> StatementSemantic:
         statement_semantic = self._extract_semantic_from_ast(try_resource)
-        statement_semantic.used_objects.add(try_resource.name)
-        return statement_semantic
+        return statement_semantic.union(used_objects={try_resource.name})
 
     def _extract_semantic_from_field_factory(self, field_name) -> Callable[[ASTNode], StatementSemantic]:
         return lambda node: self._extract_semantic_from_ast(getattr(node, field_name))
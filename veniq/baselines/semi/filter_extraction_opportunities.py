@@ -1,35 +1,63 @@
-from typing import Dict, List
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional
 
-from .extract_semantic import extract_method_statements_semantic
-from .create_extraction_opportunities import create_extraction_opportunities
-from ._syntactic_filter import syntactic_filter
-from ._semantic_filter import semantic_filter
+from .create_extraction_opportunities import iterate_extraction_opportunities
+from .method_analysis_context import MethodAnalysisContext
 from ._common_types import Statement, StatementSemantic, ExtractionOpportunity
 from ._common_cli import common_cli
 from veniq.ast_framework import AST
-from veniq.ast_framework.block_statement_graph import build_block_statement_graph
 
 
 def filter_extraction_opportunities(
-    extraction_opportunities: List[ExtractionOpportunity],
+    extraction_opportunities: Iterable[ExtractionOpportunity],
     statements_semantic: Dict[Statement, StatementSemantic],
     method_ast: AST,
+    *,
+    context: Optional[MethodAnalysisContext] = None,
+    deadline: Optional[float] = None,
 ) -> List[ExtractionOpportunity]:
-    block_statement_graph = build_block_statement_graph(method_ast)
-    extraction_opportunities_filtered = filter(
-        lambda extraction_opportunity: syntactic_filter(extraction_opportunity, block_statement_graph)
-        and semantic_filter(extraction_opportunity, statements_semantic, block_statement_graph),
+    """
+    Opportunities may be given lazily, then they are not created after the deadline as well.
+    If analysis context of the method is given, its statements table is reused.
+    If deadline, a value of time.perf_counter(), is passed, no more opportunities are checked
+    and opportunities accepted so far are returned, but at least one is accepted, if any is extractable.
+    """
+    # method is traversed once and all opportunities are checked against the same table
+    statements_table = (context or MethodAnalysisContext(method_ast, statements_semantic)).statements_table
+    filtered_extraction_opportunities: List[ExtractionOpportunity] = []
+    for extraction_opportunity in extraction_opportunities:
+        if filtered_extraction_opportunities and deadline is not None and perf_counter() >= deadline:
+            break
+        if (
+            statements_table.is_syntactically_extractable(extraction_opportunity)
+            and statements_table.is_semantically_extractable(extraction_opportunity)
+        ):
+            filtered_extraction_opportunities.append(extraction_opportunity)
+    return filtered_extraction_opportunities
+
+
+def filter_method_extraction_opportunities(
+    context: MethodAnalysisContext, extraction_opportunities: Optional[Iterable[ExtractionOpportunity]] = None
+) -> List[ExtractionOpportunity]:
+    """
+    Creates extraction opportunities of the method lazily, unless they are given,
+    and filters them within the deadline of the context reusing its statements table.
+    """
+    if context.method_ast is None:
+        raise ValueError("Extraction opportunities cannot be filtered without method AST.")
+    if extraction_opportunities is None:
+        extraction_opportunities = iterate_extraction_opportunities(context.statements_semantic)
+    return filter_extraction_opportunities(
         extraction_opportunities,
+        context.statements_semantic,
+        context.method_ast,
+        context=context,
+        deadline=context.deadline,
     )
-    return list(extraction_opportunities_filtered)
 
 
 def _print_extraction_opportunities(method_ast: AST, filepath: str, class_name: str, method_name: str):
-    statements_semantic = extract_method_statements_semantic(method_ast)
-    extraction_opportunities = create_extraction_opportunities(statements_semantic)
-    filtered_extraction_opportunities = filter_extraction_opportunities(
-        extraction_opportunities, statements_semantic, method_ast
-    )
+    filtered_extraction_opportunities = filter_method_extraction_opportunities(MethodAnalysisContext(method_ast))
     print(
         f"{len(filtered_extraction_opportunities)} opportunities found in method {method_name} "
         f"in class {class_name} in file {filepath}:"
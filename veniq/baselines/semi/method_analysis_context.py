@@ -0,0 +1,66 @@
+from typing import Dict, Optional
+
+from cached_property import cached_property  # type: ignore
+
+from veniq.ast_framework import AST
+from veniq.ast_framework.block_statement_graph import Block, build_block_statement_graph
+from .extract_semantic import extract_method_statements_semantic
+from ._common_types import Statement, StatementSemantic
+from ._lcom2 import StatementsSimilarity
+from ._statements_table import StatementsTable
+
+
+class MethodAnalysisContext:
+    """
+    Artifacts of a single method shared by all SEMI stages.
+    Each of them is built on the first request only, so a stage pays for what it uses
+    and the method is never traversed twice for the same purpose.
+    Statements semantic may be given, if it is already extracted,
+    then the method AST is needed only for artifacts based on block statement graph.
+    If deadline is given, extraction of statements semantic raises TimeoutError after it passes,
+    while the following stages stop as soon as they have a result.
+    """
+
+    def __init__(
+        self,
+        method_ast: Optional[AST],
+        statements_semantic: Optional[Dict[Statement, StatementSemantic]] = None,
+        deadline: Optional[float] = None,
+    ):
+        self.method_ast = method_ast
+        self._given_statements_semantic = statements_semantic
+        self.deadline = deadline
+
+    @cached_property
+    def block_statement_graph(self) -> Block:
+        if self.method_ast is None:
+            raise ValueError("Block statement graph cannot be built without method AST.")
+        return build_block_statement_graph(self.method_ast)
+
+    @cached_property
+    def statements_semantic(self) -> Dict[Statement, StatementSemantic]:
+        if self._given_statements_semantic is not None:
+            return self._given_statements_semantic
+        if self.method_ast is None:
+            raise ValueError("Statements semantic cannot be extracted without method AST.")
+        return extract_method_statements_semantic(self.method_ast, self.block_statement_graph, self.deadline)
+
+    @cached_property
+    def statements_table(self) -> StatementsTable:
+        return StatementsTable(self.block_statement_graph, self.statements_semantic)
+
+    @cached_property
+    def statements_similarity(self) -> StatementsSimilarity:
+        return StatementsSimilarity(self.statements_semantic)
+
+    @cached_property
+    def real_statements_positions(self) -> Dict[Statement, int]:
+        """
+        Positions of statements in statements_semantic skipping fake ones.
+        """
+        return {
+            statement: position
+            for position, statement in enumerate(
+                statement for statement in self.statements_semantic if not statement.is_fake
+            )
+        }
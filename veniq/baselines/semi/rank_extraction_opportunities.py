@@ -1,12 +1,12 @@
-from typing import List, Dict, Tuple, Iterator, NamedTuple
+from time import perf_counter
+from typing import List, Dict, Tuple, Iterable, Iterator, NamedTuple, Optional
 
 from veniq.ast_framework import AST
-from .extract_semantic import extract_method_statements_semantic
-from .create_extraction_opportunities import create_extraction_opportunities
-from .filter_extraction_opportunities import filter_extraction_opportunities
+from .filter_extraction_opportunities import filter_method_extraction_opportunities
 from ._common_types import Statement, StatementSemantic, ExtractionOpportunity, OpportunityBenifit
 from ._common_cli import common_cli
-from ._lcom2 import LCOM2
+from ._lcom2 import StatementsSimilarity
+from .method_analysis_context import MethodAnalysisContext
 
 
 class ExtractionOpportunityGroupSettings(NamedTuple):
@@ -16,28 +16,49 @@ class ExtractionOpportunityGroupSettings(NamedTuple):
 
 
 class ExtractionOpportunityGroup:
+    """
+    Benifit of an added opportunity is calculated at once only if it may make the opportunity optimal
+    according to an upper bound of the benifit, otherwise it is calculated on request.
+    """
+
     def __init__(
         self,
         extraction_opportunity: ExtractionOpportunity,
         statements_semantic: Dict[Statement, StatementSemantic],
         settings: ExtractionOpportunityGroupSettings = ExtractionOpportunityGroupSettings(),
+        statements_similarity: Optional[StatementsSimilarity] = None,
     ):
         self._optimal_opportunity = extraction_opportunity
-        self._statements_semantic = statements_semantic
-        self._all_statements_benifit = LCOM2(statements_semantic)
+        self._statements_similarity = statements_similarity or StatementsSimilarity(statements_semantic)
+        self._all_statements_benifit = self._statements_similarity.lcom2(self._statements_similarity.all_statements)
 
-        self._opportunities_to_benifit: Dict[ExtractionOpportunity, OpportunityBenifit] = {
+        self._opportunities_to_benifit: Dict[ExtractionOpportunity, Optional[OpportunityBenifit]] = {
             extraction_opportunity: self._calculate_benifit(extraction_opportunity)
         }
 
         self._settings = settings
 
-    def is_allowed_to_add_opportunity(self, extraction_opportunity: ExtractionOpportunity) -> bool:
+    def is_allowed_to_add_opportunity(
+        self, extraction_opportunity: ExtractionOpportunity, shared_statements_qty: Optional[int] = None
+    ) -> bool:
+        """
+        Quantity of statements shared with the optimal opportunity is counted, unless it is provided.
+        """
+        if shared_statements_qty is None:
+            shared_statements_qty = len(set(self._optimal_opportunity) & set(extraction_opportunity))
+        optimal_opportunity_size = len(self._optimal_opportunity)
+        extraction_opportunity_size = len(extraction_opportunity)
         return self._is_similar_size(
-            self._optimal_opportunity, extraction_opportunity
-        ) and self._is_significantly_overlapping(self._optimal_opportunity, extraction_opportunity)
+            optimal_opportunity_size, extraction_opportunity_size
+        ) and self._is_significantly_overlapping(
+            optimal_opportunity_size, extraction_opportunity_size, shared_statements_qty
+        )
 
     def add_extraction_opportunity(self, extraction_opportunity: ExtractionOpportunity) -> None:
+        if self._is_dominated(extraction_opportunity):
+            self._opportunities_to_benifit.setdefault(extraction_opportunity, None)
+            return
+
         new_opportunity_benifit = self._calculate_benifit(extraction_opportunity)
         self._opportunities_to_benifit[extraction_opportunity] = new_opportunity_benifit
 
@@ -55,64 +76,88 @@ class ExtractionOpportunityGroup:
         if is_new_opportunity_optimal:
             self._optimal_opportunity = extraction_opportunity
 
+    @property
+    def optimal_opportunity(self) -> ExtractionOpportunity:
+        return self._optimal_opportunity
+
     @property
     def benifit(self) -> OpportunityBenifit:
-        return self._opportunities_to_benifit[self._optimal_opportunity]
+        benifit = self._opportunities_to_benifit[self._optimal_opportunity]
+        assert benifit is not None, "Benifit of the optimal opportunity is always calculated."
+        return benifit
 
     @property
     def opportunities(self) -> Iterator[Tuple[ExtractionOpportunity, OpportunityBenifit]]:
         for opportunity, benifit in self._opportunities_to_benifit.items():
+            if benifit is None:
+                benifit = self._opportunities_to_benifit[opportunity] = self._calculate_benifit(opportunity)
             yield opportunity, benifit
 
-    def _is_similar_size(
-        self, extraction_opportunity1: ExtractionOpportunity, extraction_opportunity2: ExtractionOpportunity
-    ) -> bool:
-        extraction_opportunity_size1 = len(extraction_opportunity1)
-        extraction_opportunity_size2 = len(extraction_opportunity2)
+    @property
+    def opportunities_without_benifits(self) -> Iterator[ExtractionOpportunity]:
+        yield from self._opportunities_to_benifit
+
+    def _is_dominated(self, extraction_opportunity: ExtractionOpportunity) -> bool:
+        """
+        An opportunity, which benifit is surely significantly less than benifit of the optimal one,
+        cannot become optimal.
+        """
+        max_benifit = self._all_statements_benifit - max(
+            self._statements_similarity.split_lcom2_lower_bounds(extraction_opportunity)
+        )
+        return (
+            0 < self.benifit
+            and max_benifit < self.benifit
+            and (self.benifit - max_benifit) / self.benifit >= self._settings.significant_difference_treshold
+        )
+
+    def _is_similar_size(self, extraction_opportunity_size1: int, extraction_opportunity_size2: int) -> bool:
         size_difference = abs(extraction_opportunity_size1 - extraction_opportunity_size2)
         min_size = min(extraction_opportunity_size1, extraction_opportunity_size2)
         return size_difference / min_size < self._settings.max_size_difference
 
     def _is_significantly_overlapping(
-        self, extraction_opportunity1: ExtractionOpportunity, extraction_opportunity2: ExtractionOpportunity
+        self, extraction_opportunity_size1: int, extraction_opportunity_size2: int, shared_statements_qty: int
     ) -> bool:
-        shared_statements_qty = len(set(extraction_opportunity1) & set(extraction_opportunity2))
-        max_size = max(len(extraction_opportunity1), len(extraction_opportunity2))
+        max_size = max(extraction_opportunity_size1, extraction_opportunity_size2)
         return shared_statements_qty / max_size > self._settings.min_overlap
 
     def _calculate_benifit(self, extraction_opportunity: ExtractionOpportunity) -> OpportunityBenifit:
-        opportunity_semantic = {
-            statement: self._statements_semantic[statement] for statement in extraction_opportunity
-        }
-        opportunity_benifit = LCOM2(opportunity_semantic)
-
-        rest_statements_semantic = {
-            statement: self._statements_semantic[statement]
-            for statement in self._statements_semantic
-            if statement not in extraction_opportunity
-        }
-        rest_statements_benifit = LCOM2(rest_statements_semantic)
-
+        opportunity_benifit, rest_statements_benifit = self._statements_similarity.split_lcom2(extraction_opportunity)
         return self._all_statements_benifit - max(opportunity_benifit, rest_statements_benifit)
 
 
 def rank_extraction_opportunities(
     statements_semantic: Dict[Statement, StatementSemantic],
     extraction_opportunities: List[ExtractionOpportunity],
+    *,
+    context: Optional[MethodAnalysisContext] = None,
+    deadline: Optional[float] = None,
 ) -> List[ExtractionOpportunityGroup]:
+    """
+    If deadline, a value of time.perf_counter(), is passed, no more groups are formed
+    and groups formed so far are ranked, but at least one group is formed, if there are opportunities.
+    If analysis context of the method is given, similarity and positions of its statements are reused.
+    """
+    settings = ExtractionOpportunityGroupSettings()
+    # similarity of statements is computed once and shared by all groups
+    if context is None:
+        context = MethodAnalysisContext(None, statements_semantic)
+    statements_similarity = context.statements_similarity
+    opportunities_index = _ExtractionOpportunitiesIndex(
+        extraction_opportunities, context.real_statements_positions, settings
+    )
     extraction_opportunities_groups: List[ExtractionOpportunityGroup] = []
-    while len(extraction_opportunities) > 0:
+    for first_opportunity_index in opportunities_index.iterate_unused():
+        if extraction_opportunities_groups and deadline is not None and perf_counter() >= deadline:
+            break
         new_extraction_opportunity_group = _create_extraction_opportunities_group(
-            statements_semantic, extraction_opportunities
+            statements_semantic, opportunities_index, first_opportunity_index, statements_similarity, settings
         )
         extraction_opportunities_groups.append(new_extraction_opportunity_group)
-
-        used_opportunities = {
+        opportunities_index.mark_used(
             opportunity for opportunity, _ in new_extraction_opportunity_group.opportunities
-        }
-        extraction_opportunities = [
-            opportunity for opportunity in extraction_opportunities if opportunity not in used_opportunities
-        ]
+        )
 
     return sorted(
         extraction_opportunities_groups,
@@ -121,33 +166,128 @@ def rank_extraction_opportunities(
     )
 
 
+class _ExtractionOpportunitiesIndex:
+    """
+    Extraction opportunities not grouped yet, indexed by position of their first statement.
+
+    When all opportunities are continuous ranges of statements, as created ones are,
+    only opportunities starting close enough to overlap with a given one and have similar size are looked through
+    and shared statements are counted from ranges bounds.
+    Otherwise all opportunities are looked through.
+    Opportunities are always returned in order of the original list, so groups are the same in both cases.
+    """
+
+    def __init__(
+        self,
+        extraction_opportunities: List[ExtractionOpportunity],
+        statements_positions: Dict[Statement, int],
+        settings: ExtractionOpportunityGroupSettings,
+    ):
+        self.opportunities = extraction_opportunities
+        self._settings = settings
+        self._is_used = [False] * len(extraction_opportunities)
+        self._indexes: Dict[ExtractionOpportunity, List[int]] = {}
+        for index, opportunity in enumerate(extraction_opportunities):
+            self._indexes.setdefault(opportunity, []).append(index)
+
+        self._ranges: Optional[List[Tuple[int, int]]] = []
+        self._indexes_by_first_position: Dict[int, List[int]] = {}
+        for index, opportunity in enumerate(extraction_opportunities):
+            first_position = statements_positions.get(opportunity[0]) if opportunity else None
+            if first_position is None or any(
+                statements_positions.get(statement) != first_position + offset
+                for offset, statement in enumerate(opportunity)
+            ):
+                self._ranges = None
+                break
+            self._ranges.append((first_position, first_position + len(opportunity) - 1))
+            self._indexes_by_first_position.setdefault(first_position, []).append(index)
+
+    def iterate_unused(self) -> Iterator[int]:
+        for index, is_used in enumerate(self._is_used):
+            if not is_used:
+                yield index
+
+    def mark_used(self, opportunities: Iterable[ExtractionOpportunity]) -> None:
+        for opportunity in opportunities:
+            for index in self._indexes[opportunity]:
+                self._is_used[index] = True
+
+    def find_candidates(self, after_index: int, optimal_index: int) -> List[int]:
+        """
+        Returns indexes of not used opportunities following after_index in the list,
+        which may be allowed to join a group with the given optimal opportunity.
+        """
+        if self._ranges is None:
+            return [index for index in range(after_index + 1, len(self.opportunities)) if not self._is_used[index]]
+
+        first_position, last_position = self._ranges[optimal_index]
+        size = last_position - first_position + 1
+        # an overlapping opportunity of similar size cannot start earlier
+        min_first_position = first_position - int((1 + self._settings.max_size_difference) * size)
+        return sorted(
+            index
+            for position in range(max(min_first_position, 0), last_position + 1)
+            for index in self._indexes_by_first_position.get(position, [])
+            if index > after_index and not self._is_used[index]
+        )
+
+    def is_allowed_to_add(self, group: ExtractionOpportunityGroup, optimal_index: int, index: int) -> bool:
+        opportunity = self.opportunities[index]
+        if self._ranges is None:
+            return group.is_allowed_to_add_opportunity(opportunity)
+
+        first_position1, last_position1 = self._ranges[optimal_index]
+        first_position2, last_position2 = self._ranges[index]
+        shared_statements_qty = max(min(last_position1, last_position2) - max(first_position1, first_position2) + 1, 0)
+        return group.is_allowed_to_add_opportunity(opportunity, shared_statements_qty)
+
+
 def _create_extraction_opportunities_group(
     statements_semantic: Dict[Statement, StatementSemantic],
-    extraction_opportunities: List[ExtractionOpportunity],
+    opportunities_index: _ExtractionOpportunitiesIndex,
+    first_opportunity_index: int,
+    statements_similarity: StatementsSimilarity,
+    settings: ExtractionOpportunityGroupSettings,
 ) -> ExtractionOpportunityGroup:
-    assert len(extraction_opportunities) > 0, "Cannot create a group from empty list of opportunities."
-
+    """
+    Opportunities following the first one are tried in order of the list.
+    Ones not returned by the index cannot join the group, so only candidates close to the optimal one are checked.
+    """
     extraction_opportunity_group = ExtractionOpportunityGroup(
-        extraction_opportunities[0], statements_semantic
+        opportunities_index.opportunities[first_opportunity_index], statements_semantic, settings, statements_similarity
     )
-    for extraction_opportunity in extraction_opportunities[1:]:
-        if extraction_opportunity_group.is_allowed_to_add_opportunity(extraction_opportunity):
-            extraction_opportunity_group.add_extraction_opportunity(extraction_opportunity)
+    optimal_index = candidate_index = first_opportunity_index
+    while True:
+        for candidate_index in opportunities_index.find_candidates(candidate_index, optimal_index):
+            if opportunities_index.is_allowed_to_add(extraction_opportunity_group, optimal_index, candidate_index):
+                candidate = opportunities_index.opportunities[candidate_index]
+                extraction_opportunity_group.add_extraction_opportunity(candidate)
+                if extraction_opportunity_group.optimal_opportunity is candidate:
+                    # candidates are looked for around the new optimal opportunity
+                    optimal_index = candidate_index
+                    break
+        else:
+            return extraction_opportunity_group
 
-    return extraction_opportunity_group
+
+def rank_method_extraction_opportunities(
+    context: MethodAnalysisContext, extraction_opportunities: Optional[Iterable[ExtractionOpportunity]] = None
+) -> List[ExtractionOpportunityGroup]:
+    """
+    Runs all SEMI stages over the method: creates extraction opportunities, unless they are given,
+    filters and ranks them within the deadline of the context reusing its artifacts.
+    """
+    filtered_extraction_opportunities = filter_method_extraction_opportunities(context, extraction_opportunities)
+    return rank_extraction_opportunities(
+        context.statements_semantic, filtered_extraction_opportunities, context=context, deadline=context.deadline
+    )
 
 
 def _print_extraction_opportunities(
     method_ast: AST, filepath: str, class_name: str, method_name: str
 ) -> None:
-    statements_semantic = extract_method_statements_semantic(method_ast)
-    extraction_opportunities = create_extraction_opportunities(statements_semantic)
-    filtered_extraction_opportunities = filter_extraction_opportunities(
-        extraction_opportunities, statements_semantic, method_ast
-    )
-    extraction_opportunities_groups = rank_extraction_opportunities(
-        statements_semantic, filtered_extraction_opportunities
-    )
+    extraction_opportunities_groups = rank_method_extraction_opportunities(MethodAnalysisContext(method_ast))
 
     print(
         f"Extraction opportunities groups of method {method_name} in class {class_name} in file {filepath}:"
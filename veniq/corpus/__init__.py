@@ -0,0 +1,4 @@
+from .analyzers import AnalysisResult, analyzers, analyzers_versions  # noqa: F401
+from .driver import CorpusRecord, analyze_corpus, analyze_file, find_java_files  # noqa: F401
+from .output import CsvWriter, JsonlWriter, RecordsWriter, writers  # noqa: F401
+from .incremental import analyze_corpus_incrementally  # noqa: F401
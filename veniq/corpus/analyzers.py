@@ -0,0 +1,77 @@
+"""
+Analyzers, which can be run over a corpus of Java files.
+Each analyzer receives an AST of a whole file and yields results
+for classes or methods found in it.
+"""
+
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.java_class_decomposition import decompose_java_class
+from veniq.baselines.semi.analyze_method import analyze_method_safely, iterate_methods
+from veniq.metrics.ncss.ncss import NCSSMetric
+
+
+class AnalysisResult(NamedTuple):
+    class_name: Optional[str]
+    method_name: Optional[str]
+    value: Any
+    error: Optional[str] = None
+
+
+Analyzer = Callable[[AST], Iterator[AnalysisResult]]
+
+
+def analyze_ncss(ast: AST) -> Iterator[AnalysisResult]:
+    for class_ast in _get_classes_asts(ast):
+        yield AnalysisResult(class_ast.get_root().name, None, NCSSMetric().value(class_ast))
+
+
+def analyze_decomposition(ast: AST) -> Iterator[AnalysisResult]:
+    for class_ast in _get_classes_asts(ast):
+        components_qty = {
+            strength: len(decompose_java_class(class_ast, strength)) for strength in ("strong", "weak")
+        }
+        yield AnalysisResult(class_ast.get_root().name, None, components_qty)
+
+
+def analyze_semi(ast: AST) -> Iterator[AnalysisResult]:
+    """
+    Yields extraction opportunities groups ranked by SEMI for each method.
+    Groups are described by lines of their optimal opportunities, other opportunities by their lines only.
+    Failure of a method is reported as a result with an error.
+    """
+    for method_info in iterate_methods(ast):
+        records = analyze_method_safely(method_info, None)
+        error = next((record.error for record in records if record.error is not None), None)
+        groups = [
+            {
+                "first_line": record.first_line,
+                "last_line": record.last_line,
+                "benefit": record.benefit,
+                "opportunities": record.opportunities,
+            }
+            for record in records
+            if record.benefit is not None
+        ]
+        yield AnalysisResult(method_info.class_name, method_info.method_name, None if error else groups, error)
+
+
+def _get_classes_asts(ast: AST) -> Iterator[AST]:
+    for type_declaration in ast.get_root().types:
+        if type_declaration.node_type == ASTNodeType.CLASS_DECLARATION:
+            yield ast.get_subtree(type_declaration)
+
+
+analyzers: Dict[str, Analyzer] = {
+    "ncss": analyze_ncss,
+    "decomposition": analyze_decomposition,
+    "semi": analyze_semi,
+}
+
+# must be increased on any change of results of an analyzer, so its results stored by incremental runs are dropped
+analyzers_versions: Dict[str, int] = {
+    "ncss": 1,
+    "decomposition": 1,
+    "semi": 2,
+}
@@ -0,0 +1,94 @@
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from veniq.ast_framework import AST
+from veniq.utils.ast_builder import build_ast
+from veniq.utils.ast_cache import ASTCache
+from veniq.utils.parallel import get_result_or_error, run_in_pool
+from .analyzers import analyzers
+
+DEFAULT_CACHE_SIZE = 1024 ** 3
+
+
+class CorpusRecord(NamedTuple):
+    file: str
+    analyzer: Optional[str]
+    class_name: Optional[str] = None
+    method_name: Optional[str] = None
+    value: object = None
+    error: Optional[str] = None
+
+
+def find_java_files(directory: Path) -> Iterator[Path]:
+    """
+    Java files are sorted by path, so all drivers handle files of a directory in the same order.
+    """
+    return (path for path in sorted(directory.rglob("*.java")) if path.is_file())
+
+
+def analyze_file(
+    file_path: str,
+    analyzers_names: Sequence[str],
+    cache_directory: Optional[str] = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+) -> List[CorpusRecord]:
+    """
+    Parses a file once and runs all requested analyzers on it.
+    If cache directory is given, AST is taken from ASTCache there.
+    Failure of parsing or of a single analyzer is reported as a record with an error.
+    """
+    try:
+        if cache_directory is None:
+            ast = AST.build_from_javalang(build_ast(file_path))
+        else:
+            ast = _get_ast_cache(cache_directory, cache_size).get_ast(file_path)
+    except Exception as e:
+        return [CorpusRecord(file_path, None, error=f"Parsing failed: {e!r}")]
+
+    records: List[CorpusRecord] = []
+    for analyzer_name in analyzers_names:
+        try:
+            records.extend(
+                CorpusRecord(file_path, analyzer_name, *result)
+                for result in analyzers[analyzer_name](ast)
+            )
+        except Exception as e:
+            records.append(CorpusRecord(file_path, analyzer_name, error=repr(e)))
+    return records
+
+
+def analyze_corpus(
+    files: Iterable[Path],
+    analyzers_names: Sequence[str],
+    jobs: int,
+    timeout: Optional[float] = None,
+    queue_size: Optional[int] = None,
+    cache_directory: Optional[str] = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+) -> Iterator[CorpusRecord]:
+    """
+    Runs analyzers on each file in a pool of processes and yields records as soon as a file is done.
+    Only queue_size files are submitted to the pool at once, so files may be a lazy sequence of any length.
+    A file, which is analyzed longer than timeout seconds, is reported as a record with an error.
+    ASTs are shared between runs through ASTCache, if cache directory is given.
+    """
+    unknown_analyzers = set(analyzers_names) - analyzers.keys()
+    if unknown_analyzers:
+        raise ValueError(f"Unknown analyzers: {', '.join(sorted(unknown_analyzers))}.")
+
+    analyze = partial(
+        analyze_file, analyzers_names=analyzers_names, cache_directory=cache_directory, cache_size=cache_size
+    )
+    for file_path, future in run_in_pool(analyze, map(str, files), jobs, timeout, queue_size):
+        records, error = get_result_or_error(future)
+        yield from records if error is None else [CorpusRecord(file_path, None, error=error)]
+
+    if cache_directory is not None:
+        ASTCache(cache_directory, cache_size).evict()
+
+
+@lru_cache(maxsize=None)
+def _get_ast_cache(cache_directory: str, cache_size: int) -> ASTCache:
+    # one cache object per worker process, so eviction period is counted across files
+    return ASTCache(cache_directory, cache_size)
@@ -0,0 +1,267 @@
+import json
+import os
+import subprocess
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set
+
+import veniq
+from .analyzers import analyzers_versions
+from .driver import CorpusRecord, find_java_files
+from .output import JsonlWriter
+
+CorpusAnalysis = Callable[[Iterable[Path]], Iterator[CorpusRecord]]
+
+
+class FileState(NamedTuple):
+    hash: str
+    mtime: float
+    size: int
+
+
+class Manifest(NamedTuple):
+    version: str
+    # versions of analyzers by their names
+    analyzers: Dict[str, int]
+    commit: Optional[str]
+    # files, which differed from the commit, or None, if the corpus is not in a git repository
+    uncommitted_files: Optional[List[str]]
+    files: Dict[str, FileState]
+
+
+def analyze_corpus_incrementally(
+    directory: Path,
+    store_directory: Path,
+    analyzers_names: Sequence[str],
+    analyze: CorpusAnalysis,
+    changes_detection: str = "mtime",
+) -> Iterator[CorpusRecord]:
+    """
+    Yields records for all Java files in directory, but analyzes only files changed since the previous run.
+    Records of other files are taken from the store of the previous run.
+
+    Changed files are found either by modification time and size ("mtime"),
+    with content hash check for files having them changed,
+    or by git ("git") as files changed since commit of the previous run, untracked files
+    and files, which had uncommitted changes in the previous run, with content hash check for all of them.
+    Files absent in the previous run or failed to be analyzed in it are always analyzed.
+    If the previous run used another version of veniq, other analyzers or other versions of them,
+    all files are analyzed.
+    The store is updated only when all records are consumed.
+    """
+    if changes_detection not in {"mtime", "git"}:
+        raise ValueError(
+            f"'changes_detection' must be either 'mtime' or 'git', but '{changes_detection}' was provided."
+        )
+
+    root = directory.resolve()
+    store_directory.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(store_directory, analyzers_names)
+    # taken before files are read, so changes made during the analysis are found by the next run
+    commit = _get_git_commit(root)
+    uncommitted_files = _find_uncommitted_files(root) if commit is not None else None
+    files = {path.relative_to(root).as_posix(): path for path in find_java_files(root)}
+
+    previous_files_states = manifest.files if manifest is not None else {}
+    # states of files, which were hashed while looking for changes
+    files_states: Dict[str, FileState] = {}
+    if manifest is None:
+        changed_files = set(files)
+    else:
+        changed_files = _find_changed_files(
+            root, store_directory, files, manifest, uncommitted_files, files_states, changes_detection
+        )
+
+    for relative_path, path in files.items():
+        if relative_path in files_states:
+            continue
+        elif relative_path in changed_files:
+            files_states[relative_path] = _get_file_state(path)
+        else:
+            files_states[relative_path] = previous_files_states[relative_path]
+
+    records_path = store_directory / _RECORDS_FILENAME
+    new_records_path = store_directory / (_RECORDS_FILENAME + ".tmp")
+    with open(new_records_path, "w") as new_records_file:
+        writer = JsonlWriter(new_records_file)
+        unchanged_files = files.keys() - changed_files
+        if unchanged_files:
+            for record in _read_records(records_path, unchanged_files):
+                writer.write(record)
+                yield record._replace(file=str(root / record.file))
+
+        for record in analyze(files[relative_path] for relative_path in sorted(changed_files)):
+            writer.write(record._replace(file=Path(record.file).relative_to(root).as_posix()))
+            yield record
+
+    os.replace(new_records_path, records_path)
+    new_manifest = Manifest(
+        veniq.__version__,
+        _get_analyzers_versions(analyzers_names),
+        commit,
+        sorted(uncommitted_files) if uncommitted_files is not None else None,
+        files_states,
+    )
+    _save_manifest(store_directory, new_manifest)
+
+
+def _find_changed_files(
+    root: Path,
+    store_directory: Path,
+    files: Dict[str, Path],
+    manifest: Manifest,
+    uncommitted_files: Optional[Set[str]],
+    files_states: Dict[str, FileState],
+    changes_detection: str,
+) -> Set[str]:
+    if changes_detection == "git":
+        changed_files = _find_changed_files_by_git(root, files, manifest, uncommitted_files, files_states)
+    else:
+        changed_files = _find_changed_files_by_mtime(files, manifest, files_states)
+    # failures, e.g. timeouts or crashes of workers, are not reused to be retried
+    return changed_files | (_find_failed_files(store_directory / _RECORDS_FILENAME) & files.keys())
+
+
+def _find_changed_files_by_mtime(
+    files: Dict[str, Path], manifest: Manifest, files_states: Dict[str, FileState]
+) -> Set[str]:
+    changed_files: Set[str] = set()
+    for relative_path, path in files.items():
+        previous_state = manifest.files.get(relative_path)
+        if previous_state is None:
+            changed_files.add(relative_path)
+            continue
+
+        file_stat = path.stat()
+        if (file_stat.st_mtime, file_stat.st_size) == (previous_state.mtime, previous_state.size):
+            continue
+
+        # file may be only touched, then new modification time is kept to not hash it next time
+        files_states[relative_path] = _get_file_state(path)
+        if files_states[relative_path].hash != previous_state.hash:
+            changed_files.add(relative_path)
+    return changed_files
+
+
+def _find_changed_files_by_git(
+    root: Path,
+    files: Dict[str, Path],
+    manifest: Manifest,
+    uncommitted_files: Optional[Set[str]],
+    files_states: Dict[str, FileState],
+) -> Set[str]:
+    if manifest.commit is None or manifest.uncommitted_files is None or uncommitted_files is None:
+        # changes are unknown without a commit to compare with
+        return set(files)
+    changed_in_git = _run_git(root, "diff", "--name-only", "--relative", "-z", manifest.commit)
+    if changed_in_git is None:
+        return set(files)
+
+    # a file with uncommitted changes in the previous run may be reverted to the commit since then
+    candidates = changed_in_git | uncommitted_files | set(manifest.uncommitted_files)
+    changed_files: Set[str] = set()
+    for relative_path, path in files.items():
+        previous_state = manifest.files.get(relative_path)
+        if previous_state is None:
+            changed_files.add(relative_path)
+        elif relative_path in candidates:
+            files_states[relative_path] = _get_file_state(path)
+            if files_states[relative_path].hash != previous_state.hash:
+                changed_files.add(relative_path)
+    return changed_files
+
+
+def _find_uncommitted_files(root: Path) -> Optional[Set[str]]:
+    """
+    Files changed since HEAD, including staged ones, and files unknown to git, including ignored ones.
+    """
+    changed_files = _run_git(root, "diff", "--name-only", "--relative", "-z", "HEAD")
+    untracked_files = _run_git(root, "ls-files", "--others", "-z")
+    if changed_files is None or untracked_files is None:
+        return None
+    return changed_files | untracked_files
+
+
+def _get_git_commit(root: Path) -> Optional[str]:
+    output = _run_git(root, "rev-parse", "HEAD")
+    return next(iter(output), None) if output is not None else None
+
+
+def _run_git(root: Path, *arguments: str) -> Optional[Set[str]]:
+    """
+    Returns set of lines printed by git, or of NUL separated entries, if "-z" is passed, or None, if git failed.
+    Paths are printed as they are, not quoted and escaped, and decoded as file system paths.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "-c", "core.quotePath=false", "-C", str(root), *arguments],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    output = os.fsdecode(result.stdout)
+    return {entry for entry in (output.split("\0") if "-z" in arguments else output.splitlines()) if entry}
+
+
+def _get_analyzers_versions(analyzers_names: Sequence[str]) -> Dict[str, int]:
+    return {analyzer_name: analyzers_versions[analyzer_name] for analyzer_name in sorted(analyzers_names)}
+
+
+def _get_file_state(path: Path) -> FileState:
+    file_stat = path.stat()
+    return FileState(sha256(path.read_bytes()).hexdigest(), file_stat.st_mtime, file_stat.st_size)
+
+
+def _read_records(records_path: Path, files: Set[str]) -> Iterator[CorpusRecord]:
+    with open(records_path) as records_file:
+        for line in records_file:
+            record = CorpusRecord(**json.loads(line))
+            if record.file in files:
+                yield record
+
+
+def _find_failed_files(records_path: Path) -> Set[str]:
+    with open(records_path) as records_file:
+        return {
+            record["file"] for record in map(json.loads, records_file) if record.get("error") is not None
+        }
+
+
+def _load_manifest(store_directory: Path, analyzers_names: Sequence[str]) -> Optional[Manifest]:
+    """
+    Returns None, if there is no manifest or results in the store cannot be reused.
+    """
+    try:
+        with open(store_directory / _MANIFEST_FILENAME) as manifest_file:
+            manifest_json = json.load(manifest_file)
+        manifest = Manifest(
+            manifest_json["version"],
+            manifest_json["analyzers"],
+            manifest_json["commit"],
+            manifest_json["uncommitted_files"],
+            {path: FileState(*state) for path, state in manifest_json["files"].items()},
+        )
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        # manifest of an older format is not reused as well
+        return None
+
+    if manifest.version != veniq.__version__ or manifest.analyzers != _get_analyzers_versions(analyzers_names):
+        return None
+    if not (store_directory / _RECORDS_FILENAME).exists():
+        return None
+    return manifest
+
+
+def _save_manifest(store_directory: Path, manifest: Manifest) -> None:
+    new_manifest_path = store_directory / (_MANIFEST_FILENAME + ".tmp")
+    with open(new_manifest_path, "w") as manifest_file:
+        json.dump(manifest._asdict(), manifest_file)
+    os.replace(new_manifest_path, store_directory / _MANIFEST_FILENAME)
+
+
+_MANIFEST_FILENAME = "manifest.json"
+
+_RECORDS_FILENAME = "records.jsonl"
@@ -0,0 +1,51 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, TextIO, Type
+
+from .driver import CorpusRecord
+
+
+class RecordsWriter(ABC):
+    """
+    Writes records to a stream one by one, as soon as they are received.
+    """
+
+    @abstractmethod
+    def __init__(self, stream: TextIO):
+        pass
+
+    @abstractmethod
+    def write(self, record: CorpusRecord) -> None:
+        pass
+
+
+class JsonlWriter(RecordsWriter):
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+
+    def write(self, record: CorpusRecord) -> None:
+        self._stream.write(json.dumps(record._asdict(), default=str) + "\n")
+
+
+class CsvWriter(RecordsWriter):
+    """
+    Values of analyzers are written as JSON strings.
+    """
+
+    def __init__(self, stream: TextIO):
+        self._writer = csv.writer(stream)
+        self._writer.writerow(CorpusRecord._fields)
+
+    def write(self, record: CorpusRecord) -> None:
+        self._writer.writerow(record._replace(value=self._serialize(record.value)))
+
+    @staticmethod
+    def _serialize(value: Any) -> str:
+        return "" if value is None else json.dumps(value, default=str)
+
+
+writers: Dict[str, Type[RecordsWriter]] = {
+    "jsonl": JsonlWriter,
+    "csv": CsvWriter,
+}
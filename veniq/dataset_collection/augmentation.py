@@ -2,6 +2,7 @@ import csv
 import hashlib
 import os
 import os.path
+import random
 import shutil
 import tarfile
 import typing
@@ -9,69 +10,36 @@ from argparse import ArgumentParser
 from collections import defaultdict
 from functools import partial
 from pathlib import Path
-from typing import Tuple, Dict, List, Any, Set, Optional
+from typing import Tuple, Dict, Iterator, List, Any, Set, Optional
 
-import pandas as pd
-from pebble import ProcessPool
 from tqdm import tqdm
 
 from veniq.ast_framework import AST, ASTNodeType, ASTNode
+from veniq.dataset_collection.sharded_dataset import ShardedDataset
 from veniq.dataset_collection.types_identifier import AlgorithmFactory, InlineTypesAlgorithms
 from veniq.utils.ast_builder import build_ast
-from veniq.utils.encoding_detector import read_text_with_autodetected_encoding
+from veniq.utils.parallel import run_in_pool
+from veniq.utils.source_buffer import SourceBuffer
 
 
-def _get_last_line(file_path: Path, start_line: int) -> int:
-    """
-    This function is aimed to find the last body line of
-    considered method. It work by counting the difference
-    in number of openning brackets '{' and closing brackets
-    '}'. It's start with the method declaration line and going
-    to the line where the difference is equal to 0. Which means
-    that we found closind bracket of method declaration.
-    """
-    with open(file_path, encoding='utf-8') as f:
-        file_lines = list(f)
-        # to start counting opening brackets
-        difference_cases = 0
-
-        processed_declaration_line = file_lines[start_line - 1].split('//')[0]
-        difference_cases += processed_declaration_line.count('{')
-        difference_cases -= processed_declaration_line.count('}')
-        for i, line in enumerate(file_lines[start_line:], start_line):
-            if difference_cases:
-                line_without_comments = line.split('//')[0]
-                difference_cases += line_without_comments.count('{')
-                difference_cases -= line_without_comments.count('}')
-            else:
-                return i
-
-        return -1
-
-
-def get_line_with_first_open_bracket(
+def method_body_lines(
+    method_node: ASTNode,
     file_path: Path,
-    method_decl_start_line: int
-) -> int:
-    f = open(file_path, encoding='utf-8')
-    file_lines = list(f)
-    for i, line in enumerate(file_lines[method_decl_start_line - 2:], method_decl_start_line - 2):
-        if '{' in line:
-            return i + 1
-    return method_decl_start_line + 1
-
-
-def method_body_lines(method_node: ASTNode, file_path: Path) -> Tuple[int, int]:
+    source: Optional[SourceBuffer] = None
+) -> Tuple[int, int]:
     """
-    Get start and end of method's body
+    Get lines of opening and closing brackets of method's body.
+    They are looked up in the braces index of the file,
+    so brackets in string literals and comments are ignored.
+    Source buffer of the file is read, if it is not provided.
     """
     if len(method_node.body):
-        m_decl_start_line = start_line = method_node.line + 1
-        start_line = get_line_with_first_open_bracket(file_path, m_decl_start_line)
-        end_line = _get_last_line(file_path, start_line)
-    else:
-        start_line = end_line = -1
-    return start_line, end_line
+        if source is None:
+            source = SourceBuffer.from_file(file_path)
+        body_lines = source.braces.get_block_lines(method_node.line)
+        if body_lines is not None:
+            return body_lines
+    return -1, -1
 
 
 @typing.no_type_check
@@ -237,22 +205,25 @@ def insert_code_with_new_file_creation(
         invocation_node: ASTNode,
         file_path: Path,
         output_path: Path,
-        dict_original_invocations: Dict[str, List[ASTNode]]
+        dict_original_invocations: Dict[str, List[ASTNode]],
+        source: Optional[SourceBuffer] = None
 ) -> List[Any]:
     """
     If invocations of class methods were found,
     we process through all of them and for each
     substitution opportunity by method's body,
     we create new file.
+    Source buffer of the file is read, if it is not provided.
     """
+    if source is None:
+        source = SourceBuffer.from_file(file_path)
     file_name = file_path.stem
     if not os.path.exists(output_path):
         output_path.mkdir(parents=True)
 
     new_full_filename = Path(output_path, f'{file_name}_{method_node.name}_{invocation_node.line}.java')
     original_func = dict_original_invocations.get(invocation_node.member)[0]  # type: ignore
-    body_start_line, body_end_line = method_body_lines(original_func, file_path)
-    text_lines = read_text_with_autodetected_encoding(str(file_path)).split('\n')
+    body_start_line, body_end_line = method_body_lines(original_func, file_path, source)
     line_to_csv = []
     if body_start_line != body_end_line:
         algorithm_type = determine_algorithm_insertion_type(
@@ -266,7 +237,7 @@ def insert_code_with_new_file_creation(
             line_to_csv = [
                 file_path,
                 class_name,
-                text_lines[invocation_node.line - 1].lstrip(),
+                source.lines[invocation_node.line - 1].rstrip('\n').lstrip(),
                 invocation_node.line,
                 original_func.line,
                 method_node.name,
@@ -281,6 +252,7 @@ def insert_code_with_new_file_creation(
                 body_start_line,
                 body_end_line,
                 new_full_filename,
+                source,
             )
 
     return line_to_csv
@@ -309,6 +281,8 @@ def analyze_file(file_path: Path, output_path: Path) -> List[Any]:
     ast = get_ast_if_possibe(file_path)
     if ast is None:
         return results
+    # file text is read once on the first inlining and shared by all of them
+    source: Optional[SourceBuffer] = None
 
     method_declarations = defaultdict(list)
     classes_declaration = [
@@ -329,23 +303,25 @@ def analyze_file(file_path: Path, output_path: Path) -> List[Any]:
                     ASTNodeType.METHOD_INVOCATION):
                 found_method_decl = method_declarations.get(method_invoked.member, [])
                 # ignore overloaded functions
-                if len(found_method_decl) == 1:
-                    is_matched = is_match_to_the_conditions(
+                is_matched = len(found_method_decl) == 1 and is_match_to_the_conditions(
+                    ast,
+                    method_invoked,
+                    found_method_decl[0]
+                )
+                if is_matched:
+                    if source is None:
+                        source = SourceBuffer.from_file(file_path)
+                    log_of_inline = insert_code_with_new_file_creation(
+                        class_declaration.name,
                         ast,
+                        method_node,
                         method_invoked,
-                        found_method_decl[0]
-                    )
-                    if is_matched:
-                        log_of_inline = insert_code_with_new_file_creation(
-                            class_declaration.name,
-                            ast,
-                            method_node,
-                            method_invoked,
-                            file_path,
-                            output_path,
-                            method_declarations)
-                        if log_of_inline:
-                            results.append(log_of_inline)
+                        file_path,
+                        output_path,
+                        method_declarations,
+                        source)
+                    if log_of_inline:
+                        results.append(log_of_inline)
     return results
 
 
@@ -360,6 +336,72 @@ def save_input_file(input_dir: Path, filename: Path) -> Path:
     return dst_filename
 
 
+def prepare_rows(results: List[List[Any]], input_file: Path, input_dir: Path) -> List[List[Any]]:
+    rows = []
+    for row in results:
+        dst_filename = save_input_file(input_dir, input_file)
+        # change source filename, since it will be chahged
+        row[0] = str(dst_filename.as_posix())
+        #  get local path for inlined filename
+        row[-3] = row[-3].relative_to(os.getcwd()).as_posix()
+        row[2] = str(row[2]).encode('utf8')
+        rows.append(row)
+    return rows
+
+
+def sample_rows(rows: Iterator[Dict[str, str]], sample_size: int, seed: int = 41) -> List[Dict[str, str]]:
+    """
+    Reservoir sampling, which does not keep all rows in memory.
+    """
+    random_generator = random.Random(seed)
+    samples: List[Dict[str, str]] = []
+    for index, row in enumerate(rows):
+        if index < sample_size:
+            samples.append(row)
+        else:
+            replaced_index = random_generator.randint(0, index)
+            if replaced_index < sample_size:
+                samples[replaced_index] = row
+    return samples
+
+
+def create_small_dataset(dataset: ShardedDataset, output: Path, small_dataset_size: int) -> None:
+    samples = sample_rows(dataset.iterate_rows(), small_dataset_size)
+    small_dataset_folder = output / 'small_dataset'
+    small_input_dir = small_dataset_folder / 'input_files'
+    small_input_dir.mkdir(parents=True, exist_ok=True)
+    small_output_dir = small_dataset_folder / 'output_files'
+    small_output_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(small_dataset_folder / 'out.csv', 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADER)
+        writer.writeheader()
+        writer.writerows(samples)
+
+    for sample in samples:
+        input_filename = sample['input filename']
+        shutil.copyfile(input_filename, small_input_dir / Path(input_filename).name)
+        output_filename = sample['output_filename']
+        shutil.copyfile(output_filename, small_output_dir / Path(output_filename).name)
+
+    with tarfile.open(output / 'small_dataset.tar.gz', "w:gz") as tar:
+        tar.add(str(small_dataset_folder), arcname=str(small_dataset_folder))
+    shutil.rmtree(small_dataset_folder)
+
+
+CSV_HEADER = [
+    'input filename',
+    'className',
+    'string where to replace',
+    'line where to replace',
+    'line of original function',
+    'invocation function name',
+    'output_filename',
+    'start_line',
+    'end_line'
+]
+
+
 if __name__ == '__main__':  # noqa: C901
     system_cores_qty = os.cpu_count() or 1
     parser = ArgumentParser()
@@ -383,7 +425,8 @@ if __name__ == '__main__':  # noqa: C901
     parser.add_argument(
         "-z", "--zip",
         action='store_true',
-        help="To zip input and output files."
+        help="To zip input and output files. "
+             "Each completed shard is packed with its files as soon as it is written."
     )
     parser.add_argument(
         "-s", "--small_dataset_size",
@@ -391,92 +434,49 @@ if __name__ == '__main__':  # noqa: C901
         default=100,
         type=int,
     )
+    parser.add_argument(
+        "--shard_size",
+        help="Maximum number of rows in a single output CSV file",
+        default=10000,
+        type=int,
+    )
 
     args = parser.parse_args()
 
     test_files = set(Path(args.dir).glob('**/*Test*.java'))
     not_test_files = set(Path(args.dir).glob('**/*.java'))
-    files_without_tests = list(not_test_files.difference(test_files))
+    files_without_tests = sorted(not_test_files.difference(test_files))
 
     full_dataset_folder = Path(args.output) / 'full_dataset'
     output_dir = full_dataset_folder / 'output_files'
-    if not output_dir.exists():
-        output_dir.mkdir(parents=True)
-
+    output_dir.mkdir(parents=True, exist_ok=True)
     input_dir = full_dataset_folder / 'input_files'
-    if not input_dir.exists():
-        input_dir.mkdir(parents=True)
-    csv_output = Path(full_dataset_folder, 'out.csv')
-
-    with open(csv_output, 'w', newline='\n') as csvfile, ProcessPool(system_cores_qty) as executor:
-        writer = csv.writer(
-            csvfile, delimiter=',',
-            quotechar='"',
-            quoting=csv.QUOTE_MINIMAL
-        )
-        writer.writerow([
-            'input filename',
-            'className',
-            'string where to replace',
-            'line where to replace',
-            'line of original function',
-            'invocation function name',
-            'output_filename',
-            'start_line',
-            'end_line'
-        ])
-
+    input_dir.mkdir(parents=True, exist_ok=True)
+
+    with ShardedDataset(
+        full_dataset_folder,
+        CSV_HEADER,
+        args.shard_size,
+        archived_columns=['input filename', 'output_filename'],
+        archive=args.zip,
+    ) as dataset:
+        # files finished before restart are skipped
+        files_to_process = [
+            filename for filename in files_without_tests
+            if str(filename.absolute()) not in dataset.done_files
+        ]
         p_analyze = partial(analyze_file, output_path=output_dir.absolute())
-        future = executor.map(p_analyze, files_without_tests, timeout=1000, )
-        result = future.result()
-
-        for filename in tqdm(files_without_tests):
+        for filename, future in tqdm(
+            run_in_pool(p_analyze, files_to_process, max(args.jobs, 1), timeout=1000),
+            total=len(files_to_process),
+        ):
             try:
-                single_file_features = next(result)
-                if single_file_features:
-                    for i in single_file_features:
-                        dst_filename = save_input_file(input_dir, filename)
-                        # change source filename, since it will be chahged
-                        i[0] = str(dst_filename.as_posix())
-                        #  get local path for inlined filename
-                        i[-3] = i[-3].relative_to(os.getcwd()).as_posix()
-                        i[2] = str(i[2]).encode('utf8')
-                        writer.writerow(i)
-                csvfile.flush()
-            except StopIteration:
-                continue
+                single_file_features = future.result()
+            except Exception as e:
+                print(f"Processing {filename} is aborted: {e!r}")
+                single_file_features = []
+            rows = prepare_rows(single_file_features, filename, input_dir)
+            dataset.add_file_rows(str(filename.absolute()), rows)
 
     if args.zip:
-        samples = pd.read_csv(csv_output).sample(args.small_dataset_size, random_state=41)
-        small_dataset_folder = Path(args.output) / 'small_dataset'
-        if not small_dataset_folder.exists():
-            small_dataset_folder.mkdir(parents=True)
-        small_input_dir = small_dataset_folder / 'input_files'
-        if not small_input_dir.exists():
-            small_input_dir.mkdir(parents=True)
-        small_output_dir = small_dataset_folder / 'output_files'
-        if not small_output_dir.exists():
-            small_output_dir.mkdir(parents=True)
-
-        samples.to_csv(small_dataset_folder / 'out.csv')
-        for i in samples.iterrows():
-            input_filename = i[1]['input filename']
-            dst_filename = small_input_dir / Path(input_filename).name
-            # print(f"Copy from {input_filename}, to {dst_filename}")
-            shutil.copyfile(input_filename, dst_filename)
-            output_filename = i[1]['output_filename']
-            dst_filename = small_output_dir / Path(output_filename).name
-            # print(f"Copy from {output_filename}, to {dst_filename}")
-            shutil.copyfile(output_filename, dst_filename)
-
-        with tarfile.open(Path(args.output) / 'small_dataset.tar.gz', "w:gz") as tar:
-            tar.add(str(small_dataset_folder), arcname=str(small_dataset_folder))
-
-        with tarfile.open(Path(args.output) / 'full_dataset.tar.gz', "w:gz") as tar:
-            tar.add(str(full_dataset_folder), arcname=str(full_dataset_folder))
-
-        if input_dir.exists():
-            shutil.rmtree(full_dataset_folder)
-
-        if small_dataset_folder.exists():
-            shutil.rmtree(small_dataset_folder)
+        create_small_dataset(dataset, Path(args.output), args.small_dataset_size)
@@ -0,0 +1,163 @@
+import csv
+import json
+import os
+import tarfile
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, Optional, Sequence, Set
+
+
+class ShardedDataset:
+    """
+    CSV dataset, which is written in shards of limited size and survives crashes of the writing process.
+
+    After rows created from an input file are written and flushed,
+    the file is recorded in the journal together with the end offset of the rows in the shard.
+    On restart shards are truncated to the last journaled offsets,
+    so rows of files, which were not finished, are dropped and the files can be processed again.
+    Each run starts a new shard.
+
+    If archiving is on, each completed shard is packed to a tarball
+    together with files referenced in archived_columns of its rows.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        header: Sequence[str],
+        shard_size: int,
+        archived_columns: Sequence[str] = (),
+        archive: bool = False,
+    ):
+        self._folder = folder
+        self._folder.mkdir(parents=True, exist_ok=True)
+        self._header = list(header)
+        self._shard_size = shard_size
+        self._archived_columns_indexes = [self._header.index(column) for column in archived_columns]
+        self._archive = archive
+
+        self._shard_file: Optional[IO[str]] = None
+        self._shard_writer: Any = None
+        self._shard_rows_qty = 0
+
+        self.done_files = self._recover()
+        self._journal = open(self._folder / self._JOURNAL_FILENAME, "a")
+
+    def add_file_rows(self, input_file: str, rows: List[List[Any]]) -> None:
+        if self._shard_file is None:
+            self._open_new_shard()
+        assert self._shard_file is not None
+
+        self._shard_writer.writerows(rows)
+        self._shard_file.flush()
+        self._shard_rows_qty += len(rows)
+        self._write_journal_entry(input_file, Path(self._shard_file.name).name, self._shard_file.tell())
+        self.done_files.add(input_file)
+
+        if self._shard_rows_qty >= self._shard_size:
+            self._close_shard()
+
+    def close(self) -> None:
+        self._close_shard()
+        self._journal.close()
+
+    def iterate_rows(self) -> Iterator[Dict[str, str]]:
+        for shard_path in self._get_shards():
+            with open(shard_path, newline="", encoding="utf-8") as shard_file:
+                yield from csv.DictReader(shard_file)
+
+    def __enter__(self) -> "ShardedDataset":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _recover(self) -> Set[str]:
+        """
+        Returns names of files already done and cuts off not journaled rows from shards.
+        """
+        done_files: Set[str] = set()
+        shards_ends: Dict[str, int] = {}
+        journal_path = self._folder / self._JOURNAL_FILENAME
+        if journal_path.exists():
+            journal_text = journal_path.read_text()
+            for line in journal_text.splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # the last entry may be written partially
+                    continue
+                done_files.add(entry["file"])
+                shards_ends[entry["shard"]] = max(shards_ends.get(entry["shard"], 0), entry["offset"])
+
+            if journal_text and not journal_text.endswith("\n"):
+                with open(journal_path, "a") as journal:
+                    journal.write("\n")
+
+        for shard_path in self._get_shards():
+            shard_end = shards_ends.get(shard_path.name)
+            if shard_end is None:
+                shard_path.unlink()
+                continue
+            with open(shard_path, "rb+") as shard_file:
+                shard_file.truncate(shard_end)
+            if self._archive:
+                self._archive_shard(shard_path)
+        return done_files
+
+    def _open_new_shard(self) -> None:
+        shards = self._get_shards()
+        shard_index = int(shards[-1].stem.split("_")[-1]) + 1 if shards else 0
+        shard_path = self._folder / f"{self._SHARD_PREFIX}{shard_index:05d}.csv"
+        self._shard_file = open(shard_path, "w", newline="", encoding="utf-8")
+        self._shard_writer = csv.writer(self._shard_file, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        self._shard_writer.writerow(self._header)
+        self._shard_rows_qty = 0
+
+    def _close_shard(self) -> None:
+        if self._shard_file is None:
+            return
+        self._shard_file.close()
+        if self._archive:
+            self._archive_shard(Path(self._shard_file.name))
+        self._shard_file = None
+        self._shard_writer = None
+
+    def _write_journal_entry(self, input_file: str, shard_name: str, offset: int) -> None:
+        self._journal.write(json.dumps({"file": input_file, "shard": shard_name, "offset": offset}) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _archive_shard(self, shard_path: Path) -> None:
+        archive_path = self._folder / self._ARCHIVES_FOLDER / (shard_path.stem + ".tar.gz")
+        if archive_path.exists():
+            return
+        archive_path.parent.mkdir(exist_ok=True)
+
+        archived_files = {shard_path}
+        with open(shard_path, newline="", encoding="utf-8") as shard_file:
+            rows = csv.reader(shard_file)
+            next(rows, None)
+            for row in rows:
+                archived_files.update(Path(row[index]) for index in self._archived_columns_indexes)
+
+        temporary_archive_path = archive_path.with_suffix(".tmp")
+        with tarfile.open(temporary_archive_path, "w:gz") as tar:
+            for archived_file in sorted(archived_files):
+                if archived_file.exists():
+                    tar.add(str(archived_file), arcname=self._get_archive_name(archived_file))
+        os.replace(temporary_archive_path, archive_path)
+
+    def _get_archive_name(self, file_path: Path) -> str:
+        try:
+            return file_path.absolute().relative_to(self._folder.absolute().parent).as_posix()
+        except ValueError:
+            return file_path.name
+
+    def _get_shards(self) -> List[Path]:
+        return sorted(self._folder.glob(f"{self._SHARD_PREFIX}*.csv"))
+
+    _JOURNAL_FILENAME = "journal.jsonl"
+
+    _ARCHIVES_FOLDER = "archives"
+
+    _SHARD_PREFIX = "out_"
@@ -1,9 +1,11 @@
 import abc
 from enum import Enum
-from typing import List, Union
+from typing import List, Optional, Union
 import pathlib
 import re
 
+from veniq.utils.source_buffer import SourceBuffer
+
 
 class InlineTypesAlgorithms(Enum):
     WITH_RETURN_WITHOUT_ARGUMENTS = 0
@@ -126,23 +128,19 @@ class IBaseInlineAlgorithm(metaclass=abc.ABCMeta):
 
     def get_lines_before_invocation(
             self,
-            filename_out: pathlib.Path,
-            filename_in: pathlib.Path,
+            lines: List[str],
             invocation_line: int
     ) -> List[str]:
         """
         This function is aimed to obtain lines from the original
         file before invocation line, which was detected.
         """
-        original_file = open(filename_in, encoding='utf-8')
-        lines = list(original_file)
         lines_before_invoсation = lines[:invocation_line - 1]
         return lines_before_invoсation
 
     def get_lines_after_invocation(
             self,
-            filename_out: pathlib.Path,
-            filename_in: pathlib.Path,
+            lines: List[str],
             invocation_line: int
     ) -> List[str]:
         """
@@ -150,8 +148,6 @@ class IBaseInlineAlgorithm(metaclass=abc.ABCMeta):
         file after invocation line, which was detected.
         Especially, it will be inserted after body of inlined method.
         """
-        original_file = open(filename_in, encoding='utf-8')
-        lines = list(original_file)
         lines_after_invoсation = lines[invocation_line:]
         return lines_after_invoсation
 
@@ -162,7 +158,8 @@ class IBaseInlineAlgorithm(metaclass=abc.ABCMeta):
             invocation_line: int,
             body_start_line: int,
             body_end_line: int,
-            filename_out: pathlib.Path
+            filename_out: pathlib.Path,
+            source: Optional[SourceBuffer] = None
     ) -> Union[None, str]:
         raise NotImplementedError("Cannot run abstract function")
 
@@ -179,7 +176,8 @@ class DoNothing(IBaseInlineAlgorithm):
             invocation_line: int,
             body_start_line: int,
             body_end_line: int,
-            filename_out: pathlib.Path
+            filename_out: pathlib.Path,
+            source: Optional[SourceBuffer] = None
     ) -> str:
         return ""
 
@@ -191,8 +189,7 @@ class InlineWithoutReturnWithoutArguments(IBaseInlineAlgorithm):
 
     def get_lines_of_method_body(
             self,
-            filename_out: pathlib.Path,
-            filename_in: pathlib.Path,
+            lines: List[str],
             invocation_line: int,
             body_start_line: int,
             body_end_line: int
@@ -201,8 +198,6 @@ class InlineWithoutReturnWithoutArguments(IBaseInlineAlgorithm):
         In order to get an appropriate text view, we also need to insert
         lines according to the current number of spaced before the line
         """
-        original_file = open(filename_in, encoding='utf-8')
-        lines = list(original_file)
         body_lines_original = self.form_body_for_inline(lines, body_start_line, body_end_line)
         num_spaces_in_body = self.complement_spaces(body_start_line, invocation_line, lines)
         body_lines = []
@@ -222,21 +217,21 @@ class InlineWithoutReturnWithoutArguments(IBaseInlineAlgorithm):
             invocation_line: int,
             body_start_line: int,
             body_end_line: int,
-            filename_out: pathlib.Path
+            filename_out: pathlib.Path,
+            source: Optional[SourceBuffer] = None
     ) -> None:
+        lines = (source or SourceBuffer.from_file(filename_in)).lines
         lines_of_final_file = []
         # original code before method invocation, which will be substituted
         lines_before_invoсation = self.get_lines_before_invocation(
-            filename_out,
-            filename_in,
+            lines,
             invocation_line
         )
         lines_of_final_file += lines_before_invoсation
 
         # body of the original method, which will be inserted
         body_lines = self.get_lines_of_method_body(
-            filename_out,
-            filename_in,
+            lines,
             invocation_line,
             body_start_line + 1,
             body_end_line - 1
@@ -245,8 +240,7 @@ class InlineWithoutReturnWithoutArguments(IBaseInlineAlgorithm):
 
         # original code after method invocation
         original_code_lines = self.get_lines_after_invocation(
-            filename_out,
-            filename_in,
+            lines,
             invocation_line
         )
         lines_of_final_file += original_code_lines
@@ -299,8 +293,7 @@ class InlineWithReturnWithoutArguments(IBaseInlineAlgorithm):
 
     def get_lines_of_method_body(
             self,
-            filename_out: pathlib.Path,
-            filename_in: pathlib.Path,
+            lines: List[str],
             invocation_line: int,
             body_start_line: int,
             body_end_line: int
@@ -311,8 +304,6 @@ class InlineWithReturnWithoutArguments(IBaseInlineAlgorithm):
         """
 
         body_lines = []
-        original_file = open(filename_in, encoding='utf-8')
-        lines = list(original_file)
         # body of the original method, which will be inserted
         body_lines_original = self.form_body_for_inline(lines, body_start_line, body_end_line)
         line_with_declaration = lines[invocation_line - 1].split('=')
@@ -349,20 +340,20 @@ class InlineWithReturnWithoutArguments(IBaseInlineAlgorithm):
             invocation_line: int,
             body_start_line: int,
             body_end_line: int,
-            filename_out: pathlib.Path
+            filename_out: pathlib.Path,
+            source: Optional[SourceBuffer] = None
     ) -> None:
+        lines = (source or SourceBuffer.from_file(filename_in)).lines
         lines_of_final_file = []
         # original code before method invocation, which will be substituted
         lines_before_invoсation = self.get_lines_before_invocation(
-            filename_out,
-            filename_in,
+            lines,
             invocation_line
         )
         lines_of_final_file += lines_before_invoсation
         # body of the original method, which will be inserted
         body_lines = self.get_lines_of_method_body(
-            filename_out,
-            filename_in,
+            lines,
             invocation_line,
             body_start_line + 1,
             body_end_line - 1
@@ -371,8 +362,7 @@ class InlineWithReturnWithoutArguments(IBaseInlineAlgorithm):
 
         # original code after method invocation
         original_code_lines = self.get_lines_after_invocation(
-            filename_out,
-            filename_in,
+            lines,
             invocation_line
         )
         lines_of_final_file += original_code_lines
@@ -1,8 +1,168 @@
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from javalang.ast import Node
 from javalang.parse import parse
+from javalang.parser import Parser
+from javalang.tokenizer import tokenize
 from javalang.tree import CompilationUnit
 
+from veniq.ast_framework.storage import NodeSpan
 from veniq.utils.encoding_detector import read_text_with_autodetected_encoding
 
 
 def build_ast(filename: str) -> CompilationUnit:
     return parse(read_text_with_autodetected_encoding(filename))
+
+
+def build_ast_with_spans(filename: str) -> Tuple[CompilationUnit, Dict[Node, NodeSpan]]:
+    return parse_with_spans(read_text_with_autodetected_encoding(filename))
+
+
+def parse_with_spans(text: str) -> Tuple[CompilationUnit, Dict[Node, NodeSpan]]:
+    """
+    Parses Java source code and finds span of each javalang node from tokens consumed while parsing it.
+    Spans are to be passed to AST.build_from_javalang, which extends them to cover spans of children.
+    Nodes created by javalang inside parsing methods, e.g. the first declarator of a field or a parameter of a catch,
+    are not returned by any method, their spans are found from tokens of their names.
+    Recording spans makes parsing about a quarter slower, so build_ast does not do it.
+    """
+
+    parser = _SpansRecordingParser(tokenize(text))
+    compilation_unit = parser.parse()
+    tokens = parser.tokens.list
+    _add_inline_nodes_tokens_ranges(compilation_unit, tokens, parser.tokens_ranges)
+    spans: Dict[Node, NodeSpan] = {}
+    for node, (start, end) in parser.tokens_ranges.items():
+        first_token = tokens[start]
+        last_token = tokens[end - 1]
+        end_line = last_token.position.line + last_token.value.count("\n")
+        if "\n" in last_token.value:
+            end_column = len(last_token.value) - last_token.value.rfind("\n")
+        else:
+            end_column = last_token.position.column + len(last_token.value)
+        spans[node] = NodeSpan(first_token.position.line, first_token.position.column, end_line, end_column)
+    return compilation_unit, spans
+
+
+def _add_inline_nodes_tokens_ranges(
+    compilation_unit: CompilationUnit, tokens: List[Any], tokens_ranges: Dict[Node, Tuple[int, int]]
+) -> None:
+    """
+    Tree is walked in order of attributes, which follows order of source code,
+    while the cursor is kept after tokens of nodes visited so far.
+    Names of a node without a range are looked up from the cursor within the range of its closest ancestor having one.
+    """
+
+    cursor = 0
+    # node or end of range to move the cursor to after leaving a node, and the closest range of an ancestor
+    stack: List[Tuple[Any, Tuple[int, int]]] = [(compilation_unit, (0, len(tokens)))]
+    while stack:
+        item, ancestor_range = stack.pop()
+        if isinstance(item, int):
+            cursor = max(cursor, item)
+            continue
+
+        node_range = tokens_ranges.get(item)
+        if node_range is not None:
+            cursor = node_range[0]
+            ancestor_range = node_range
+            stack.append((node_range[1], ancestor_range))
+        else:
+            # children of the node are looked up in the range of the ancestor, as they follow its names
+            names_range = _find_names_tokens_range(item, tokens, cursor, ancestor_range[1])
+            if names_range is not None:
+                tokens_ranges[item] = names_range
+                cursor = names_range[1]
+
+        for child in reversed(item.children):
+            if isinstance(child, Node):
+                stack.append((child, ancestor_range))
+            elif isinstance(child, list):
+                stack.extend((grandchild, ancestor_range) for grandchild in reversed(child)
+                             if isinstance(grandchild, Node))
+
+
+def _find_names_tokens_range(node: Node, tokens: List[Any], start: int, end: int) -> Optional[Tuple[int, int]]:
+    """
+    Finds tokens of types of a node, if any, followed by tokens of its name, both may be qualified.
+    """
+
+    names = [name for name in getattr(node, "types", None) or [] if isinstance(name, str)]
+    name = getattr(node, "name", None)
+    if isinstance(name, str):
+        names.append(name)
+
+    names_range: Optional[Tuple[int, int]] = None
+    for name in names:
+        name_tokens_values = name.replace(".", " . ").split()
+        for index in range(start, end - len(name_tokens_values) + 1):
+            if all(tokens[index + shift].value == value for shift, value in enumerate(name_tokens_values)):
+                start = index + len(name_tokens_values)
+                names_range = (index if names_range is None else names_range[0], start)
+                break
+    return names_range
+
+
+class _SpansRecordingParser(Parser):
+    """
+    Remembers for each node the range of indexes of tokens consumed by parsing methods, which returned it.
+    Several methods may return the same node, e.g. a declaration is completed by the rule of its rest,
+    so the widest range is kept.
+    """
+
+    def __init__(self, tokens: Any):
+        super().__init__(tokens)
+        self.tokens_ranges: Dict[Node, Tuple[int, int]] = {}
+
+
+def _record_tokens_range(parse_method: Callable[..., Any]) -> Callable[..., Any]:
+    @wraps(parse_method)
+    def recording_parse_method(self: _SpansRecordingParser, *args: Any, **kwargs: Any) -> Any:
+        start = self.tokens.marker
+        result = parse_method(self, *args, **kwargs)
+        end = self.tokens.marker
+        if isinstance(result, Node) and start < end:
+            known_range = self.tokens_ranges.get(result)
+            if known_range is None:
+                self.tokens_ranges[result] = (start, end)
+            elif start < known_range[0] or end > known_range[1]:
+                self.tokens_ranges[result] = (min(start, known_range[0]), max(end, known_range[1]))
+        return result
+
+    return recording_parse_method
+
+
+# parsing methods, which never return a node, are not wrapped to keep parsing fast
+_parse_methods_without_nodes = {
+    "parse_arguments",
+    "parse_array_dimension",
+    "parse_block",
+    "parse_catches",
+    "parse_class_body",
+    "parse_class_creator_rest",
+    "parse_element_value_pairs",
+    "parse_element_values",
+    "parse_expression_2_rest",
+    "parse_for_init_or_update",
+    "parse_for_variable_declarator_rest",
+    "parse_formal_parameters",
+    "parse_identifier",
+    "parse_infix_operator",
+    "parse_method_reference",
+    "parse_modifiers",
+    "parse_qualified_identifier",
+    "parse_qualified_identifier_list",
+    "parse_resource_specification",
+    "parse_switch_block_statement_groups",
+    "parse_type_arguments",
+    "parse_type_arguments_or_diamond",
+    "parse_type_list",
+    "parse_variable_declarator_rest",
+    "parse_variable_declarators",
+    "parse_variable_modifiers",
+}
+
+for _method_name, _method in list(vars(Parser).items()):
+    if _method_name.startswith("parse_") and callable(_method) and _method_name not in _parse_methods_without_nodes:
+        setattr(_SpansRecordingParser, _method_name, _record_tokens_range(_method))
@@ -0,0 +1,129 @@
+import os
+import zlib
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import List, Optional, Tuple, Union
+
+import javalang
+
+import veniq
+from veniq.ast_framework import AST
+from veniq.ast_framework.storage import CompactStorage
+from veniq.utils.ast_builder import parse_with_spans
+from veniq.utils.encoding_detector import decode_with_autodetected_encoding
+
+# must be changed on any change of AST storage binary representation or of data stored in it, e.g. spans
+_FORMAT_VERSION = 3
+
+
+class ASTCache:
+    """
+    Persistent cache of ASTs built from Java files.
+    Entries are keyed by SHA-256 of file content, veniq and javalang versions,
+    so a file is parsed again only if it was changed or tools were updated.
+    Cached ASTs keep spans of nodes, as recording them is paid only once per file.
+
+    Each entry is a separate file, which is written atomically,
+    so the cache can be shared by several processes.
+    When total size of entries exceeds max_size bytes, least recently used entries are removed.
+    Usage of an entry is tracked by its modification time.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_size: int = 1024 ** 3, eviction_period: int = 1000):
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_size = max_size
+        self._eviction_period = eviction_period
+        self._stored_entries_qty = 0
+
+    def get_ast(self, file_path: Union[str, Path]) -> AST:
+        data = Path(file_path).read_bytes()
+        entry_path = self._get_entry_path(data)
+
+        storage = self._load(entry_path)
+        if storage is None:
+            storage, _ = CompactStorage.build_from_javalang(*parse_with_spans(decode_with_autodetected_encoding(data)))
+            self._store(entry_path, storage)
+        return AST(storage, 1)
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries and temporary files left by processes,
+        which were killed while storing an entry.
+        """
+        self._remove_stale_temporary_files()
+        entries: List[Tuple[float, int, Path]] = []
+        for entry_path in self._directory.glob(f"*/*{self._ENTRY_SUFFIX}"):
+            try:
+                entry_stat = entry_path.stat()
+            except FileNotFoundError:
+                # entry was removed by another process
+                continue
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, entry_path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            try:
+                entry_path.unlink()
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def _remove_stale_temporary_files(self) -> None:
+        # younger temporary files may be being written by other processes
+        stale_time = time() - self._TEMPORARY_FILE_MAX_AGE
+        for temporary_file_path in self._directory.glob(f"*/*{self._TEMPORARY_FILE_SUFFIX}"):
+            try:
+                if temporary_file_path.stat().st_mtime < stale_time:
+                    temporary_file_path.unlink()
+            except FileNotFoundError:
+                # file was stored as an entry or removed by another process
+                pass
+
+    def _get_entry_path(self, data: bytes) -> Path:
+        key = sha256(self._key_prefix)
+        key.update(data)
+        key_hex = key.hexdigest()
+        return self._directory / key_hex[:2] / (key_hex + self._ENTRY_SUFFIX)
+
+    def _load(self, entry_path: Path) -> Optional[CompactStorage]:
+        try:
+            data = entry_path.read_bytes()
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+
+        try:
+            return CompactStorage.from_bytes(zlib.decompress(data))
+        except Exception:
+            # corrupted entry is treated as missing one
+            return None
+
+    def _store(self, entry_path: Path, storage: CompactStorage) -> None:
+        entry_path.parent.mkdir(exist_ok=True)
+        entry_file = NamedTemporaryFile(dir=entry_path.parent, suffix=self._TEMPORARY_FILE_SUFFIX, delete=False)
+        try:
+            with entry_file:
+                entry_file.write(zlib.compress(storage.to_bytes(), 1))
+            os.replace(entry_file.name, entry_path)
+        except BaseException:
+            # e.g. disk is full, temporary file would never be evicted as an entry
+            os.unlink(entry_file.name)
+            raise
+
+        self._stored_entries_qty += 1
+        if self._stored_entries_qty % self._eviction_period == 0:
+            self.evict()
+
+    _ENTRY_SUFFIX = ".ast"
+
+    _TEMPORARY_FILE_SUFFIX = ".tmp"
+
+    # seconds after which a temporary file is considered to be left by a killed process
+    _TEMPORARY_FILE_MAX_AGE = 3600
+
+    _key_prefix = f"veniq {veniq.__version__} javalang {javalang.__version__} format {_FORMAT_VERSION}\n".encode()
@@ -0,0 +1,151 @@
+"""
+Snapshot of ASTs of many Java files written once into a single file.
+Snapshot is opened through mmap, so any number of processes share the same pages
+and get read-only ASTs without parsing files or pickling trees between processes.
+
+Usage:
+    python -m veniq.utils.ast_snapshot -d DIR -o SNAPSHOT
+"""
+
+import os
+import pickle
+import sys
+from argparse import ArgumentParser
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+from struct import Struct
+from tempfile import NamedTemporaryFile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import veniq
+from veniq.ast_framework import AST
+from veniq.ast_framework.storage import CompactStorage
+from veniq.corpus.driver import find_java_files
+from veniq.utils.ast_builder import build_ast_with_spans
+
+_MAGIC = b"VENIQAST"
+
+# must be changed on any change of the snapshot layout
+_FORMAT_VERSION = 2
+
+# magic, format version, byte order mark written as native 1, offset of the files index
+_file_header = Struct("=8siiq")
+
+# trees start at offsets aligned to this number of bytes, so their arrays are aligned as well
+_ALIGNMENT = 8
+
+
+class ASTSnapshot:
+    """
+    Read-only ASTs of files kept in a snapshot, which are opened without copying trees into memory.
+    Snapshot is written by ASTSnapshot.write for particular versions of veniq and of the platform byte order,
+    opening it in other environment raises ValueError.
+    Files are identified by paths relative to the root directory given on writing,
+    which may be replaced on opening, e.g. if the project was moved together with its snapshot.
+    Size and modification time of each file are recorded, so a file changed since writing is not taken from a snapshot.
+    """
+
+    def __init__(self, snapshot_path: Union[str, Path], root_directory: Union[str, Path, None] = None):
+        with open(snapshot_path, "rb") as snapshot_file:
+            # mapping stays open while views of it are used, even after the file is closed
+            self._buffer = memoryview(mmap(snapshot_file.fileno(), 0, access=ACCESS_READ))
+
+        magic, format_version, byte_order_mark, index_offset = _file_header.unpack_from(self._buffer)
+        if magic != _MAGIC or format_version != _FORMAT_VERSION or byte_order_mark != 1:
+            raise ValueError(f"{snapshot_path} is not an AST snapshot of format {_FORMAT_VERSION} "
+                             f"with {sys.byteorder} byte order.")
+
+        veniq_version, written_root_directory, self._entries = pickle.loads(self._buffer[index_offset:])
+        if veniq_version != veniq.__version__:
+            raise ValueError(f"{snapshot_path} was written by veniq {veniq_version}, "
+                             f"while veniq {veniq.__version__} is used.")
+        self._root_directory = os.path.abspath(root_directory or written_root_directory)
+
+    @staticmethod
+    def write(
+        snapshot_path: Union[str, Path],
+        root_directory: Union[str, Path],
+        files: Optional[Iterable[Union[str, Path]]] = None,
+    ) -> List[str]:
+        """
+        Parses files of the root directory, by default all its Java files,
+        and writes their ASTs with spans of nodes atomically.
+        Returns paths of files, which failed to be parsed, they are not included into the snapshot.
+        """
+        snapshot_path = Path(snapshot_path)
+        root_directory = os.path.abspath(root_directory)
+        if files is None:
+            files = find_java_files(Path(root_directory))
+        # offset and size of a tree, size and modification time of its file by relative path of the file
+        entries: Dict[str, Tuple[int, int, int, int]] = {}
+        failed_files: List[str] = []
+        with NamedTemporaryFile(dir=snapshot_path.parent, suffix=".tmp", delete=False) as snapshot_file:
+            snapshot_file.write(_file_header.pack(_MAGIC, _FORMAT_VERSION, 1, 0))
+            for file_path in map(str, files):
+                try:
+                    # file is checked before parsing, so its change during parsing is detected on reading
+                    file_stat = os.stat(file_path)
+                    storage, _ = CompactStorage.build_from_javalang(*build_ast_with_spans(file_path))
+                except Exception:
+                    failed_files.append(file_path)
+                    continue
+
+                snapshot_file.write(bytes(-snapshot_file.tell() % _ALIGNMENT))
+                offset = snapshot_file.tell()
+                storage.write_snapshot(snapshot_file)
+                entries[_get_relative_path(file_path, root_directory)] = (
+                    offset, snapshot_file.tell() - offset, file_stat.st_size, file_stat.st_mtime_ns
+                )
+
+            index_offset = snapshot_file.tell()
+            pickle.dump((veniq.__version__, root_directory, entries), snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+            snapshot_file.seek(0)
+            snapshot_file.write(_file_header.pack(_MAGIC, _FORMAT_VERSION, 1, index_offset))
+        os.replace(snapshot_file.name, snapshot_path)
+        return failed_files
+
+    def get_ast(self, file_path: Union[str, Path]) -> AST:
+        """
+        Raises KeyError, if the file is not found in the snapshot or was changed since the snapshot was written.
+        """
+        entry = self._entries.get(_get_relative_path(file_path, self._root_directory))
+        if entry is None:
+            raise KeyError(f"{file_path} is not found in the snapshot.")
+        offset, size, file_size, file_mtime_ns = entry
+        file_stat = os.stat(file_path)
+        if (file_stat.st_size, file_stat.st_mtime_ns) != (file_size, file_mtime_ns):
+            raise KeyError(f"{file_path} was changed since the snapshot was written.")
+        return AST(CompactStorage.from_snapshot(self._buffer[offset:offset + size]), 1)
+
+    def __contains__(self, file_path: object) -> bool:
+        return (
+            isinstance(file_path, (str, Path))
+            and _get_relative_path(file_path, self._root_directory) in self._entries
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Yields paths of files relative to the root directory.
+        """
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _get_relative_path(file_path: Union[str, Path], root_directory: str) -> str:
+    return Path(os.path.relpath(os.path.abspath(file_path), root_directory)).as_posix()
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    parser = ArgumentParser(description="Parse all Java files in a directory into an AST snapshot.")
+    parser.add_argument("-d", "--dir", required=True, help="Directory with Java files to parse")
+    parser.add_argument("-o", "--output", required=True, help="Snapshot file to write")
+    args = parser.parse_args(arguments)
+
+    for failed_file in ASTSnapshot.write(args.output, args.dir):
+        print(f"Failed to parse {failed_file}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from array import array
+from typing import Optional, Tuple
+
+from javalang.tokenizer import Separator, tokenize
+
+
+class BracesIndex:
+    """
+    Pairs of matching curly braces of a Java source built in a single pass over its tokens.
+    Braces inside string literals and comments are not tokens, so they are not taken into account.
+    All lines are 1-based.
+    """
+
+    def __init__(self, text: str):
+        # lines of opening braces and of braces closing them in order of opening braces
+        self._opening_lines = array("i")
+        self._closing_lines = array("i")
+
+        unclosed_braces = []
+        for token in tokenize(text):
+            if not isinstance(token, Separator):
+                continue
+            if token.value == "{":
+                unclosed_braces.append(len(self._opening_lines))
+                self._opening_lines.append(token.position.line)
+                self._closing_lines.append(-1)
+            elif token.value == "}" and unclosed_braces:
+                self._closing_lines[unclosed_braces.pop()] = token.position.line
+
+        lines_qty = text.count("\n") + 1
+        # index of the first opening brace located on the line or after it
+        self._first_opening_from_line = array("i", [-1]) * (lines_qty + 2)
+        for brace_index in reversed(range(len(self._opening_lines))):
+            self._first_opening_from_line[self._opening_lines[brace_index]] = brace_index
+        for line in reversed(range(1, lines_qty + 1)):
+            if self._first_opening_from_line[line] == -1:
+                self._first_opening_from_line[line] = self._first_opening_from_line[line + 1]
+
+    def get_block_lines(self, line: int) -> Optional[Tuple[int, int]]:
+        """
+        Returns lines of the first opening brace located on the given line or after it
+        and of the brace closing it.
+        None is returned, if there is no such pair of braces.
+        """
+        if not 0 < line < len(self._first_opening_from_line):
+            return None
+        brace_index = self._first_opening_from_line[line]
+        if brace_index == -1 or self._closing_lines[brace_index] == -1:
+            return None
+        return self._opening_lines[brace_index], self._closing_lines[brace_index]
@@ -14,6 +14,10 @@ def read_text_with_autodetected_encoding(filename: str):
     with open(filename, 'rb') as target_file:
         data = target_file.read()
 
+    return decode_with_autodetected_encoding(data)
+
+
+def decode_with_autodetected_encoding(data: bytes) -> str:
     if not data:
         return ''  # In case of empty file, return empty string
 
@@ -0,0 +1,53 @@
+from concurrent.futures import Future, FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from pebble import ProcessPool
+
+Item = TypeVar("Item")
+
+
+def run_in_pool(
+    function: Callable[..., Any],
+    items: Iterable[Item],
+    jobs: int,
+    timeout: Optional[float] = None,
+    queue_size: Optional[int] = None,
+) -> Iterator[Tuple[Item, Future]]:
+    """
+    Calls function with each item in a pool of processes and yields items with finished futures
+    in order of completion.
+    Only queue_size items (by default 4 per process) are submitted to the pool at once,
+    so items may be a lazy sequence of any length.
+    Items are pulled again after each finished call, so an iterator, which runs out only for a while
+    (e.g. gets new items from results of previous calls), is resumed until all calls are finished.
+    Future of a call lasting longer than timeout seconds raises concurrent.futures.TimeoutError.
+    """
+    items_iterator = iter(items)
+    with ProcessPool(max_workers=jobs) as pool:
+        pending_items: Dict[Future, Item] = {}
+
+        def schedule(items_to_schedule: Iterable[Item]) -> None:
+            for item in items_to_schedule:
+                pending_items[pool.schedule(function, args=(item,), timeout=timeout)] = item
+
+        schedule(islice(items_iterator, queue_size or 4 * jobs))
+        while pending_items:
+            done_futures, _ = wait(pending_items, return_when=FIRST_COMPLETED)
+            for future in done_futures:
+                yield pending_items.pop(future), future
+            schedule(islice(items_iterator, len(done_futures)))
+
+
+def get_result_or_error(future: Future) -> Tuple[Any, Optional[str]]:
+    """
+    Returns result of a finished call made by run_in_pool and None,
+    or None and description of the failure of the call, to be reported instead of its result.
+    """
+    try:
+        return future.result(), None
+    except FutureTimeoutError:
+        return None, "Timeout"
+    except Exception as e:
+        # worker process may die, e.g. on recursion limit or lack of memory
+        return None, f"Analysis failed: {e!r}"
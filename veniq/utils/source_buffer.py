@@ -0,0 +1,39 @@
+from itertools import accumulate
+from pathlib import Path
+from typing import List, Union
+
+from cached_property import cached_property  # type: ignore
+
+from veniq.ast_framework.storage import NodeSpan
+from veniq.utils.braces_index import BracesIndex
+
+
+class SourceBuffer:
+    """
+    Text of a source file read once and split to lines.
+    Lines keep their line endings, as if they were read from a file opened in text mode.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lines: List[str] = [line + "\n" for line in text.split("\n")]
+        if text.endswith("\n") or not text:
+            self.lines.pop()
+        else:
+            self.lines[-1] = self.lines[-1][:-1]
+        # offset of the first character of each line in the text
+        self.lines_offsets: List[int] = [0, *accumulate(len(line) for line in self.lines[:-1])] if self.lines else []
+
+    @cached_property
+    def braces(self) -> BracesIndex:
+        return BracesIndex(self.text)
+
+    def get_span_text(self, span: NodeSpan) -> str:
+        start = self.lines_offsets[span.start_line - 1] + span.start_column - 1
+        end = self.lines_offsets[span.end_line - 1] + span.end_column - 1
+        return self.text[start:end]
+
+    @staticmethod
+    def from_file(file_path: Union[str, Path]) -> "SourceBuffer":
+        with open(file_path, encoding="utf-8") as source_file:
+            return SourceBuffer(source_file.read())